@@ -43,6 +43,32 @@ class APIService {
         return try JSONDecoder().decode([Facility].self, from: data)
     }
     
+    /// Full facility list together with the dataset version it belongs to.
+    /// Keep the version and pass it to fetchFacilityChanges(since:) afterwards.
+    func fetchFacilitySnapshot() async throws -> FacilitySnapshot {
+        let url = URL(string: "\(baseURL)/facilities")!
+        let (data, response) = try await session.data(from: url)
+        let facilities = try JSONDecoder().decode([Facility].self, from: data)
+        let version = (response as? HTTPURLResponse)
+            .flatMap { $0.value(forHTTPHeaderField: "X-Dataset-Version") }
+            .flatMap { Int($0) } ?? 0
+        return FacilitySnapshot(version: version, facilities: facilities)
+    }
+
+    /// Facilities upserted or deleted since a dataset version.
+    /// When fullResync is true, call fetchFacilitySnapshot() instead.
+    func fetchFacilityChanges(since version: Int) async throws -> FacilityChanges {
+        var components = URLComponents(string: "\(baseURL)/facilities/changes")!
+        components.queryItems = [URLQueryItem(name: "since", value: String(version))]
+
+        let (data, response) = try await session.data(from: components.url!)
+        guard let httpResponse = response as? HTTPURLResponse,
+              (200...299).contains(httpResponse.statusCode) else {
+            throw APIError.networkError
+        }
+        return try JSONDecoder().decode(FacilityChanges.self, from: data)
+    }
+
     func fetchFacilityDetails(id: String) async throws -> Facility {
         let url = URL(string: "\(baseURL)/facilities/\(id)")!
         let (data, _) = try await session.data(from: url)
@@ -178,6 +204,21 @@ enum APIError: LocalizedError {
     }
 }
 
+// MARK: - Facility Sync
+
+struct FacilitySnapshot {
+    let version: Int
+    let facilities: [Facility]
+}
+
+struct FacilityChanges: Codable {
+    let version: Int
+    let since: Int
+    let fullResync: Bool
+    let upserted: [Facility]
+    let deleted: [String]
+}
+
 // MARK: - Facility Score
 
 struct FacilityScore: Codable {
@@ -3,15 +3,83 @@ BrainSAIT Unified Dashboard - Backend API
 FastAPI-based backend for unified dashboard observability
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from typing import Dict, List, Any
+from pydantic import BaseModel
+from typing import Dict, List, Any, Optional, Tuple
 import asyncio
+import base64
+import httpx
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+import os
 import sqlite3
+import sys
+
+# Shared integration modules live in ../services
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+
+import partitions
+import reconciliation
+import timeseries
+import workflow_engine
+from agent_registry import AGENT_REGISTRY, CATEGORIES, categorize
+from eligibility import EligibilityQueueFull, EligibilityService
+from paylinc_client import PayLincAPIError
+from paylinc_integration import (
+    PAYLINC_BASE_URL,
+    PAYLINC_WEBSOCKET_URL,
+    AgentStatus,
+    LINCAgentMonitor,
+    PayLincIntegration,
+    PaymentTransaction,
+)
+
+DB_PATH = 'dashboard.db'
+
+# Seconds between background rollup compaction passes
+ROLLUP_COMPACT_INTERVAL = 10
+
+# Page size limits for /api/v1/payments/recent
+RECENT_PAGE_MAX = 500
+NDJSON_PAGE_SIZE = 1000
+
+# Background LINC agent health checks (see LINCAgentMonitor)
+ENABLE_AGENTS_MONITORING = os.getenv("ENABLE_AGENTS_MONITORING", "true").lower() == "true"
+AGENTS_HOST = os.getenv("AGENTS_HOST", "localhost")
+
+# Workflow execution on LINC agents (see WorkflowEngine)
+ENABLE_WORKFLOW_ENGINE = os.getenv("ENABLE_WORKFLOW_ENGINE", "true").lower() == "true"
+
+# Real-time PayLinc event stream (see PayLincStreamConsumer)
+PAYLINC_API_KEY = os.getenv("PAYLINC_API_KEY")
+ENABLE_PAYLINC = os.getenv("ENABLE_PAYLINC", "true").lower() == "true"
+PAYLINC_STREAM_URL = os.getenv("PAYLINC_WEBSOCKET_URL", PAYLINC_WEBSOCKET_URL)
+PAYLINC_API_URL = os.getenv("PAYLINC_BASE_URL", PAYLINC_BASE_URL)
+
+# Background reconciliation of PayLinc against the payments table. Each pass
+# covers the trailing lookback, skipping the newest minutes still in flight.
+ENABLE_RECONCILIATION = os.getenv("ENABLE_RECONCILIATION", "true").lower() == "true"
+RECONCILE_INTERVAL = int(os.getenv("RECONCILE_INTERVAL", "3600"))
+RECONCILE_LOOKBACK = timedelta(hours=24)
+RECONCILE_SETTLE_DELAY = timedelta(minutes=10)
+
+# Monthly partitioning of payments and compressed archives of old months
+# (see partitions.py); maintenance runs this often
+ENABLE_PARTITIONING = os.getenv("ENABLE_PARTITIONING", "true").lower() == "true"
+PARTITION_INTERVAL = int(os.getenv("PARTITION_INTERVAL", "3600"))
+ARCHIVE_DIR = os.getenv("PAYMENT_ARCHIVE_DIR", "payment_archives")
+archive_reader = partitions.ArchiveReader(ARCHIVE_DIR)
+
+# On-demand request profiling (see request_profiler.py). Captures are served
+# under /admin/profiles to callers presenting PROFILER_SECRET.
+ENABLE_PROFILER = os.getenv("ENABLE_PROFILER", "false").lower() == "true"
+PROFILER_SECRET = os.getenv("PROFILER_SECRET")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.001"))
+PROFILE_SLOW_MS = int(os.getenv("PROFILE_SLOW_MS", "2000"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,6 +97,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if ENABLE_PROFILER:
+    # Imported only when enabled: the implementation lives in the RHDTE
+    # backend checkout, which a standalone dashboard deployment may not have
+    from request_profiler import ProfilerMiddleware, RequestProfiler, profiler_router
+
+    request_profiler = RequestProfiler(
+        PROFILE_DIR,
+        secret=PROFILER_SECRET,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        slow_threshold=PROFILE_SLOW_MS / 1000
+    )
+    app.add_middleware(ProfilerMiddleware, profiler=request_profiler)
+    app.include_router(profiler_router(request_profiler))
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
@@ -42,7 +124,7 @@ class ConnectionManager:
         self.active_connections.remove(websocket)
     
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        for connection in list(self.active_connections):
             try:
                 await connection.send_json(message)
             except:
@@ -52,7 +134,7 @@ manager = ConnectionManager()
 
 # Database initialization
 def init_db():
-    conn = sqlite3.connect('dashboard.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
     # Payment transactions table
@@ -65,6 +147,10 @@ def init_db():
                   timestamp DATETIME,
                   metadata TEXT)''')
     
+    # Keyset pagination index for recent payments
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_payments_timestamp_id
+                 ON payments (timestamp DESC, id DESC)''')
+    
     # Agent status table
     c.execute('''CREATE TABLE IF NOT EXISTS agent_status
                  (agent_id TEXT PRIMARY KEY,
@@ -74,6 +160,13 @@ def init_db():
                   last_heartbeat DATETIME,
                   metrics TEXT)''')
     
+    # Category is resolved once per agent instead of on every read
+    c.execute('PRAGMA table_info(agent_status)')
+    if "category" not in [column[1] for column in c.fetchall()]:
+        c.execute('ALTER TABLE agent_status ADD COLUMN category TEXT')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_agent_status_category
+                 ON agent_status (category)''')
+    
     # Workflow tasks table
     c.execute('''CREATE TABLE IF NOT EXISTS workflows
                  (id TEXT PRIMARY KEY,
@@ -84,6 +177,24 @@ def init_db():
                   updated_at DATETIME,
                   data TEXT)''')
     
+    # Leases and results used by the workflow engine
+    workflow_engine.init_workflow_engine(conn)
+    
+    # Resume positions of real-time feeds
+    c.execute('''CREATE TABLE IF NOT EXISTS stream_state
+                 (name TEXT PRIMARY KEY,
+                  resume_token TEXT,
+                  updated_at DATETIME)''')
+    
+    # Time-series rollups over payments
+    timeseries.init_rollups(conn)
+    
+    # Reconciliation runs and discrepancies against PayLinc
+    reconciliation.init_reconciliation(conn)
+    
+    # Catalog of monthly payment partitions and archives
+    partitions.init_partitions(conn)
+    
     conn.commit()
     conn.close()
 
@@ -96,13 +207,14 @@ init_db()
 @app.get("/api/v1/payments/overview")
 async def get_payment_overview():
     """Get payment channels overview"""
-    conn = sqlite3.connect('dashboard.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
-    # Get payment statistics
+    # Get payment statistics; today is always in the live partition, and a
+    # range on timestamp uses its index instead of scanning every row
     c.execute('''SELECT gateway, COUNT(*), SUM(amount), AVG(amount)
                  FROM payments
-                 WHERE date(timestamp) = date('now')
+                 WHERE timestamp >= date('now') AND timestamp < date('now', '+1 day')
                  GROUP BY gateway''')
     
     stats = {}
@@ -149,73 +261,189 @@ async def get_payment_overview():
         }
     }
 
-@app.get("/api/v1/payments/recent")
-async def get_recent_payments(limit: int = 50):
-    """Get recent payment transactions"""
-    conn = sqlite3.connect('dashboard.db')
-    c = conn.cursor()
+def _encode_cursor(timestamp: str, payment_id: str) -> str:
+    """Encode a (timestamp, id) keyset position as an opaque cursor"""
+    raw = json.dumps([timestamp, payment_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        timestamp, payment_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), str(payment_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _fetch_payment_page(conn, before: Optional[Tuple[str, str]], limit: int, with_metadata: bool,
+                        with_archived: bool = False):
+    """Fetch one page of payments, newest first, strictly older than the cursor"""
+    columns = ["id", "timestamp", "gateway", "amount", "currency", "status"]
+    if with_metadata:
+        columns.append("metadata")
     
-    c.execute('''SELECT * FROM payments
-                 ORDER BY timestamp DESC
-                 LIMIT ?''', (limit,))
+    rows = partitions.fetch_page(conn, before, limit, columns,
+                                 archive_reader if with_archived else None)
     
     payments = []
-    for row in c.fetchall():
-        payments.append({
+    for row in rows:
+        payment = {
             "id": row[0],
-            "gateway": row[1],
-            "amount": row[2],
-            "currency": row[3],
-            "status": row[4],
-            "timestamp": row[5],
-            "metadata": json.loads(row[6]) if row[6] else {}
-        })
+            "gateway": row[2],
+            "amount": row[3],
+            "currency": row[4],
+            "status": row[5],
+            "timestamp": row[1]
+        }
+        if with_metadata:
+            payment["metadata"] = json.loads(row[6]) if row[6] else {}
+        payments.append(payment)
+    return payments
+
+def _read_payment_page(before: Optional[Tuple[str, str]], limit: int, with_metadata: bool,
+                       with_archived: bool):
+    """_fetch_payment_page on a connection of its own
+
+    Blocking (archived months may be decompressed first), so async callers
+    run it in a worker thread.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return _fetch_payment_page(conn, before, limit, with_metadata, with_archived)
+    finally:
+        conn.close()
+
+def _stream_payments_ndjson(before: Optional[Tuple[str, str]], with_metadata: bool, with_archived: bool):
+    """Yield every payment older than the cursor as NDJSON, one page at a time"""
+    while True:
+        page = _read_payment_page(before, NDJSON_PAGE_SIZE, with_metadata, with_archived)
+        
+        if not page:
+            return
+        yield "".join(json.dumps(payment) + "\n" for payment in page)
+        
+        if len(page) < NDJSON_PAGE_SIZE:
+            return
+        before = (page[-1]["timestamp"], page[-1]["id"])
+
+@app.get("/api/v1/payments/recent")
+async def get_recent_payments(
+    limit: int = Query(50, ge=1),
+    before: Optional[str] = None,
+    include: Optional[str] = None,
+    format: str = "json"
+):
+    """Get recent payment transactions, paginated by (timestamp, id) cursor
     
-    conn.close()
-    return {"payments": payments}
+    Pages continue into older monthly partitions; include=archived also
+    reads the compressed archives of months past retention.
+    """
+    cursor = _decode_cursor(before) if before else None
+    with_metadata = "metadata" in (include or "").split(",")
+    with_archived = "archived" in (include or "").split(",")
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_payments_ndjson(cursor, with_metadata, with_archived),
+            media_type="application/x-ndjson"
+        )
+    
+    limit = min(limit, RECENT_PAGE_MAX)
+    payments = await asyncio.to_thread(_read_payment_page, cursor, limit, with_metadata, with_archived)
+    
+    next_cursor = None
+    if len(payments) == limit:
+        next_cursor = _encode_cursor(payments[-1]["timestamp"], payments[-1]["id"])
+    
+    return {"payments": payments, "next_cursor": next_cursor}
+
+@app.get("/api/v1/payments/partitions")
+async def get_payment_partitions():
+    """Get the live row count and every monthly partition and archive"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return partitions.partition_status(conn)
+    finally:
+        conn.close()
+
+@app.get("/api/v1/payments/timeseries")
+async def get_payment_timeseries(
+    gateway: str = None,
+    from_: str = Query(None, alias="from"),
+    to: str = None,
+    bucket: str = "hour",
+    max_points: int = Query(timeseries.DEFAULT_MAX_POINTS, ge=1, le=5000)
+):
+    """Get payment count and volume over time from the rollups"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return timeseries.query_timeseries(
+            conn,
+            gateway=gateway,
+            start=from_,
+            end=to,
+            bucket=bucket,
+            max_points=max_points
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+
+@app.get("/api/v1/healthcare/eligibility/{national_id}")
+async def get_nphies_eligibility(national_id: str):
+    """Check NPHIES patient eligibility (cached and batched upstream)"""
+    if app.state.eligibility is None:
+        raise HTTPException(status_code=503, detail="PayLinc integration is not configured")
+    try:
+        return await app.state.eligibility.check(national_id)
+    except EligibilityQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PayLincAPIError as e:
+        if e.status_code == 404:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        raise HTTPException(status_code=502, detail=f"PayLinc returned {e.status_code}")
+    except httpx.TransportError:
+        raise HTTPException(status_code=502, detail="PayLinc is unreachable")
 
 # ============================================================================
 # AGENT ENDPOINTS
 # ============================================================================
 
+def _categorize_new_agents(conn):
+    """Store the category of agents written without one ('' if none applies)"""
+    c = conn.cursor()
+    c.execute('SELECT agent_id, name FROM agent_status WHERE category IS NULL')
+    updates = [
+        (categorize(agent_id, name) or "", agent_id)
+        for agent_id, name in c.fetchall()
+    ]
+    if updates:
+        c.executemany('UPDATE agent_status SET category = ? WHERE agent_id = ?', updates)
+        conn.commit()
+
 @app.get("/api/v1/agents/status")
 async def get_agents_status():
     """Get status of all LINC agents"""
-    conn = sqlite3.connect('dashboard.db')
+    conn = sqlite3.connect(DB_PATH)
+    _categorize_new_agents(conn)
     c = conn.cursor()
     
-    c.execute('SELECT * FROM agent_status')
+    c.execute('''SELECT agent_id, name, status, health, last_heartbeat, metrics, category
+                 FROM agent_status
+                 WHERE category IN ({})
+                 ORDER BY category'''.format(", ".join("?" * len(CATEGORIES))), CATEGORIES)
     
-    agents = {
-        "healthcare": [],
-        "business": [],
-        "automation": [],
-        "content": [],
-        "security": []
-    }
+    agents = {category: [] for category in CATEGORIES}
     
     for row in c.fetchall():
-        agent = {
+        agents[row[6]].append({
             "agent_id": row[0],
             "name": row[1],
             "status": row[2],
             "health": row[3],
             "last_heartbeat": row[4],
             "metrics": json.loads(row[5]) if row[5] else {}
-        }
-        
-        # Categorize agents
-        if "LINC" in row[1]:
-            if any(x in row[1] for x in ["Doctor", "Nurse", "Patient", "CareTeam"]):
-                agents["healthcare"].append(agent)
-            elif any(x in row[1] for x in ["Biz", "Pay", "Insight"]):
-                agents["business"].append(agent)
-            elif any(x in row[1] for x in ["Dev", "Auto", "Code"]):
-                agents["automation"].append(agent)
-            elif any(x in row[1] for x in ["Media", "Edu", "Chat"]):
-                agents["content"].append(agent)
-            elif any(x in row[1] for x in ["Master", "Auth", "OID"]):
-                agents["security"].append(agent)
+        })
     
     conn.close()
     return agents
@@ -223,10 +451,11 @@ async def get_agents_status():
 @app.get("/api/v1/agents/{agent_id}")
 async def get_agent_details(agent_id: str):
     """Get detailed information about specific agent"""
-    conn = sqlite3.connect('dashboard.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
-    c.execute('SELECT * FROM agent_status WHERE agent_id = ?', (agent_id,))
+    c.execute('''SELECT agent_id, name, status, health, last_heartbeat, metrics, category
+                 FROM agent_status WHERE agent_id = ?''', (agent_id,))
     row = c.fetchone()
     
     if not row:
@@ -239,6 +468,7 @@ async def get_agent_details(agent_id: str):
         "health": row[3],
         "last_heartbeat": row[4],
         "metrics": json.loads(row[5]) if row[5] else {},
+        "category": row[6] or categorize(row[0], row[1]),
         "recent_tasks": []
     }
     
@@ -267,7 +497,7 @@ async def get_agent_details(agent_id: str):
 @app.get("/api/v1/workflows/active")
 async def get_active_workflows():
     """Get currently active workflows"""
-    conn = sqlite3.connect('dashboard.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
     c.execute('''SELECT * FROM workflows
@@ -289,6 +519,50 @@ async def get_active_workflows():
     conn.close()
     return {"workflows": workflows}
 
+class WorkflowRequest(BaseModel):
+    name: str
+    agent_id: str
+    data: Dict[str, Any] = {}
+
+@app.post("/api/v1/workflows", status_code=201)
+async def submit_workflow(request: WorkflowRequest):
+    """Queue a workflow for execution on a LINC agent"""
+    if request.agent_id not in AGENT_REGISTRY:
+        raise HTTPException(status_code=400, detail=f"Unknown agent: {request.agent_id}")
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        workflow_id = workflow_engine.enqueue_workflow(conn, request.name, request.agent_id, request.data)
+        conn.commit()
+    finally:
+        conn.close()
+    return {"id": workflow_id, "status": "pending"}
+
+@app.get("/api/v1/workflows/{workflow_id}")
+async def get_workflow(workflow_id: str):
+    """Get a workflow with its execution state"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''SELECT id, name, status, agent_id, created_at, updated_at, data,
+                        attempts, result, error
+                 FROM workflows WHERE id = ?''', (workflow_id,))
+    row = c.fetchone()
+    conn.close()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return {
+        "id": row[0],
+        "name": row[1],
+        "status": row[2],
+        "agent_id": row[3],
+        "created_at": row[4],
+        "updated_at": row[5],
+        "data": json.loads(row[6]) if row[6] else {},
+        "attempts": row[7],
+        "result": json.loads(row[8]) if row[8] else None,
+        "error": row[9]
+    }
+
 # ============================================================================
 # WEBSOCKET ENDPOINT FOR REAL-TIME UPDATES
 # ============================================================================
@@ -329,6 +603,61 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    """Operational metrics: reconciliation state and PayLinc client health"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        metrics = {
+            "timestamp": datetime.now().isoformat(),
+            "reconciliation": reconciliation.reconciliation_metrics(conn)
+        }
+    finally:
+        conn.close()
+    
+    if app.state.workflow_engine:
+        metrics["workflows"] = app.state.workflow_engine.status()
+    if app.state.paylinc:
+        metrics["paylinc_client"] = app.state.paylinc.get_client_metrics()
+        metrics["eligibility_cache"] = app.state.eligibility.cache_info()
+    return metrics
+
+# ============================================================================
+# RECONCILIATION
+# ============================================================================
+
+@app.get("/api/v1/reconciliation/discrepancies")
+async def get_discrepancies(
+    include_resolved: bool = False,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """List payments on which PayLinc and the local table disagree"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return {
+            "discrepancies": reconciliation.list_discrepancies(conn, include_resolved, limit)
+        }
+    finally:
+        conn.close()
+
+@app.post("/api/v1/reconciliation/run")
+async def run_reconciliation(from_: str = Query(..., alias="from"), to: str = Query(...)):
+    """Reconcile an explicit time range now"""
+    if app.state.paylinc is None:
+        raise HTTPException(status_code=503, detail="PayLinc integration is not configured")
+    try:
+        start, end = datetime.fromisoformat(from_), datetime.fromisoformat(to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from and to must be ISO-8601 timestamps")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="to must be after from")
+    
+    reconciler = reconciliation.PaymentReconciler(DB_PATH, app.state.paylinc)
+    try:
+        return await reconciler.reconcile(start, end)
+    except (PayLincAPIError, httpx.TransportError) as e:
+        raise HTTPException(status_code=502, detail=f"Reconciliation aborted: {e}")
+
 # ============================================================================
 # SERVER-SENT EVENTS FOR LIVE UPDATES
 # ============================================================================
@@ -354,6 +683,185 @@ async def stream_dashboard():
         media_type="text/event-stream"
     )
 
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+async def rollup_compactor():
+    """Periodically fold new payments into the time-series rollups"""
+    while True:
+        try:
+            await asyncio.to_thread(timeseries.compact, DB_PATH)
+        except Exception as e:
+            print(f"❌ Rollup compaction failed: {e}")
+        await asyncio.sleep(ROLLUP_COMPACT_INTERVAL)
+
+async def partition_maintainer():
+    """Periodically rotate old months out of payments and archive expired ones"""
+    while True:
+        try:
+            result = await asyncio.to_thread(partitions.maintain, DB_PATH, ARCHIVE_DIR)
+            if result["rotated"] or result["archived"]:
+                print(f"📦 Payment partitions: rotated {result['rotated']}, archived {result['archived']}")
+        except Exception as e:
+            print(f"❌ Payment partition maintenance failed: {e}")
+        await asyncio.sleep(PARTITION_INTERVAL)
+
+async def reconciliation_job():
+    """Periodically reconcile the trailing day of payments with PayLinc"""
+    reconciler = reconciliation.PaymentReconciler(DB_PATH, app.state.paylinc)
+    while True:
+        # Leaves are whole minutes, so keep the range minute-aligned
+        end = datetime.now().replace(second=0, microsecond=0) - RECONCILE_SETTLE_DELAY
+        try:
+            summary = await reconciler.reconcile(end - RECONCILE_LOOKBACK, end)
+            if summary["discrepancies"]:
+                print(f"⚠️ Reconciliation run {summary['run_id']} found {summary['discrepancies']} discrepancies")
+        except Exception as e:
+            print(f"❌ Reconciliation failed: {e!r}")
+        await asyncio.sleep(RECONCILE_INTERVAL)
+
+def _store_agent_statuses(statuses: List[AgentStatus]):
+    """Write one batch of probe results into agent_status"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany('''INSERT INTO agent_status
+                        (agent_id, name, status, health, last_heartbeat, metrics, category)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (agent_id) DO UPDATE SET
+                            name = excluded.name,
+                            status = excluded.status,
+                            health = excluded.health,
+                            last_heartbeat = COALESCE(excluded.last_heartbeat, last_heartbeat),
+                            metrics = excluded.metrics,
+                            category = excluded.category''', [
+        (
+            status.agent_id,
+            status.name,
+            status.status,
+            status.health,
+            status.checked_at.isoformat() if status.status != "inactive" else None,
+            json.dumps({**status.metrics, "latency_ms": status.latency_ms}),
+            status.category
+        )
+        for status in statuses
+    ])
+    conn.commit()
+    conn.close()
+
+async def persist_agent_statuses(statuses: List[AgentStatus]):
+    """Agent monitor sink: persist probe results off the event loop"""
+    await asyncio.to_thread(_store_agent_statuses, statuses)
+
+def _load_resume_token(name: str) -> Optional[str]:
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute('SELECT resume_token FROM stream_state WHERE name = ?', (name,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def _store_payment_batch(transactions: List[PaymentTransaction], resume_token: Optional[str]):
+    """Upsert one batch of streamed payments and its resume token atomically"""
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.executemany('''INSERT INTO payments
+                            (id, gateway, amount, currency, status, timestamp, metadata)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (id) DO UPDATE SET
+                                gateway = excluded.gateway,
+                                amount = excluded.amount,
+                                currency = excluded.currency,
+                                status = excluded.status,
+                                timestamp = excluded.timestamp,
+                                metadata = excluded.metadata''', [
+            (
+                txn.id,
+                txn.gateway,
+                txn.amount,
+                txn.currency,
+                txn.status,
+                txn.timestamp_iso,
+                json.dumps(txn.metadata) if txn.metadata else None
+            )
+            for txn in transactions
+        ])
+        if resume_token is not None:
+            conn.execute('''INSERT OR REPLACE INTO stream_state (name, resume_token, updated_at)
+                            VALUES ('paylinc', ?, ?)''', (resume_token, datetime.now().isoformat()))
+    conn.close()
+
+async def ingest_payment_batch(transactions: List[PaymentTransaction], resume_token: Optional[str]):
+    """PayLinc stream sink: persist the batch, then push it to live dashboards"""
+    await asyncio.to_thread(_store_payment_batch, transactions, resume_token)
+    await manager.broadcast({
+        "type": "payments",
+        "timestamp": datetime.now().isoformat(),
+        "payments": [
+            {
+                "id": txn.id,
+                "gateway": txn.gateway,
+                "amount": txn.amount,
+                "currency": txn.currency,
+                "status": txn.status,
+                "timestamp": txn.timestamp_iso
+            }
+            for txn in transactions
+        ]
+    })
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """Start background maintenance tasks"""
+    app.state.rollup_task = asyncio.create_task(rollup_compactor())
+    
+    app.state.partition_task = None
+    if ENABLE_PARTITIONING:
+        app.state.partition_task = asyncio.create_task(partition_maintainer())
+    
+    app.state.agent_monitor = None
+    if ENABLE_AGENTS_MONITORING:
+        app.state.agent_monitor = LINCAgentMonitor(host=AGENTS_HOST, sink=persist_agent_statuses)
+        app.state.agent_monitor.start()
+    
+    app.state.workflow_engine = None
+    if ENABLE_WORKFLOW_ENGINE:
+        app.state.workflow_engine = workflow_engine.WorkflowEngine(DB_PATH, host=AGENTS_HOST)
+        app.state.workflow_engine.start()
+    
+    app.state.paylinc = app.state.eligibility = app.state.paylinc_stream = None
+    if ENABLE_PAYLINC and PAYLINC_API_KEY:
+        app.state.paylinc = PayLincIntegration(PAYLINC_API_KEY, base_url=PAYLINC_API_URL)
+        app.state.eligibility = EligibilityService(app.state.paylinc)
+        
+        from paylinc_stream import PayLincStreamConsumer
+        app.state.paylinc_stream = PayLincStreamConsumer(
+            PAYLINC_API_KEY,
+            sink=ingest_payment_batch,
+            url=PAYLINC_STREAM_URL,
+            resume_token=_load_resume_token("paylinc")
+        )
+        app.state.paylinc_stream.start()
+    
+    app.state.reconciliation_task = None
+    if ENABLE_RECONCILIATION and app.state.paylinc:
+        app.state.reconciliation_task = asyncio.create_task(reconciliation_job())
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """Stop background tasks and close their clients"""
+    app.state.rollup_task.cancel()
+    if app.state.partition_task:
+        app.state.partition_task.cancel()
+    if app.state.reconciliation_task:
+        app.state.reconciliation_task.cancel()
+    if app.state.agent_monitor:
+        await app.state.agent_monitor.stop()
+    if app.state.workflow_engine:
+        await app.state.workflow_engine.stop()
+    if app.state.paylinc_stream:
+        await app.state.paylinc_stream.stop()
+    if app.state.eligibility:
+        await app.state.eligibility.close()
+        await app.state.paylinc.close()
+
 # ============================================================================
 # RUN SERVER
 # ============================================================================
@@ -0,0 +1,355 @@
+"""
+BrainSAIT Unified Dashboard - Payment Partitions
+Monthly partitions of the payments table and compressed archives of old months
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import lzma
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+# The payments table itself keeps the current and previous month. Every
+# writer keeps upserting into it and the rollup triggers stay attached to
+# it; older months are moved out into one table per month.
+HOT_MONTHS = 2
+
+# Monthly tables older than this many months are compacted into archives
+ARCHIVE_AFTER_MONTHS = 12
+
+# Decompressed archives kept on disk for on-demand queries
+ARCHIVE_CACHE_FILES = 4
+
+PAYMENT_COLUMNS = ["id", "gateway", "amount", "currency", "status", "timestamp", "metadata"]
+
+PAYMENTS_SCHEMA = '''(id TEXT PRIMARY KEY,
+                      gateway TEXT,
+                      amount REAL,
+                      currency TEXT,
+                      status TEXT,
+                      timestamp DATETIME,
+                      metadata TEXT)'''
+
+def init_partitions(conn: sqlite3.Connection):
+    """Create the partition catalog"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS payment_partitions
+                    (month TEXT PRIMARY KEY,
+                     table_name TEXT,
+                     rows INTEGER DEFAULT 0,
+                     archive_path TEXT,
+                     archive_rows INTEGER DEFAULT 0,
+                     updated_at DATETIME)''')
+
+def _shift_month(month: str, months: int) -> str:
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def _month_bounds(month: str) -> Tuple[str, str]:
+    """[start, end) of a 'YYYY-MM' month as timestamp prefixes"""
+    return f"{month}-01", f"{_shift_month(month, 1)}-01"
+
+def _table_name(month: str) -> str:
+    return f"payments_{month[:4]}_{month[5:7]}"
+
+def _current_month(now: Optional[datetime] = None) -> str:
+    return (now or datetime.utcnow()).strftime("%Y-%m")
+
+def _create_partition(conn: sqlite3.Connection, month: str) -> str:
+    table = _table_name(month)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} {PAYMENTS_SCHEMA}")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp_id ON {table} (timestamp DESC, id DESC)")
+    conn.execute('''INSERT INTO payment_partitions (month, table_name, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT (month) DO UPDATE SET table_name = excluded.table_name''',
+                 (month, table, datetime.now().isoformat()))
+    return table
+
+# ----------------------------------------------------------------------
+# Routing
+# ----------------------------------------------------------------------
+
+def _catalog(conn: sqlite3.Connection, start: Optional[str], end: Optional[str]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """(month, table, archive) of cataloged months overlapping [start, end), newest first"""
+    sql = "SELECT month, table_name, archive_path FROM payment_partitions WHERE 1 = 1"
+    params: List[Any] = []
+    if start:
+        sql += " AND month >= ?"
+        params.append(start[:7])
+    if end:
+        sql += " AND month <= ?"
+        params.append(end[:7])
+    return conn.execute(sql + " ORDER BY month DESC", params).fetchall()
+
+def payment_tables(conn: sqlite3.Connection, start: Optional[str] = None,
+                   end: Optional[str] = None) -> List[str]:
+    """Tables that can hold payments with timestamps in [start, end)
+
+    The live payments table always qualifies: late writes for old months
+    sit there until the next rotation.
+    """
+    return ["payments"] + [table for _, table, _ in _catalog(conn, start, end) if table]
+
+def select_range(conn: sqlite3.Connection, columns: Sequence[str], start: str, end: str,
+                 where: str = "", params: Sequence[Any] = ()) -> Iterator[tuple]:
+    """Rows with timestamp in [start, end) from every table that may hold them
+
+    A payment rewritten after its month was rotated is in both the live
+    table and the month's table until the next rotation. When columns
+    include id, only the live (newest) copy is returned.
+    """
+    key = list(columns).index("id") if "id" in columns else None
+    live = set()
+    for table in payment_tables(conn, start, end):
+        rows = conn.execute(f'''SELECT {", ".join(columns)} FROM {table}
+                                WHERE timestamp >= ? AND timestamp < ? {where}''',
+                            (start, end, *params))
+        if key is None:
+            yield from rows
+        elif table == "payments":
+            for row in rows:
+                live.add(row[key])
+                yield row
+        else:
+            yield from (row for row in rows if row[key] not in live)
+
+def fetch_page(conn: sqlite3.Connection, before: Optional[Tuple[str, str]], limit: int,
+               columns: Sequence[str], archives: Optional["ArchiveReader"] = None) -> List[tuple]:
+    """Newest-first keyset page across the live table, monthly tables and, optionally, archives
+
+    columns must start with id and timestamp. The live table is always read;
+    older months are visited newest first and only while they can still
+    contribute rows newer than the page's current last row.
+
+    A payment can be in more than one source: late writes to a rotated
+    month go to the live table, and late writes to an archived month go to
+    a new monthly table. The copy from the source read first (the live
+    table, then the monthly table, then the archive) is the newest and is
+    the one kept.
+    """
+    select = ", ".join(columns)
+    where, params = "", []
+    if before:
+        where, params = "WHERE (timestamp, id) < (?, ?)", list(before)
+
+    def query(target: sqlite3.Connection, table: str) -> List[tuple]:
+        return target.execute(f'''SELECT {select} FROM {table} {where}
+                                  ORDER BY timestamp DESC, id DESC LIMIT ?''',
+                              (*params, limit)).fetchall()
+
+    def merge(rows: List[tuple], more: List[tuple]) -> List[tuple]:
+        seen = {r[0] for r in rows}
+        more = [r for r in more if r[0] not in seen]
+        return sorted(rows + more, key=lambda r: (r[1] or "", r[0]), reverse=True)[:limit]
+
+    rows = query(conn, "payments")
+    for month, table, archive in _catalog(conn, None, before[0] if before else None):
+        month_start, month_end = _month_bounds(month)
+        if len(rows) >= limit and month_end <= (rows[-1][1] or ""):
+            break
+        if table:
+            rows = merge(rows, query(conn, table))
+        if archive and archives is not None:
+            with archives.open(archive) as archived:
+                rows = merge(rows, query(archived, "payments"))
+    return rows
+
+# ----------------------------------------------------------------------
+# Rotation: live table -> monthly tables
+# ----------------------------------------------------------------------
+
+def _log_rollup(conn: sqlite3.Connection, source: str, sign: int, where: str, params: Sequence[Any]):
+    conn.execute(f'''INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                     SELECT timestamp, gateway, currency, ?, amount FROM {source} WHERE {where}''',
+                 (sign, *params))
+
+def rotate(db_path: str, hot_months: int = HOT_MONTHS, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Move payments older than the hot window out of the live table, by month
+
+    Moving rows must not change the rollups: the delete trigger on payments
+    is offset by re-logging the moved rows, and rows they replace in the
+    month's table (late updates of old payments) are logged out.
+    """
+    cutoff = _month_bounds(_shift_month(_current_month(now), 1 - hot_months))[0]
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    moved: Dict[str, int] = {}
+    try:
+        months = [row[0] for row in conn.execute(
+            '''SELECT DISTINCT substr(timestamp, 1, 7) FROM payments
+               WHERE timestamp < ? AND timestamp IS NOT NULL''', (cutoff,)
+        )]
+        for month in months:
+            start, end = _month_bounds(month)
+            in_month = "timestamp >= ? AND timestamp < ?"
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                table = _create_partition(conn, month)
+                _log_rollup(conn, table, -1,
+                            f"id IN (SELECT id FROM payments WHERE {in_month})", (start, end))
+                conn.execute(f'''INSERT INTO {table} ({", ".join(PAYMENT_COLUMNS)})
+                                 SELECT {", ".join(PAYMENT_COLUMNS)} FROM payments WHERE {in_month}
+                                 ON CONFLICT (id) DO UPDATE SET
+                                     gateway = excluded.gateway,
+                                     amount = excluded.amount,
+                                     currency = excluded.currency,
+                                     status = excluded.status,
+                                     timestamp = excluded.timestamp,
+                                     metadata = excluded.metadata''', (start, end))
+                _log_rollup(conn, "payments", 1, in_month, (start, end))
+                moved[month] = conn.execute(f"DELETE FROM payments WHERE {in_month}", (start, end)).rowcount
+                conn.execute(f'''UPDATE payment_partitions SET rows = (SELECT COUNT(*) FROM {table}),
+                                     updated_at = ? WHERE month = ?''', (datetime.now().isoformat(), month))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    finally:
+        conn.close()
+    return moved
+
+# ----------------------------------------------------------------------
+# Retention: monthly tables -> compressed archives
+# ----------------------------------------------------------------------
+
+def _compress(source: Path, target: Path):
+    partial = target.with_name(target.name + ".partial")
+    with open(source, "rb") as raw, lzma.open(partial, "wb", preset=6) as packed:
+        shutil.copyfileobj(raw, packed, 1 << 20)
+    os.replace(partial, target)
+
+def _decompress(source: Path, target: Path):
+    partial = target.with_name(target.name + ".partial")
+    with lzma.open(source, "rb") as packed, open(partial, "wb") as raw:
+        shutil.copyfileobj(packed, raw, 1 << 20)
+    os.replace(partial, target)
+
+def archive(db_path: str, archive_dir: str, archive_after: int = ARCHIVE_AFTER_MONTHS,
+            now: Optional[datetime] = None) -> Dict[str, int]:
+    """Compact monthly tables older than the retention window into .db.xz archives
+
+    Each archive is a standalone SQLite file with one payments table. A
+    month that already has an archive (late writes were rotated into a new
+    table) gets a merged archive under a new name. The catalog switches to
+    it, and the table is dropped, in one transaction after the file is
+    complete, so an interrupted run simply starts over.
+    """
+    cutoff = _shift_month(_current_month(now), -archive_after)
+    directory = Path(archive_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    archived: Dict[str, int] = {}
+    try:
+        candidates = conn.execute('''SELECT month, table_name, archive_path FROM payment_partitions
+                                     WHERE table_name IS NOT NULL AND month < ?''', (cutoff,)).fetchall()
+        for month, table, previous in candidates:
+            build = directory / f".payments_{month}.build.db"
+            build.unlink(missing_ok=True)
+            if previous:
+                _decompress(directory / previous, build)
+
+            conn.execute("ATTACH DATABASE ? AS archive", (str(build),))
+            try:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS archive.payments {PAYMENTS_SCHEMA}")
+                conn.execute('''CREATE INDEX IF NOT EXISTS archive.idx_payments_timestamp_id
+                                ON payments (timestamp DESC, id DESC)''')
+                # Archived rows replaced by late writes leave the rollups
+                replaced = conn.execute(f'''SELECT timestamp, gateway, currency, -1, amount
+                                            FROM archive.payments
+                                            WHERE id IN (SELECT id FROM main.{table})''').fetchall()
+                conn.execute("BEGIN")
+                conn.execute(f'''INSERT INTO archive.payments SELECT {", ".join(PAYMENT_COLUMNS)}
+                                 FROM main.{table} WHERE 1 = 1
+                                 ON CONFLICT (id) DO UPDATE SET
+                                     gateway = excluded.gateway,
+                                     amount = excluded.amount,
+                                     currency = excluded.currency,
+                                     status = excluded.status,
+                                     timestamp = excluded.timestamp,
+                                     metadata = excluded.metadata''')
+                conn.execute("COMMIT")
+                rows = conn.execute("SELECT COUNT(*) FROM archive.payments").fetchone()[0]
+            finally:
+                conn.execute("DETACH DATABASE archive")
+
+            name = f"payments_{month}_{int(time.time())}.db.xz"
+            _compress(build, directory / name)
+            build.unlink()
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany('''INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                                    VALUES (?, ?, ?, ?, ?)''', replaced)
+                conn.execute(f"DROP TABLE {table}")
+                conn.execute('''UPDATE payment_partitions
+                                SET table_name = NULL, rows = 0, archive_path = ?, archive_rows = ?, updated_at = ?
+                                WHERE month = ?''', (name, rows, datetime.now().isoformat(), month))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                (directory / name).unlink(missing_ok=True)
+                raise
+            if previous:
+                (directory / previous).unlink(missing_ok=True)
+            archived[month] = rows
+    finally:
+        conn.close()
+    return archived
+
+def maintain(db_path: str, archive_dir: str) -> Dict[str, Dict[str, int]]:
+    """Rotate old months out of the live table, then archive expired months"""
+    return {"rotated": rotate(db_path), "archived": archive(db_path, archive_dir)}
+
+def partition_status(conn: sqlite3.Connection) -> Dict[str, Any]:
+    return {
+        "live_rows": conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0],
+        "months": [
+            {"month": month, "table": table, "rows": rows,
+             "archive": archive_path, "archive_rows": archive_rows}
+            for month, table, rows, archive_path, archive_rows in conn.execute(
+                '''SELECT month, table_name, rows, archive_path, archive_rows
+                   FROM payment_partitions ORDER BY month DESC''')
+        ]
+    }
+
+class ArchiveReader:
+    """Opens archives read-only, keeping the last few decompressed on disk"""
+
+    def __init__(self, archive_dir: str, cache_files: int = ARCHIVE_CACHE_FILES):
+        self.archive_dir = Path(archive_dir)
+        self.cache_dir = self.archive_dir / ".cache"
+        self.cache_files = cache_files
+        self._cached: "OrderedDict[str, Path]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        with self._lock:
+            path = self._cached.get(name)
+            if path is not None and path.exists():
+                self._cached.move_to_end(name)
+                return path
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / name[:-len(".xz")]
+            if not path.exists():
+                _decompress(self.archive_dir / name, path)
+            self._cached[name] = path
+            while len(self._cached) > self.cache_files:
+                _, evicted = self._cached.popitem(last=False)
+                evicted.unlink(missing_ok=True)
+            return path
+
+    def open(self, name: str) -> "_ReadOnly":
+        return _ReadOnly(self._path(name))
+
+class _ReadOnly:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
@@ -0,0 +1,296 @@
+"""
+BrainSAIT Unified Dashboard - Payment Reconciliation
+Compares what PayLinc reports with the local payments table, window by window
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+import asyncio
+import hashlib
+import json
+import sqlite3
+
+import partitions
+
+# Gateways PayLinc is the system of record for, and the listing serving each
+RECONCILED_GATEWAYS = {
+    "nphies": "iter_healthcare_payments",
+    "paylinc": "iter_cross_border_transactions",
+}
+
+# Windows are compared independently; inside a window every minute (leaf)
+# gets its own digest so a mismatch is narrowed down before any row diff
+WINDOW_SECONDS = 3600
+LEAF_SECONDS = 60
+
+DIGEST_MODULUS = 2 ** 64
+
+# (count, digest) per leaf, keyed by the leaf's minute 'YYYY-MM-DDTHH:MM'
+Summary = Dict[str, List[int]]
+RowKey = Tuple[str, str]
+
+def init_reconciliation(conn: sqlite3.Connection):
+    """Create the run log and discrepancy tables"""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS reconciliation_runs
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  started_at DATETIME,
+                  finished_at DATETIME,
+                  window_start TEXT,
+                  window_end TEXT,
+                  windows INTEGER DEFAULT 0,
+                  mismatched_windows INTEGER DEFAULT 0,
+                  leaves_diffed INTEGER DEFAULT 0,
+                  local_rows INTEGER DEFAULT 0,
+                  remote_rows INTEGER DEFAULT 0,
+                  discrepancies INTEGER DEFAULT 0,
+                  error TEXT)''')
+
+    # One row per (payment, kind); re-detection updates it, and it is marked
+    # resolved once a later run sees the payment's window agree
+    c.execute('''CREATE TABLE IF NOT EXISTS payment_discrepancies
+                 (gateway TEXT,
+                  payment_id TEXT,
+                  kind TEXT,
+                  payment_timestamp TEXT,
+                  details TEXT,
+                  first_seen_run INTEGER,
+                  last_seen_run INTEGER,
+                  detected_at DATETIME,
+                  resolved_at DATETIME,
+                  PRIMARY KEY (gateway, payment_id, kind))''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_payment_discrepancies_open
+                 ON payment_discrepancies(resolved_at, payment_timestamp)''')
+
+def row_digest(payment_id: str, gateway: str, amount: float, currency: str, status: str) -> int:
+    """64-bit hash of the reconciled fields of one payment"""
+    canonical = f"{gateway}|{payment_id}|{float(amount):.2f}|{currency}|{status}"
+    return int.from_bytes(hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest(), "big")
+
+def _leaf(timestamp: str) -> str:
+    # Tolerates both 'T' and ' ' separators
+    return f"{timestamp[:10]}T{timestamp[11:16]}"
+
+def _add(summary: Summary, timestamp: str, digest: int):
+    # Digests are summed, so the result does not depend on row order
+    leaf = summary.setdefault(_leaf(timestamp), [0, 0])
+    leaf[0] += 1
+    leaf[1] = (leaf[1] + digest) % DIGEST_MODULUS
+
+def _local_rows(conn: sqlite3.Connection, start: str, end: str) -> Iterable[tuple]:
+    placeholders = ",".join("?" * len(RECONCILED_GATEWAYS))
+    return partitions.select_range(conn, ["id", "gateway", "amount", "currency", "status", "timestamp"],
+                                   start, end, f"AND gateway IN ({placeholders})", list(RECONCILED_GATEWAYS))
+
+def local_summary(db_path: str, start: str, end: str) -> Tuple[Summary, int]:
+    """Per-leaf digests of local payments in [start, end), streamed from SQLite"""
+    summary: Summary = {}
+    rows = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        for payment_id, gateway, amount, currency, status, timestamp in _local_rows(conn, start, end):
+            _add(summary, timestamp, row_digest(payment_id, gateway, amount, currency, status))
+            rows += 1
+    finally:
+        conn.close()
+    return summary, rows
+
+def local_rows(db_path: str, start: str, end: str) -> Dict[RowKey, Tuple[Any, ...]]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            (gateway, payment_id): (amount, currency, status, timestamp)
+            for payment_id, gateway, amount, currency, status, timestamp in _local_rows(conn, start, end)
+        }
+    finally:
+        conn.close()
+
+class PaymentReconciler:
+    """Reconciles PayLinc against dashboard.db without loading either side whole
+
+    Each window is streamed once from both sides into per-minute digests
+    (count and a sum of row hashes). Only minutes whose digests differ are
+    fetched again and diffed row by row, so memory is bounded by a window's
+    leaf count plus the rows of the mismatched minutes.
+    """
+
+    def __init__(self, db_path: str, paylinc: Any,
+                 window_seconds: int = WINDOW_SECONDS, leaf_seconds: int = LEAF_SECONDS):
+        self.db_path = db_path
+        self.paylinc = paylinc
+        self.window = timedelta(seconds=window_seconds)
+        self.leaf = timedelta(seconds=leaf_seconds)
+
+    async def _remote_pages(self, start: str, end: str):
+        for gateway, listing in RECONCILED_GATEWAYS.items():
+            async for page in getattr(self.paylinc, listing)(start=start, end=end):
+                yield [t for t in page if t.gateway == gateway]
+
+    async def remote_summary(self, start: str, end: str) -> Tuple[Summary, int]:
+        summary: Summary = {}
+        rows = 0
+        async for page in self._remote_pages(start, end):
+            for t in page:
+                _add(summary, t.timestamp_iso, row_digest(t.id, t.gateway, t.amount, t.currency, t.status))
+            rows += len(page)
+        return summary, rows
+
+    async def remote_rows(self, start: str, end: str) -> Dict[RowKey, Tuple[Any, ...]]:
+        rows = {}
+        async for page in self._remote_pages(start, end):
+            for t in page:
+                rows[(t.gateway, t.id)] = (t.amount, t.currency, t.status, t.timestamp_iso)
+        return rows
+
+    def _mismatched_ranges(self, local: Summary, remote: Summary) -> List[Tuple[str, str]]:
+        """Leaves whose digests differ, merged into contiguous [start, end) ranges"""
+        leaves = sorted(leaf for leaf in local.keys() | remote.keys() if local.get(leaf) != remote.get(leaf))
+        ranges: List[List[datetime]] = []
+        for leaf in leaves:
+            start = datetime.fromisoformat(leaf)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = start + self.leaf
+            else:
+                ranges.append([start, start + self.leaf])
+        return [(a.isoformat(), b.isoformat()) for a, b in ranges]
+
+    async def _diff(self, start: str, end: str) -> List[Dict[str, Any]]:
+        local, remote = await asyncio.gather(
+            asyncio.to_thread(local_rows, self.db_path, start, end),
+            self.remote_rows(start, end)
+        )
+        found = []
+        for key in local.keys() | remote.keys():
+            gateway, payment_id = key
+            mine, theirs = local.get(key), remote.get(key)
+            if mine is None:
+                kind, details, timestamp = "missing_local", {"remote": theirs[:3]}, theirs[3]
+            elif theirs is None:
+                kind, details, timestamp = "missing_remote", {"local": mine[:3]}, mine[3]
+            else:
+                fields = {
+                    name: {"local": a, "remote": b}
+                    for name, a, b in zip(("amount", "currency", "status"), mine, theirs)
+                    if (round(float(a), 2) != round(float(b), 2) if name == "amount" else a != b)
+                }
+                if not fields:
+                    continue
+                kind, details, timestamp = "mismatch", fields, mine[3]
+            found.append({"gateway": gateway, "payment_id": payment_id, "kind": kind,
+                          "payment_timestamp": timestamp, "details": details})
+        return found
+
+    def _record(self, run_id: int, window_start: str, window_end: str, found: List[Dict[str, Any]]):
+        """Upsert this window's discrepancies and resolve the ones no longer seen"""
+        now = datetime.now().isoformat()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany('''INSERT INTO payment_discrepancies
+                                    (gateway, payment_id, kind, payment_timestamp, details,
+                                     first_seen_run, last_seen_run, detected_at, resolved_at)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)
+                                    ON CONFLICT(gateway, payment_id, kind) DO UPDATE SET
+                                        payment_timestamp = excluded.payment_timestamp,
+                                        details = excluded.details,
+                                        last_seen_run = excluded.last_seen_run,
+                                        resolved_at = NULL''',
+                                 [(d["gateway"], d["payment_id"], d["kind"], d["payment_timestamp"],
+                                   json.dumps(d["details"], default=str), run_id, run_id, now)
+                                  for d in found])
+                conn.execute('''UPDATE payment_discrepancies SET resolved_at = ?
+                                WHERE resolved_at IS NULL
+                                  AND payment_timestamp >= ? AND payment_timestamp < ?
+                                  AND last_seen_run != ?''',
+                             (now, window_start, window_end, run_id))
+        finally:
+            conn.close()
+
+    def _update_run(self, run_id: int, **fields):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                assignments = ", ".join(f"{name} = ?" for name in fields)
+                conn.execute(f"UPDATE reconciliation_runs SET {assignments} WHERE id = ?",
+                             (*fields.values(), run_id))
+        finally:
+            conn.close()
+
+    def _start_run(self, start: datetime, end: datetime) -> int:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                return conn.execute('''INSERT INTO reconciliation_runs (started_at, window_start, window_end)
+                                       VALUES (?, ?, ?) RETURNING id''',
+                                    (datetime.now().isoformat(), start.isoformat(), end.isoformat())).fetchone()[0]
+        finally:
+            conn.close()
+
+    async def reconcile(self, start: datetime, end: datetime) -> Dict[str, Any]:
+        """Reconcile [start, end) window by window and return the run summary"""
+        run_id = self._start_run(start, end)
+        totals = {"windows": 0, "mismatched_windows": 0, "leaves_diffed": 0,
+                  "local_rows": 0, "remote_rows": 0, "discrepancies": 0}
+        try:
+            window_start = start
+            while window_start < end:
+                window_end = min(window_start + self.window, end)
+                ws, we = window_start.isoformat(), window_end.isoformat()
+
+                (local, local_count), (remote, remote_count) = await asyncio.gather(
+                    asyncio.to_thread(local_summary, self.db_path, ws, we),
+                    self.remote_summary(ws, we)
+                )
+                totals["windows"] += 1
+                totals["local_rows"] += local_count
+                totals["remote_rows"] += remote_count
+
+                found = []
+                if local != remote:
+                    totals["mismatched_windows"] += 1
+                    for leaf_start, leaf_end in self._mismatched_ranges(local, remote):
+                        totals["leaves_diffed"] += round(
+                            (datetime.fromisoformat(leaf_end) - datetime.fromisoformat(leaf_start)) / self.leaf
+                        )
+                        found.extend(await self._diff(max(leaf_start, ws), min(leaf_end, we)))
+                totals["discrepancies"] += len(found)
+                await asyncio.to_thread(self._record, run_id, ws, we, found)
+                window_start = window_end
+        except Exception as e:
+            self._update_run(run_id, finished_at=datetime.now().isoformat(), error=repr(e), **totals)
+            raise
+        self._update_run(run_id, finished_at=datetime.now().isoformat(), **totals)
+        return {"run_id": run_id, "window_start": start.isoformat(), "window_end": end.isoformat(), **totals}
+
+def reconciliation_metrics(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Open discrepancy counts and the latest run, for the metrics endpoint"""
+    c = conn.cursor()
+    open_by_kind = dict(c.execute('''SELECT kind, COUNT(*) FROM payment_discrepancies
+                                     WHERE resolved_at IS NULL GROUP BY kind''').fetchall())
+    open_by_gateway = dict(c.execute('''SELECT gateway, COUNT(*) FROM payment_discrepancies
+                                        WHERE resolved_at IS NULL GROUP BY gateway''').fetchall())
+    c.execute('''SELECT id, started_at, finished_at, window_start, window_end, windows,
+                        mismatched_windows, leaves_diffed, local_rows, remote_rows,
+                        discrepancies, error
+                 FROM reconciliation_runs ORDER BY id DESC LIMIT 1''')
+    row = c.fetchone()
+    last_run = dict(zip([d[0] for d in c.description], row)) if row else None
+    return {
+        "open_discrepancies": sum(open_by_kind.values()),
+        "open_by_kind": open_by_kind,
+        "open_by_gateway": open_by_gateway,
+        "last_run": last_run
+    }
+
+def list_discrepancies(conn: sqlite3.Connection, include_resolved: bool = False,
+                       limit: int = 100) -> List[Dict[str, Any]]:
+    where = "" if include_resolved else "WHERE resolved_at IS NULL"
+    c = conn.execute(f'''SELECT gateway, payment_id, kind, payment_timestamp, details,
+                                first_seen_run, last_seen_run, detected_at, resolved_at
+                         FROM payment_discrepancies {where}
+                         ORDER BY payment_timestamp DESC LIMIT ?''', (limit,))
+    columns = [d[0] for d in c.description]
+    return [
+        {**dict(zip(columns, row)), "details": json.loads(row[4])}
+        for row in c.fetchall()
+    ]
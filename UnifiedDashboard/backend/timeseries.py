@@ -0,0 +1,222 @@
+"""
+BrainSAIT Unified Dashboard - Payment Time-Series Rollups
+Multi-resolution (minute -> hour -> day) aggregates over the payments table
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import math
+import sqlite3
+
+# Rollup resolutions, finest first. Each level keeps its own retention so a
+# year-long query reads a few hundred day buckets instead of raw payments.
+RESOLUTIONS = {
+    "minute": {"format": "%Y-%m-%dT%H:%M:00", "seconds": 60, "retention": timedelta(days=7)},
+    "hour": {"format": "%Y-%m-%dT%H:00:00", "seconds": 3600, "retention": timedelta(days=180)},
+    "day": {"format": "%Y-%m-%dT00:00:00", "seconds": 86400, "retention": None},
+}
+
+# Buckets accepted by the API and the rollup each one is served from
+BUCKETS = {
+    "minute": "minute",
+    "hour": "hour",
+    "day": "day",
+    "month": "day",
+}
+
+DEFAULT_MAX_POINTS = 500
+COMPACT_BATCH_SIZE = 50000
+
+
+def init_rollups(conn: sqlite3.Connection):
+    """Create rollup tables and the change-capture triggers on payments"""
+    c = conn.cursor()
+
+    for resolution in RESOLUTIONS:
+        c.execute(f'''CREATE TABLE IF NOT EXISTS payment_rollups_{resolution}
+                     (bucket TEXT,
+                      gateway TEXT,
+                      currency TEXT,
+                      count INTEGER,
+                      volume REAL,
+                      PRIMARY KEY (bucket, gateway, currency)) WITHOUT ROWID''')
+
+    # Pending deltas captured by triggers, drained by compact()
+    c.execute('''CREATE TABLE IF NOT EXISTS payment_rollup_log
+                 (seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                  timestamp DATETIME,
+                  gateway TEXT,
+                  currency TEXT,
+                  sign INTEGER,
+                  amount REAL)''')
+
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name = 'payments_rollup_insert'")
+    if c.fetchone():
+        return
+
+    # Triggers see every writer (setup scripts, consumers, manual SQL), so the
+    # rollups stay correct for inserts, updates and deletes alike. Writers
+    # should upsert rather than INSERT OR REPLACE, which skips delete triggers.
+    c.execute('''CREATE TRIGGER payments_rollup_insert AFTER INSERT ON payments
+                 BEGIN
+                     INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                     VALUES (NEW.timestamp, NEW.gateway, NEW.currency, 1, NEW.amount);
+                 END''')
+    c.execute('''CREATE TRIGGER payments_rollup_delete AFTER DELETE ON payments
+                 BEGIN
+                     INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                     VALUES (OLD.timestamp, OLD.gateway, OLD.currency, -1, OLD.amount);
+                 END''')
+    c.execute('''CREATE TRIGGER payments_rollup_update
+                 AFTER UPDATE OF timestamp, gateway, currency, amount ON payments
+                 BEGIN
+                     INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                     VALUES (OLD.timestamp, OLD.gateway, OLD.currency, -1, OLD.amount);
+                     INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                     VALUES (NEW.timestamp, NEW.gateway, NEW.currency, 1, NEW.amount);
+                 END''')
+
+    # Backfill rows written before the triggers existed
+    c.execute('''INSERT INTO payment_rollup_log (timestamp, gateway, currency, sign, amount)
+                 SELECT timestamp, gateway, currency, 1, amount FROM payments''')
+
+
+def compact(db_path: str, batch_size: int = COMPACT_BATCH_SIZE) -> int:
+    """Drain pending payment deltas into every rollup level and apply retention"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    drained = 0
+
+    try:
+        while True:
+            c.execute('SELECT seq FROM payment_rollup_log ORDER BY seq LIMIT 1 OFFSET ?',
+                      (batch_size - 1,))
+            row = c.fetchone()
+            if row is None:
+                c.execute('SELECT MAX(seq) FROM payment_rollup_log')
+                row = c.fetchone()
+            high = row[0] if row else None
+            if high is None:
+                break
+
+            for resolution, config in RESOLUTIONS.items():
+                c.execute(f'''INSERT INTO payment_rollups_{resolution} (bucket, gateway, currency, count, volume)
+                             SELECT strftime(?, timestamp), gateway, currency, SUM(sign), SUM(sign * amount)
+                             FROM payment_rollup_log
+                             WHERE seq <= ? AND timestamp IS NOT NULL
+                             GROUP BY 1, 2, 3
+                             ON CONFLICT (bucket, gateway, currency) DO UPDATE SET
+                                 count = count + excluded.count,
+                                 volume = volume + excluded.volume''',
+                          (config["format"], high))
+                c.execute(f'''DELETE FROM payment_rollups_{resolution}
+                             WHERE count <= 0 AND bucket IN
+                                 (SELECT strftime(?, timestamp) FROM payment_rollup_log WHERE seq <= ?)''',
+                          (config["format"], high))
+
+            c.execute('DELETE FROM payment_rollup_log WHERE seq <= ?', (high,))
+            drained += c.rowcount
+            conn.commit()
+
+            if c.rowcount < batch_size:
+                break
+
+        now = datetime.utcnow()
+        for resolution, config in RESOLUTIONS.items():
+            if config["retention"] is None:
+                continue
+            cutoff = (now - config["retention"]).strftime(config["format"])
+            c.execute(f'DELETE FROM payment_rollups_{resolution} WHERE bucket < ?', (cutoff,))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return drained
+
+
+def _parse_time(value: Optional[str], default: datetime) -> datetime:
+    """Parse an ISO-8601 query bound into a naive UTC datetime"""
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _bucket_index(bucket: str, value: str) -> int:
+    """Ordinal position of a bucket timestamp, used for downsampling"""
+    t = datetime.fromisoformat(value)
+    if bucket == "month":
+        return t.year * 12 + t.month - 1
+    return int(t.replace(tzinfo=timezone.utc).timestamp()) // RESOLUTIONS[bucket]["seconds"]
+
+
+def _source_resolution(bucket: str, start: datetime) -> str:
+    """Finest rollup that serves the bucket and still retains the start time"""
+    names = list(RESOLUTIONS)
+    resolution = BUCKETS[bucket]
+    for name in names[names.index(resolution):]:
+        retention = RESOLUTIONS[name]["retention"]
+        if retention is None or start >= datetime.utcnow() - retention:
+            return name
+    return names[-1]
+
+
+def query_timeseries(
+    conn: sqlite3.Connection,
+    gateway: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    bucket: str = "hour",
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> Dict[str, Any]:
+    """Read a payment series from the rollups, downsampled to max_points"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+
+    end_time = _parse_time(end, datetime.utcnow())
+    start_time = _parse_time(start, end_time - timedelta(days=1))
+    if start_time > end_time:
+        raise ValueError("'from' must not be after 'to'")
+
+    resolution = _source_resolution(bucket, start_time)
+    served_bucket = bucket if bucket == "month" else resolution
+    fmt = RESOLUTIONS[resolution]["format"]
+
+    # Month buckets roll the day table up on the fly (at most 31 rows each)
+    bucket_expr = "substr(bucket, 1, 7) || '-01T00:00:00'" if served_bucket == "month" else "bucket"
+    sql = f'''SELECT {bucket_expr}, currency, SUM(count), SUM(volume)
+              FROM payment_rollups_{resolution}
+              WHERE bucket >= ? AND bucket <= ?'''
+    params: List[Any] = [start_time.strftime(fmt), end_time.strftime(fmt)]
+    if gateway:
+        sql += ' AND gateway = ?'
+        params.append(gateway)
+    sql += ' GROUP BY 1, 2 ORDER BY 1'
+
+    c = conn.cursor()
+    c.execute(sql, params)
+
+    first = _bucket_index(served_bucket, start_time.strftime(RESOLUTIONS[BUCKETS[served_bucket]]["format"]))
+    last = _bucket_index(served_bucket, end_time.strftime(RESOLUTIONS[BUCKETS[served_bucket]]["format"]))
+    factor = max(1, math.ceil((last - first + 1) / max(1, max_points)))
+
+    points: Dict[int, Dict[str, Any]] = {}
+    for bucket_start, currency, count, volume in c.fetchall():
+        slot = (_bucket_index(served_bucket, bucket_start) - first) // factor
+        point = points.get(slot)
+        if point is None:
+            point = points[slot] = {"t": bucket_start, "count": 0, "volume": {}}
+        point["count"] += count
+        point["volume"][currency] = point["volume"].get(currency, 0) + volume
+
+    return {
+        "gateway": gateway,
+        "from": start_time.isoformat(),
+        "to": end_time.isoformat(),
+        "bucket": served_bucket,
+        "source_resolution": resolution,
+        "downsample_factor": factor,
+        "points": [points[slot] for slot in sorted(points)],
+    }
@@ -0,0 +1,341 @@
+"""
+BrainSAIT Unified Dashboard - Workflow Engine
+Claims pending rows of the workflows table and runs them on LINC agents
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+
+import httpx
+
+from agent_registry import AGENT_REGISTRY
+
+# Concurrent tasks per agent unless overridden
+DEFAULT_AGENT_CONCURRENCY = 8
+
+# A claimed task is owned by its worker until the lease expires; leases of
+# tasks still in flight are renewed every LEASE_SECONDS / 3
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 3
+
+# A failed attempt is retried after RETRY_BASE_DELAY * 2^(attempt - 1)
+# seconds, capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 5.0
+RETRY_MAX_DELAY = 300.0
+
+# Pause between claim passes when no agent had both work and free slots;
+# doubles while the engine stays idle, up to MAX_POLL_INTERVAL
+POLL_INTERVAL = 0.2
+MAX_POLL_INTERVAL = 2.0
+
+# State transitions are written in batches
+FLUSH_INTERVAL = 0.05
+FLUSH_BATCH_SIZE = 500
+
+TASK_TIMEOUT = 30.0
+
+# Columns added to the original workflows table
+WORKFLOW_COLUMNS = {
+    "attempts": "INTEGER DEFAULT 0",
+    "lease_owner": "TEXT",
+    "lease_expires_at": "REAL",
+    "next_attempt_at": "REAL",
+    "result": "TEXT",
+    "error": "TEXT",
+}
+
+def init_workflow_engine(conn: sqlite3.Connection):
+    """Add lease and result columns to workflows and the claim index"""
+    c = conn.cursor()
+    existing = {row[1] for row in c.execute("PRAGMA table_info(workflows)")}
+    for column, definition in WORKFLOW_COLUMNS.items():
+        if column not in existing:
+            c.execute(f"ALTER TABLE workflows ADD COLUMN {column} {definition}")
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_workflows_claim
+                 ON workflows(status, agent_id, created_at)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_workflows_lease
+                 ON workflows(status, lease_expires_at)''')
+
+def enqueue_workflow(conn: sqlite3.Connection, name: str, agent_id: str,
+                     data: Optional[Dict[str, Any]] = None) -> str:
+    """Insert a pending workflow and return its id"""
+    workflow_id = f"wf_{uuid.uuid4().hex}"
+    now = datetime.now().isoformat()
+    conn.execute('''INSERT INTO workflows (id, name, status, agent_id, created_at, updated_at, data, attempts)
+                    VALUES (?, ?, 'pending', ?, ?, ?, ?, 0)''',
+                 (workflow_id, name, agent_id, now, now, json.dumps(data or {})))
+    return workflow_id
+
+class WorkflowEngine:
+    """Runs pending workflows on their agents with per-agent concurrency limits
+
+    Each claim pass atomically flips up to `free slots` pending rows per
+    agent to running under this worker's lease (UPDATE ... RETURNING in one
+    transaction), so several engines can share a database without running
+    a task twice. Results are buffered and written in batches, and leases
+    left behind by a crashed worker are returned to pending once expired.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        host: str = "localhost",
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = DEFAULT_AGENT_CONCURRENCY,
+        lease_seconds: float = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.db_path = db_path
+        self.limits = {
+            agent_id: (concurrency or {}).get(agent_id, default_concurrency)
+            for agent_id in AGENT_REGISTRY
+        }
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"engine-{uuid.uuid4().hex[:8]}"
+
+        # One small pool per agent: its connections never exceed its task
+        # limit, and a single large shared pool degrades under concurrency
+        self._clients = {
+            agent_id: httpx.AsyncClient(
+                base_url=f"http://{host}:{config['port']}",
+                transport=transport,
+                timeout=httpx.Timeout(TASK_TIMEOUT, connect=2.0),
+                limits=httpx.Limits(max_connections=self.limits[agent_id],
+                                    max_keepalive_connections=self.limits[agent_id])
+            )
+            for agent_id, config in AGENT_REGISTRY.items()
+        }
+        self._in_flight: Dict[str, int] = {agent_id: 0 for agent_id in AGENT_REGISTRY}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._pending_writes: List[Tuple[str, Optional[str], Optional[str], Optional[float], str]] = []
+        self._slot_freed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"claimed": 0, "completed": 0, "failed": 0, "retried": 0, "recovered": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Database side (runs in a worker thread)
+    # ------------------------------------------------------------------
+
+    def _claim(self, free: Dict[str, int]) -> List[Tuple[str, str, str, str, int]]:
+        now = time.time()
+        updated_at = datetime.now().isoformat()
+        claimed = []
+        conn = self._connect()
+        try:
+            # Read first: an idle engine must not take the write lock every poll
+            placeholders = ", ".join("?" * len(free))
+            has_work = conn.execute(f'''SELECT EXISTS (SELECT 1 FROM workflows
+                                                        WHERE status = 'pending' AND agent_id IN ({placeholders})
+                                                          AND (next_attempt_at IS NULL OR next_attempt_at <= ?))''',
+                                    (*free, now)).fetchone()[0]
+            if not has_work:
+                return claimed
+
+            conn.execute("BEGIN IMMEDIATE")
+            for agent_id, slots in free.items():
+                claimed += conn.execute('''UPDATE workflows
+                                           SET status = 'running', lease_owner = ?, lease_expires_at = ?,
+                                               attempts = attempts + 1, updated_at = ?
+                                           WHERE id IN (SELECT id FROM workflows
+                                                        WHERE status = 'pending' AND agent_id = ?
+                                                          AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+                                                        ORDER BY created_at LIMIT ?)
+                                           RETURNING id, name, agent_id, data, attempts''',
+                                        (self.worker_id, now + self.lease_seconds, updated_at,
+                                         agent_id, now, slots)).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return claimed
+
+    def _write(self, transitions: List[Tuple[str, Optional[str], Optional[str], Optional[float], str]]):
+        """Apply (status, result, error, next_attempt_at, id) transitions owned by this worker"""
+        updated_at = datetime.now().isoformat()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany('''UPDATE workflows
+                                SET status = ?, result = ?, error = ?, next_attempt_at = ?, updated_at = ?,
+                                    lease_owner = NULL, lease_expires_at = NULL
+                                WHERE id = ? AND lease_owner = ?''',
+                             [(status, result, error, next_attempt_at, updated_at, workflow_id, self.worker_id)
+                              for status, result, error, next_attempt_at, workflow_id in transitions])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _renew_leases(self, workflow_ids: List[str]):
+        conn = self._connect()
+        try:
+            conn.executemany('''UPDATE workflows SET lease_expires_at = ?
+                                WHERE id = ? AND lease_owner = ?''',
+                             [(time.time() + self.lease_seconds, workflow_id, self.worker_id)
+                              for workflow_id in workflow_ids])
+        finally:
+            conn.close()
+
+    def _recover_expired(self) -> int:
+        """Return tasks whose lease ran out to pending, or fail them if out of attempts
+
+        Rows left running by a version without leases have no expiry at
+        all and are recovered too.
+        """
+        now = time.time()
+        updated_at = datetime.now().isoformat()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            recovered = conn.execute('''UPDATE workflows
+                                        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                                            error = CASE WHEN attempts >= ? THEN 'lease expired' ELSE error END,
+                                            lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                                        WHERE status = 'running'
+                                          AND (lease_expires_at < ? OR lease_expires_at IS NULL)''',
+                                     (self.max_attempts, self.max_attempts, updated_at, now)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return recovered
+
+    # ------------------------------------------------------------------
+    # Event loop side
+    # ------------------------------------------------------------------
+
+    async def _execute(self, workflow_id: str, name: str, agent_id: str, data: str, attempts: int):
+        try:
+            response = await self._clients[agent_id].post(
+                "/tasks",
+                json={"task_id": workflow_id, "name": name, "data": json.loads(data) if data else {}}
+            )
+            response.raise_for_status()
+            result = json.dumps(response.json())
+            self._pending_writes.append(("completed", result, None, None, workflow_id))
+            self.stats["completed"] += 1
+        except (httpx.HTTPError, ValueError) as e:
+            if attempts < self.max_attempts:
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+                self._pending_writes.append(("pending", None, repr(e), time.time() + delay, workflow_id))
+                self.stats["retried"] += 1
+            else:
+                self._pending_writes.append(("failed", None, repr(e), None, workflow_id))
+                self.stats["failed"] += 1
+        finally:
+            self._in_flight[agent_id] -= 1
+            self._running.pop(workflow_id, None)
+            self._slot_freed.set()
+
+    async def _dispatch_loop(self):
+        poll_interval = POLL_INTERVAL
+        while True:
+            free = {
+                agent_id: limit - self._in_flight[agent_id]
+                for agent_id, limit in self.limits.items()
+                if limit - self._in_flight[agent_id] > 0
+            }
+            try:
+                claimed = await asyncio.to_thread(self._claim, free) if free else []
+            except sqlite3.Error as e:
+                # Typically "database is locked" while rotation or compaction
+                # holds the write lock; keep the loop alive and retry later
+                print(f"❌ Workflow claim failed: {e}")
+                await asyncio.sleep(poll_interval)
+                poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 2)
+                continue
+            for workflow_id, name, agent_id, data, attempts in claimed:
+                self._in_flight[agent_id] += 1
+                self._running[workflow_id] = asyncio.create_task(
+                    self._execute(workflow_id, name, agent_id, data, attempts)
+                )
+            self.stats["claimed"] += len(claimed)
+
+            if claimed:
+                poll_interval = POLL_INTERVAL
+            else:
+                # Nothing claimable: wait for a slot to free up or poll again,
+                # less often the longer the queue stays empty
+                self._slot_freed.clear()
+                try:
+                    await asyncio.wait_for(self._slot_freed.wait(), poll_interval)
+                    poll_interval = POLL_INTERVAL
+                except asyncio.TimeoutError:
+                    poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 2)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        while self._pending_writes:
+            batch = self._pending_writes[:FLUSH_BATCH_SIZE]
+            del self._pending_writes[:FLUSH_BATCH_SIZE]
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except sqlite3.Error as e:
+                self._pending_writes[:0] = batch
+                print(f"❌ Workflow state flush failed: {e}")
+                return
+
+    async def _lease_loop(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if self._running:
+                    await asyncio.to_thread(self._renew_leases, list(self._running))
+                recovered = await asyncio.to_thread(self._recover_expired)
+                if recovered:
+                    self.stats["recovered"] += recovered
+                    print(f"⚠️ Recovered {recovered} workflows with expired leases")
+            except sqlite3.Error as e:
+                print(f"❌ Workflow lease maintenance failed: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "in_flight": {agent_id: n for agent_id, n in self._in_flight.items() if n},
+            "pending_writes": len(self._pending_writes),
+            **self.stats
+        }
+
+    def start(self):
+        """Start claiming and running workflows on the current event loop"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._dispatch_loop()),
+                asyncio.create_task(self._flush_loop()),
+                asyncio.create_task(self._lease_loop())
+            ]
+
+    async def stop(self):
+        """Stop claiming, let running tasks finish and write their results"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+        await self.flush()
+        await asyncio.gather(*(client.aclose() for client in self._clients.values()))
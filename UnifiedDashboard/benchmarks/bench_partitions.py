@@ -0,0 +1,118 @@
+"""
+Benchmark: hot-path payment queries as history grows
+
+Builds scratch databases holding 1, 3 and 5 years of synthetic payments and
+times the dashboard's hot queries (today's overview, as the old date() scan
+and as a timestamp range, and the first two pages of recent payments)
+against a single payments table and against the same data after rotation
+into monthly partitions and archiving.
+
+Usage:
+    python benchmarks/bench_partitions.py                     # 20,000 payments per month
+    python benchmarks/bench_partitions.py --per-month 50000 --years 1 5 10
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+import partitions
+import timeseries
+
+GATEWAYS = ["paylinc", "stripe", "paypal", "sarie", "nphies"]
+
+# The overview query before partitioning, which scanned the whole table
+LEGACY_OVERVIEW_SQL = '''SELECT gateway, COUNT(*), SUM(amount), AVG(amount)
+                         FROM payments
+                         WHERE date(timestamp) = date('now')
+                         GROUP BY gateway'''
+
+OVERVIEW_SQL = '''SELECT gateway, COUNT(*), SUM(amount), AVG(amount)
+                  FROM payments
+                  WHERE timestamp >= date('now') AND timestamp < date('now', '+1 day')
+                  GROUP BY gateway'''
+
+def create_database(path: str, years: int, per_month: int):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE payments {partitions.PAYMENTS_SCHEMA}")
+    conn.execute("CREATE INDEX idx_payments_timestamp_id ON payments (timestamp DESC, id DESC)")
+    timeseries.init_rollups(conn)
+    partitions.init_partitions(conn)
+    now = datetime.utcnow()
+    span = years * 365 * 24 * 3600
+    total = years * 12 * per_month
+    for chunk in range(0, total, 100_000):
+        conn.executemany(
+            "INSERT INTO payments VALUES (?, ?, ?, 'SAR', 'completed', ?, NULL)",
+            [(f"pay_{i}", GATEWAYS[i % len(GATEWAYS)], round(random.uniform(10, 5000), 2),
+              (now - timedelta(seconds=random.randint(0, span))).isoformat())
+             for i in range(chunk, min(chunk + 100_000, total))]
+        )
+    conn.execute("DELETE FROM payment_rollup_log")
+    conn.commit()
+    conn.close()
+
+def time_queries(path: str, repeat: int) -> dict:
+    conn = sqlite3.connect(path)
+    columns = ["id", "timestamp", "gateway", "amount", "currency", "status"]
+    timings = {"legacy_overview": [], "overview": [], "recent_page_1": [], "recent_page_2": []}
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(LEGACY_OVERVIEW_SQL).fetchall()
+            timings["legacy_overview"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            conn.execute(OVERVIEW_SQL).fetchall()
+            timings["overview"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            page = partitions.fetch_page(conn, None, 50, columns)
+            timings["recent_page_1"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            partitions.fetch_page(conn, (page[-1][1], page[-1][0]), 50, columns)
+            timings["recent_page_2"].append(time.perf_counter() - started)
+    finally:
+        conn.close()
+    return {name: statistics.median(values) * 1000 for name, values in timings.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partitioned payment queries")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--per-month", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    random.seed(0)
+
+    print(f"{'years':>5} {'rows':>10}  {'layout':<12} {'legacy ov.':>10} {'overview':>10} {'page 1':>10} {'page 2':>10} {'db MB':>8}")
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "dashboard.db")
+            create_database(db_path, years, args.per_month)
+            rows = years * 12 * args.per_month
+
+            for layout in ("single", "partitioned"):
+                if layout == "partitioned":
+                    partitions.rotate(db_path)
+                    partitions.archive(db_path, str(Path(tmp) / "archives"))
+                    timeseries.compact(db_path)
+                    conn = sqlite3.connect(db_path)
+                    conn.execute("VACUUM")
+                    conn.close()
+                ms = time_queries(db_path, args.repeat)
+                size = Path(db_path).stat().st_size / 1e6
+                print(f"{years:>5} {rows:>10,}  {layout:<12} {ms['legacy_overview']:>8.2f}ms {ms['overview']:>8.2f}ms "
+                      f"{ms['recent_page_1']:>8.2f}ms {ms['recent_page_2']:>8.2f}ms {size:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: PaymentTransaction decoding and memory footprint
+
+Compares the original decoding path (stdlib json, @dataclass records,
+eager datetime parsing) with the current one (orjson when installed,
+cyclic GC paused, slotted records, interned enums, lazy timestamps) on a
+synthetic PayLinc payload.
+
+Usage:
+    python benchmarks/bench_transactions.py              # 1,000,000 records
+    python benchmarks/bench_transactions.py --records 200000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+
+from paylinc_client import decode_json, json_loads
+from paylinc_integration import decode_healthcare_payment, decode_records
+
+@dataclass
+class LegacyPaymentTransaction:
+    """The pre-slots model, kept here only as the baseline"""
+    id: str
+    gateway: str
+    amount: float
+    currency: str
+    status: str
+    timestamp: datetime
+    metadata: Dict[str, Any]
+
+def legacy_decode(body: bytes):
+    data = json.loads(body)
+    return [
+        LegacyPaymentTransaction(
+            id=p["payment_id"],
+            gateway="nphies",
+            amount=p["amount"],
+            currency=p["currency"],
+            status=p["status"],
+            timestamp=datetime.fromisoformat(p["created_at"]),
+            metadata=p.get("metadata", {})
+        )
+        for p in data.get("payments", [])
+    ]
+
+def current_decode(body: bytes):
+    data = decode_json(body)
+    return decode_records(decode_healthcare_payment, data.get("payments", []))
+
+def make_payload(records: int) -> bytes:
+    payments = [
+        {
+            "payment_id": f"pay_{i:09d}",
+            "amount": round(50 + (i % 9973) * 0.37, 2),
+            "currency": "SAR",
+            "status": "completed",
+            "created_at": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00",
+            "metadata": {}
+        }
+        for i in range(records)
+    ]
+    return json.dumps({"payments": payments}).encode("utf-8")
+
+def measure(name: str, decode, body: bytes, records: int):
+    gc.collect()
+    started = time.perf_counter()
+    transactions = decode(body)
+    elapsed = time.perf_counter() - started
+    del transactions
+
+    gc.collect()
+    tracemalloc.start()
+    transactions = decode(body)
+    # Retained size: what stays alive once the parsed JSON is released
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del transactions
+
+    print(f"{name:<10} decode {elapsed:6.2f} s  "
+          f"{records / elapsed / 1e3:8.0f} k rec/s  "
+          f"{retained / records:6.0f} B/record retained")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    body = make_payload(args.records)
+    print(f"payload: {args.records:,} records, {len(body) / 1e6:.1f} MB, "
+          f"decoder: {json_loads.__module__}")
+    measure("legacy", legacy_decode, body, args.records)
+    measure("current", current_decode, body, args.records)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: workflow engine throughput against local stub agents
+
+Starts services/stub_agents.py in a subprocess, enqueues pending workflows
+spread over every registry agent in a scratch database and measures how
+fast the engine drives them to completed.
+
+Usage:
+    python benchmarks/bench_workflows.py                    # 20,000 tasks
+    python benchmarks/bench_workflows.py --tasks 50000 --concurrency 16
+    python benchmarks/bench_workflows.py --agent-delay 0.05 # 50 ms per agent call
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "services"))
+sys.path.insert(0, str(ROOT / "backend"))
+
+from agent_registry import AGENT_REGISTRY
+from workflow_engine import WorkflowEngine, init_workflow_engine
+
+def create_database(path: str, tasks: int):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute('''CREATE TABLE workflows
+                    (id TEXT PRIMARY KEY,
+                     name TEXT,
+                     status TEXT,
+                     agent_id TEXT,
+                     created_at DATETIME,
+                     updated_at DATETIME,
+                     data TEXT)''')
+    init_workflow_engine(conn)
+    agents = list(AGENT_REGISTRY)
+    start = datetime.now()
+    conn.executemany('''INSERT INTO workflows (id, name, status, agent_id, created_at, updated_at, data, attempts)
+                        VALUES (?, ?, 'pending', ?, ?, ?, ?, 0)''',
+                     [(f"wf_{i}", f"task {i}", agents[i % len(agents)],
+                       (start + timedelta(microseconds=i)).isoformat(), start.isoformat(),
+                       json.dumps({"n": i}))
+                      for i in range(tasks)])
+    conn.commit()
+    conn.close()
+
+def count_done(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM workflows WHERE status IN ('completed', 'failed')"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+async def wait_for_agents(host: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    for config in AGENT_REGISTRY.values():
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(host, config["port"])
+                writer.close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("stub agents did not start")
+                await asyncio.sleep(0.1)
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "workflows.db")
+        create_database(db_path, args.tasks)
+
+        stubs = subprocess.Popen(
+            [sys.executable, str(ROOT / "services" / "stub_agents.py"),
+             "--host", args.host, "--delay", str(args.agent_delay)],
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            await wait_for_agents(args.host)
+            engine = WorkflowEngine(
+                db_path,
+                host=args.host,
+                default_concurrency=args.concurrency
+            )
+            started = time.perf_counter()
+            engine.start()
+            done = 0
+            while done < args.tasks:
+                await asyncio.sleep(0.25)
+                done = await asyncio.to_thread(count_done, db_path)
+            elapsed = time.perf_counter() - started
+            await engine.stop()
+        finally:
+            stubs.terminate()
+            stubs.wait()
+
+    print(f"tasks: {args.tasks:,}  agents: {len(AGENT_REGISTRY)}  "
+          f"concurrency/agent: {args.concurrency}  agent delay: {args.agent_delay * 1000:.0f} ms")
+    print(f"elapsed {elapsed:6.2f} s   {args.tasks / elapsed:8.0f} tasks/s")
+    print(f"engine: {engine.status()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workflow engine")
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent tasks per agent")
+    parser.add_argument("--agent-delay", type=float, default=0.0, help="seconds per stub agent call")
+    parser.add_argument("--host", default="127.0.0.1")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
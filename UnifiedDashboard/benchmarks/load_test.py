@@ -0,0 +1,455 @@
+"""
+Load test: WebSocket and SSE fan-out of the dashboard backend
+
+Starts backend/main.py under uvicorn in a scratch directory, seeds its
+dashboard.db with synthetic payments, agents and workflows, then opens
+many concurrent /ws/dashboard and /api/v1/stream/dashboard clients and
+records, per protocol, connection failures, update lag (receive time minus
+the message's timestamp), inter-update intervals and missed updates. Lag
+only covers building and sending an update; a server too busy to wake its
+per-client loops shows up as stretched intervals and missed updates. The
+server process is sampled for CPU, resident memory and SQLite statements
+per second. Everything is written to a JSON report; pass a previous report
+as --baseline to flag regressions.
+
+Usage:
+    python benchmarks/load_test.py                          # 500 WS + 500 SSE clients, 60 s
+    python benchmarks/load_test.py --ws-clients 2000 --sse-clients 0 --duration 120
+    python benchmarks/load_test.py --report after.json --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "services"))
+
+from agent_registry import AGENT_REGISTRY
+
+try:
+    from websockets.asyncio.client import connect as ws_connect  # websockets >= 13
+except ImportError:
+    from websockets.client import connect as ws_connect
+
+# Seconds between updates each endpoint pushes (see backend/main.py)
+WS_INTERVAL = 5.0
+SSE_INTERVAL = 2.0
+
+# Metrics compared against --baseline; higher is worse for all of them
+REGRESSION_KEYS = [
+    ("ws", "lag_ms", "p99"),
+    ("ws", "missed_ratio"),
+    ("sse", "lag_ms", "p99"),
+    ("sse", "missed_ratio"),
+    ("server", "cpu_percent", "mean"),
+    ("server", "rss_mb", "max"),
+    ("server", "sqlite_statements_per_s"),
+]
+
+GATEWAYS = ["paylinc", "stripe", "paypal", "sarie", "nphies"]
+
+# ----------------------------------------------------------------------
+# Server side: run the app with SQLite statements counted
+# ----------------------------------------------------------------------
+
+def serve(port: int, stats_file: str):
+    """Run the backend in this process, counting every SQLite statement"""
+    counter = [0]
+    lock = threading.Lock()
+    connect = sqlite3.connect
+
+    def count(_statement):
+        with lock:
+            counter[0] += 1
+
+    def counted_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(count)
+        return conn
+
+    sqlite3.connect = counted_connect
+
+    def report():
+        while True:
+            time.sleep(0.5)
+            with open(stats_file + ".tmp", "w") as f:
+                f.write(str(counter[0]))
+            os.replace(stats_file + ".tmp", stats_file)
+
+    threading.Thread(target=report, daemon=True).start()
+
+    import uvicorn
+    sys.path.insert(0, str(ROOT / "backend"))
+    uvicorn.run("main:app", host="127.0.0.1", port=port, log_level="warning",
+                ws_max_queue=64, backlog=4096)
+
+def seed_database(path: Path, payments: int, workflows: int):
+    conn = sqlite3.connect(str(path), timeout=30)
+    now = datetime.now()
+    conn.executemany(
+        "INSERT OR REPLACE INTO payments (id, gateway, amount, currency, status, timestamp, metadata) "
+        "VALUES (?, ?, ?, 'SAR', ?, ?, '{}')",
+        [(f"pay_{i}", GATEWAYS[i % len(GATEWAYS)], round(random.uniform(10, 5000), 2),
+          random.choice(["completed", "pending", "failed"]),
+          (now - timedelta(seconds=random.randint(0, 6 * 3600))).isoformat())
+         for i in range(payments)]
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO agent_status (agent_id, name, status, health, last_heartbeat, metrics, category) "
+        "VALUES (?, ?, 'online', 'healthy', ?, '{}', NULL)",
+        [(agent_id, config["name"], now.isoformat()) for agent_id, config in AGENT_REGISTRY.items()]
+    )
+    agents = list(AGENT_REGISTRY)
+    conn.executemany(
+        "INSERT OR REPLACE INTO workflows (id, name, status, agent_id, created_at, updated_at, data, attempts) "
+        "VALUES (?, ?, ?, ?, ?, ?, '{}', 0)",
+        [(f"wf_{i}", f"workflow {i}", random.choice(["pending", "running", "completed"]),
+          agents[i % len(agents)], now.isoformat(), now.isoformat())
+         for i in range(workflows)]
+    )
+    conn.commit()
+    conn.close()
+
+# ----------------------------------------------------------------------
+# Process sampling (Linux /proc)
+# ----------------------------------------------------------------------
+
+class ProcessSampler:
+    """Samples CPU and RSS of a process and the statement counter it writes"""
+
+    def __init__(self, pid: int, stats_file: str, interval: float = 1.0):
+        self.pid = pid
+        self.stats_file = stats_file
+        self.interval = interval
+        self.cpu: List[float] = []
+        self.rss: List[float] = []
+        self.statements: List[tuple] = []
+        self._ticks = os.sysconf("SC_CLK_TCK")
+
+    def _cpu_seconds(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self._ticks
+        except (OSError, IndexError):
+            return None
+
+    def _rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def _statement_count(self) -> Optional[int]:
+        try:
+            with open(self.stats_file) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return None
+
+    async def run(self):
+        last_cpu, last_time = self._cpu_seconds(), time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            cpu, now = self._cpu_seconds(), time.monotonic()
+            if cpu is not None and last_cpu is not None:
+                self.cpu.append(100.0 * (cpu - last_cpu) / (now - last_time))
+            last_cpu, last_time = cpu, now
+            rss = self._rss_mb()
+            if rss is not None:
+                self.rss.append(rss)
+            count = self._statement_count()
+            if count is not None:
+                self.statements.append((now, count))
+
+    def report(self) -> Dict[str, Any]:
+        rate = None
+        if len(self.statements) >= 2:
+            (t0, c0), (t1, c1) = self.statements[0], self.statements[-1]
+            rate = round((c1 - c0) / (t1 - t0), 1) if t1 > t0 else None
+        return {
+            "cpu_percent": summarize(self.cpu, 1),
+            "rss_mb": summarize(self.rss, 1),
+            "sqlite_statements_per_s": rate,
+        }
+
+# ----------------------------------------------------------------------
+# Clients
+# ----------------------------------------------------------------------
+
+class ClientStats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.disconnected = 0
+        self.messages = 0
+        self.expected = 0
+        self.lags: List[float] = []
+        self.intervals: List[float] = []
+
+def _message_lag(payload: str) -> float:
+    timestamp = json.loads(payload)["timestamp"]
+    return (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds() * 1000
+
+def _record(stats: ClientStats, payload: str, last: Optional[float], window: tuple) -> float:
+    now = time.monotonic()
+    if window[0] <= now <= window[1]:
+        stats.messages += 1
+        stats.lags.append(_message_lag(payload))
+        if last is not None:
+            stats.intervals.append((now - last) * 1000)
+    return now
+
+async def ws_client(url: str, stats: ClientStats, start_delay: float, window: tuple):
+    await asyncio.sleep(start_delay)
+    try:
+        async with ws_connect(url, open_timeout=30, max_size=None, ping_interval=None) as ws:
+            stats.connected += 1
+            stats.expected += int((window[1] - max(window[0], time.monotonic())) // WS_INTERVAL)
+            last = None
+            while time.monotonic() < window[1]:
+                payload = await asyncio.wait_for(ws.recv(), window[1] - time.monotonic() + WS_INTERVAL)
+                last = _record(stats, payload, last, window)
+    except asyncio.TimeoutError:
+        pass
+    except Exception:
+        if stats.connected and time.monotonic() < window[1]:
+            stats.disconnected += 1
+        else:
+            stats.failed += 1
+
+async def sse_client(client, url: str, stats: ClientStats, start_delay: float, window: tuple):
+    await asyncio.sleep(start_delay)
+    connected = False
+    try:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            connected = True
+            stats.connected += 1
+            stats.expected += int((window[1] - max(window[0], time.monotonic())) // SSE_INTERVAL)
+            last = None
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    last = _record(stats, line[6:], last, window)
+                if time.monotonic() >= window[1]:
+                    break
+    except Exception:
+        if connected and time.monotonic() < window[1]:
+            stats.disconnected += 1
+        elif not connected:
+            stats.failed += 1
+
+def summarize(values: List[float], digits: int = 1) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], digits)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), digits),
+        "p50": pct(0.50),
+        "p90": pct(0.90),
+        "p99": pct(0.99),
+        "max": round(ordered[-1], digits),
+    }
+
+def client_report(clients: int, stats: ClientStats) -> Dict[str, Any]:
+    missed = max(0, stats.expected - stats.messages)
+    return {
+        "clients": clients,
+        "connected": stats.connected,
+        "failed_connects": stats.failed,
+        "dropped_connections": stats.disconnected,
+        "messages": stats.messages,
+        "expected_messages": stats.expected,
+        "missed_messages": missed,
+        "missed_ratio": round(missed / stats.expected, 4) if stats.expected else None,
+        "lag_ms": summarize(stats.lags),
+        "interval_ms": summarize(stats.intervals),
+    }
+
+# ----------------------------------------------------------------------
+# Orchestration
+# ----------------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def wait_for_server(base_url: str, timeout: float = 30.0):
+    import httpx
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("backend did not start")
+            await asyncio.sleep(0.2)
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        stats_file = str(Path(tmp) / "sqlite_statements")
+        env = {
+            **os.environ,
+            "ENABLE_AGENTS_MONITORING": "false",
+            "ENABLE_WORKFLOW_ENGINE": "false",
+            "ENABLE_PAYLINC": "false",
+            "ENABLE_RECONCILIATION": "false",
+        }
+        server = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--serve",
+             "--port", str(port), "--stats-file", stats_file],
+            cwd=tmp, env=env
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            await wait_for_server(base_url)
+            seed_database(Path(tmp) / "dashboard.db", args.payments, args.workflows)
+
+            sampler = ProcessSampler(server.pid, stats_file)
+            sampling = asyncio.create_task(sampler.run())
+
+            start = time.monotonic()
+            window = (start + args.ramp, start + args.ramp + args.duration)
+            ws_stats, sse_stats = ClientStats(), ClientStats()
+            total = args.ws_clients + args.sse_clients
+            delays = [args.ramp * i / max(total, 1) for i in range(total)]
+            random.shuffle(delays)
+
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+            timeout = httpx.Timeout(30.0, read=SSE_INTERVAL * 5)
+            async with httpx.AsyncClient(limits=limits, timeout=timeout) as sse_http:
+                tasks = [
+                    ws_client(f"ws://127.0.0.1:{port}/ws/dashboard", ws_stats, delays[i], window)
+                    for i in range(args.ws_clients)
+                ] + [
+                    sse_client(sse_http, f"{base_url}/api/v1/stream/dashboard", sse_stats,
+                               delays[args.ws_clients + i], window)
+                    for i in range(args.sse_clients)
+                ]
+                await asyncio.gather(*tasks)
+
+            sampling.cancel()
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "config": {
+            "ws_clients": args.ws_clients,
+            "sse_clients": args.sse_clients,
+            "duration_s": args.duration,
+            "ramp_s": args.ramp,
+            "payments": args.payments,
+            "workflows": args.workflows,
+            "agents": len(AGENT_REGISTRY),
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+        },
+        "ws": client_report(args.ws_clients, ws_stats),
+        "sse": client_report(args.sse_clients, sse_stats),
+        "server": sampler.report(),
+    }
+
+def _lookup(report: Dict[str, Any], path: tuple) -> Optional[float]:
+    value: Any = report
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value if isinstance(value, (int, float)) else None
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for path in REGRESSION_KEYS:
+        current, previous = _lookup(report, path), _lookup(baseline, path)
+        if current is None or previous is None:
+            continue
+        limit = previous * (1 + tolerance) if previous else tolerance
+        if current > limit:
+            regressions.append(f"{'.'.join(path)}: {previous} -> {current}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test dashboard WebSocket/SSE fan-out")
+    parser.add_argument("--ws-clients", type=int, default=500)
+    parser.add_argument("--sse-clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds after ramp-up")
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which clients connect")
+    parser.add_argument("--payments", type=int, default=100_000)
+    parser.add_argument("--workflows", type=int, default=5_000)
+    parser.add_argument("--report", default="load_test_report.json")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--stats-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.stats_file)
+        return
+
+    random.seed(args.seed)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    report = asyncio.run(run(args))
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for protocol in ("ws", "sse"):
+        r = report[protocol]
+        if r["clients"]:
+            print(f"{protocol:3}: {r['connected']}/{r['clients']} connected  "
+                  f"lag p50 {r['lag_ms']['p50']} ms  p99 {r['lag_ms']['p99']} ms  "
+                  f"missed {r['missed_messages']}/{r['expected_messages']}")
+    s = report["server"]
+    print(f"server: cpu mean {s['cpu_percent']['mean']}%  rss max {s['rss_mb']['max']} MB  "
+          f"sqlite {s['sqlite_statements_per_s']} stmt/s")
+    print(f"report: {args.report}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
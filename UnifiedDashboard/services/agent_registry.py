@@ -0,0 +1,62 @@
+"""
+LINC Agent Registry
+Single source of truth for the 16 LINC agents, their ports and categories
+OID: 1.3.6.1.4.1.61026
+"""
+
+from functools import lru_cache
+from typing import Optional
+import re
+
+CATEGORIES = ("healthcare", "business", "automation", "content", "security")
+
+AGENT_REGISTRY = {
+    # Healthcare Agents
+    "masterlinc": {"name": "MasterLINC", "port": 8000, "category": "security"},
+    "authlinc": {"name": "AuthLINC", "port": 8001, "category": "security"},
+    "doctorlinc": {"name": "DoctorLINC", "port": 8010, "category": "healthcare"},
+    "nurslinc": {"name": "NurseLINC", "port": 8011, "category": "healthcare"},
+    "patientlinc": {"name": "PatientLINC", "port": 8012, "category": "healthcare"},
+    "careteamlinc": {"name": "CareTeamLINC", "port": 8013, "category": "healthcare"},
+
+    # Business Agents
+    "bizlinc": {"name": "BizLINC", "port": 8020, "category": "business"},
+    "paylinc": {"name": "PayLINC", "port": 8021, "category": "business"},
+    "insightlinc": {"name": "InsightLINC", "port": 8022, "category": "business"},
+
+    # Automation Agents
+    "devlinc": {"name": "DevLINC", "port": 8030, "category": "automation"},
+    "autolinc": {"name": "AutoLINC", "port": 8031, "category": "automation"},
+    "codelinc": {"name": "CodeLINC", "port": 8032, "category": "automation"},
+
+    # Content Agents
+    "medialinc": {"name": "MediaLINC", "port": 8040, "category": "content"},
+    "edulinc": {"name": "EduLINC", "port": 8041, "category": "content"},
+    "chatlinc": {"name": "ChatLINC", "port": 8042, "category": "content"},
+
+    # Identity Agent
+    "oidlinc": {"name": "OIDLINC", "port": 8050, "category": "security"}
+}
+
+# Fallback for agents reported under names that are not in the registry.
+# Checked in order; the first matching pattern wins.
+_NAME_RULES = [
+    (re.compile(r"Doctor|Nurse|Patient|CareTeam"), "healthcare"),
+    (re.compile(r"Biz|Pay|Insight"), "business"),
+    (re.compile(r"Dev|Auto|Code"), "automation"),
+    (re.compile(r"Media|Edu|Chat"), "content"),
+    (re.compile(r"Master|Auth|OID"), "security"),
+]
+
+@lru_cache(maxsize=1024)
+def categorize(agent_id: str, name: Optional[str] = None) -> Optional[str]:
+    """Resolve an agent's category by registry id, falling back to its name"""
+    config = AGENT_REGISTRY.get(agent_id)
+    if config:
+        return config["category"]
+
+    if name and "LINC" in name:
+        for pattern, category in _NAME_RULES:
+            if pattern.search(name):
+                return category
+    return None
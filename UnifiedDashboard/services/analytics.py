@@ -0,0 +1,310 @@
+"""
+Streaming Payment Analytics
+Incremental, multi-currency aggregates updated batch by batch in constant memory
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Percentiles reported for every aggregate
+PERCENTILES = (0.5, 0.9, 0.99)
+
+REPORTING_CURRENCY = "SAR"
+
+# Seed rates (reporting currency per unit) used until PayLinc reports a
+# fresher one. SAR and the Gulf currencies are pegged to USD.
+DEFAULT_FX_RATES = {
+    "SAR": 1.0,
+    "USD": 3.75,
+    "AED": 1.0211,
+    "QAR": 1.0302,
+    "BHD": 9.9734,
+    "OMR": 9.7403,
+    "KWD": 12.20,
+    "JOD": 5.289,
+    "EUR": 4.05,
+    "GBP": 4.75,
+    "EGP": 0.077,
+    "INR": 0.045,
+    "PKR": 0.0135,
+    "PHP": 0.066,
+}
+
+# Sender country -> currency, for cross-border transactions that only
+# carry the sender's country
+COUNTRY_CURRENCIES = {
+    "SA": "SAR", "AE": "AED", "QA": "QAR", "BH": "BHD", "OM": "OMR",
+    "KW": "KWD", "JO": "JOD", "EG": "EGP", "US": "USD", "GB": "GBP",
+    "IN": "INR", "PK": "PKR", "PH": "PHP", "DE": "EUR", "FR": "EUR",
+}
+
+def _settled_rate(txn: Any) -> float:
+    """fx_rate a cross-border transfer settled at (recipient per sender unit), NaN if none"""
+    return (txn.metadata.get("fx_rate") if txn.metadata else None) or np.nan
+
+def _sender_currency(txn: Any) -> Optional[str]:
+    return COUNTRY_CURRENCIES.get(txn.metadata.get("sender_country")) if txn.metadata else None
+
+class FXRateTable:
+    """Rates into the reporting currency, cached locally as JSON"""
+
+    def __init__(self, reporting_currency: str = REPORTING_CURRENCY,
+                 rates: Optional[Dict[str, float]] = None, path: Optional[Path] = None):
+        self.reporting_currency = reporting_currency
+        self.rates = dict(rates or DEFAULT_FX_RATES)
+        self.rates[reporting_currency] = 1.0
+        self.path = path
+
+    @classmethod
+    def load(cls, path: Path, reporting_currency: str = REPORTING_CURRENCY) -> "FXRateTable":
+        """Load cached rates from path, falling back to the seed rates"""
+        rates = dict(DEFAULT_FX_RATES)
+        if path.exists():
+            try:
+                cached = json.loads(path.read_text(encoding="utf-8"))
+                if cached.get("reporting_currency") == reporting_currency:
+                    rates.update(cached.get("rates", {}))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable FX cache {path}: {e}")
+        return cls(reporting_currency, rates, path)
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.write_text(json.dumps({
+            "reporting_currency": self.reporting_currency,
+            "rates": self.rates
+        }, indent=2), encoding="utf-8")
+
+    def rate(self, currency: str) -> Optional[float]:
+        return self.rates.get(currency)
+
+    def observe(self, sender_currency: str, recipient_currency: str, fx_rate: float):
+        """Learn a rate from a settled transfer (fx_rate = recipient per sender unit)"""
+        if sender_currency == self.reporting_currency and fx_rate > 0:
+            self.rates[recipient_currency] = 1.0 / fx_rate
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with bounded relative error
+
+    Values are counted in buckets whose bounds grow geometrically, so memory
+    depends on the value range rather than the number of values, and any
+    quantile is accurate to within `relative_accuracy`. Negative values
+    (refunds, reversals) are bucketed by magnitude in a store of their own.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.negative_buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_magnitudes(self, buckets: Dict[int, int], magnitudes: np.ndarray):
+        if len(magnitudes):
+            keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma), return_counts=True)
+            for key, n in zip(keys.astype(int).tolist(), counts.tolist()):
+                buckets[key] = buckets.get(key, 0) + n
+
+    def add_many(self, values: np.ndarray):
+        """Add a batch of values in one vectorized pass"""
+        self.count += len(values)
+        positive = values[values > 0]
+        negative = values[values < 0]
+        self.zero_count += len(values) - len(positive) - len(negative)
+        self._add_magnitudes(self.buckets, positive)
+        self._add_magnitudes(self.negative_buckets, -negative)
+
+    def merge(self, other: "QuantileSketch"):
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for mine, theirs in ((self.buckets, other.buckets),
+                             (self.negative_buckets, other.negative_buckets)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Largest refunds first, then zeros, then positive values
+        for key in sorted(self.negative_buckets, reverse=True):
+            seen += self.negative_buckets[key]
+            if rank < seen:
+                return -self._value(key)
+        seen += self.zero_count
+        if rank < seen or not self.buckets:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return self._value(key)
+        return self._value(max(self.buckets))
+
+class GatewayStats:
+    """Running totals for one gateway, in the reporting currency"""
+
+    def __init__(self):
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = QuantileSketch()
+
+    def add_many(self, converted: np.ndarray):
+        if not len(converted):
+            return
+        low, high = float(converted.min()), float(converted.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.sketch.add_many(converted)
+
+class PaymentAnalyticsAggregator:
+    """Groups transactions by (gateway, currency) and converts to one currency
+
+    Each batch is turned into columns once and reduced with NumPy, so cost
+    per transaction is a few array operations rather than Python-level dict
+    updates. Amounts in a currency without a known rate are kept in their
+    own currency and reported as unconverted instead of being mixed in.
+    """
+
+    def __init__(self, fx_rates: Optional[FXRateTable] = None):
+        self.fx_rates = fx_rates or FXRateTable()
+        self._gateways: List[str] = []
+        self._currencies: List[str] = []
+        self._codes: Dict[str, Dict[str, int]] = {"gateway": {}, "currency": {}}
+        # (gateway, currency) -> [count, native total, converted total, unconverted total]
+        self._groups: Dict[Tuple[str, str], List[float]] = {}
+        self._gateway_stats: Dict[str, GatewayStats] = {}
+        self.sarie_settlements = 0
+
+    def _encode(self, kind: str, names: Sequence[str], values: Iterable[Optional[str]]) -> np.ndarray:
+        """Integer codes for values, growing names as new ones appear; None -> -1"""
+        codes = self._codes[kind]
+        out = []
+        for value in values:
+            if value is None:
+                out.append(-1)
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(names)
+                names.append(value)
+            out.append(code)
+        return np.fromiter(out, dtype=np.int64, count=len(out))
+
+    def _rates(self, currency_codes: np.ndarray, settled_rates: np.ndarray,
+               sender_codes: np.ndarray) -> np.ndarray:
+        """Per-transaction rate into the reporting currency (NaN if unknown)"""
+        # The trailing NaN is what code -1 (no currency) looks up
+        table = np.array(
+            [self.fx_rates.rate(c) or np.nan for c in self._currencies] + [np.nan], dtype=np.float64
+        )
+        rates = table[currency_codes]
+
+        # Cross-border transfers carry the rate they settled at; prefer it
+        sender_rates = table[sender_codes]
+        settled = (settled_rates > 0) & ~np.isnan(sender_rates)
+        rates[settled] = sender_rates[settled] / settled_rates[settled]
+
+        reporting = self._codes["currency"].get(self.fx_rates.reporting_currency, -1)
+        learned = settled & (sender_codes == reporting)
+        if learned.any():
+            # The last transfer of the batch into each currency sets its rate
+            latest = dict(zip(currency_codes[learned].tolist(), settled_rates[learned].tolist()))
+            for code, fx_rate in latest.items():
+                self.fx_rates.observe(self.fx_rates.reporting_currency, self._currencies[code], fx_rate)
+        return rates
+
+    def add_transactions(self, transactions: Sequence[Any]):
+        """Fold one batch of PaymentTransaction records"""
+        if not transactions:
+            return
+        n = len(transactions)
+        gateway_codes = self._encode("gateway", self._gateways, (t.gateway for t in transactions))
+        currency_codes = self._encode("currency", self._currencies, (t.currency for t in transactions))
+        settled_rates = np.fromiter((_settled_rate(t) for t in transactions), dtype=np.float64, count=n)
+        sender_codes = self._encode("currency", self._currencies, (
+            _sender_currency(t) if rate > 0 else None for t, rate in zip(transactions, settled_rates)
+        ))
+        amounts = np.fromiter((t.amount for t in transactions), dtype=np.float64, count=n)
+        rates = self._rates(currency_codes, settled_rates, sender_codes)
+
+        known = ~np.isnan(rates)
+        converted = np.where(known, amounts * np.nan_to_num(rates), 0.0)
+
+        keys = gateway_codes * len(self._currencies) + currency_codes
+        groups, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        native_totals = np.bincount(inverse, weights=amounts)
+        converted_totals = np.bincount(inverse, weights=converted)
+        unconverted_totals = np.bincount(inverse, weights=np.where(known, 0.0, amounts))
+
+        width = len(self._currencies)
+        for j, key in enumerate(groups.tolist()):
+            group_key = (self._gateways[key // width], self._currencies[key % width])
+            totals = self._groups.setdefault(group_key, [0, 0.0, 0.0, 0.0])
+            totals[0] += int(counts[j])
+            totals[1] += float(native_totals[j])
+            totals[2] += float(converted_totals[j])
+            totals[3] += float(unconverted_totals[j])
+
+        for code in np.unique(gateway_codes).tolist():
+            stats = self._gateway_stats.setdefault(self._gateways[code], GatewayStats())
+            stats.add_many(converted[(gateway_codes == code) & known])
+
+    def add_settlements(self, settlements: Sequence[Dict[str, Any]]):
+        """Fold one page of SARIE settlements"""
+        self.sarie_settlements += len(settlements)
+
+    def result(self) -> Dict[str, Any]:
+        reporting = self.fx_rates.reporting_currency
+        by_gateway: Dict[str, Dict[str, Any]] = {}
+        overall = QuantileSketch()
+        total_transactions = 0
+        total_volume = 0.0
+        unconverted: Dict[str, float] = {}
+
+        for (gateway, currency), (count, native, converted, missing) in sorted(self._groups.items()):
+            summary = by_gateway.setdefault(gateway, {
+                "count": 0,
+                "total": 0.0,
+                "currency": reporting,
+                "by_currency": {}
+            })
+            summary["count"] += count
+            summary["total"] += converted
+            summary["by_currency"][currency] = {
+                "count": count,
+                "total": native,
+                f"total_{reporting.lower()}": converted
+            }
+            total_transactions += count
+            total_volume += converted
+            if missing:
+                unconverted[currency] = unconverted.get(currency, 0.0) + missing
+
+        for gateway, stats in self._gateway_stats.items():
+            overall.merge(stats.sketch)
+            by_gateway[gateway].update({
+                "min": stats.min,
+                "max": stats.max,
+                "percentiles": {f"p{int(q * 100)}": stats.sketch.quantile(q) for q in PERCENTILES}
+            })
+
+        return {
+            "reporting_currency": reporting,
+            "by_gateway": by_gateway,
+            "total_transactions": total_transactions,
+            "sarie_settlements": self.sarie_settlements,
+            "total_volume": total_volume,
+            "unconverted": unconverted,
+            "percentiles": {f"p{int(q * 100)}": overall.quantile(q) for q in PERCENTILES}
+        }
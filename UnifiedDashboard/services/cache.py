@@ -0,0 +1,78 @@
+"""
+Stale-While-Revalidate Cache
+In-memory async cache with per-key TTLs and coalesced loads
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+Loader = Callable[[], Awaitable[Any]]
+
+@dataclass
+class CacheEntry:
+    """Cached value and the monotonic time it was loaded"""
+    value: Any
+    fetched_at: float
+
+class StaleWhileRevalidateCache:
+    """Serves fresh values from memory, stale ones while refreshing in background
+
+    A key is fresh for `ttl` seconds after it was loaded. For a further
+    `stale_ttl` seconds (forever if None) the old value is returned
+    immediately and a single background refresh is started. Concurrent
+    misses for the same key share one in-flight load.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, loader: Loader, ttl: float,
+                  stale_ttl: Optional[float] = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < ttl:
+                return entry.value
+            if stale_ttl is None or age < ttl + stale_ttl:
+                self._refresh(key, loader)
+                return entry.value
+
+        # Shield so one cancelled caller does not cancel the shared load
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _refresh(self, key: str, loader: Loader) -> asyncio.Task:
+        """Start a load for key unless one is already in flight"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: str, loader: Loader) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = CacheEntry(value, time.monotonic())
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ Cache refresh failed: {task.exception()!r}")
+
+    def set(self, key: str, value: Any, age: float = 0.0):
+        """Store a value directly, optionally backdated by `age` seconds"""
+        self._entries[key] = CacheEntry(value, time.monotonic() - age)
+
+    def age(self, key: str) -> Optional[float]:
+        """Seconds since key was loaded, or None if it is not cached"""
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry.fetched_at
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
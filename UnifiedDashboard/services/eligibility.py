@@ -0,0 +1,238 @@
+"""
+NPHIES Eligibility Service
+Cached, coalesced and batched patient eligibility lookups through PayLinc
+OID: 1.3.6.1.4.1.61026
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from paylinc_client import PayLincAPIError
+
+# Result lifetimes (seconds). Positive results never outlive the coverage
+# period they report.
+ELIGIBILITY_TTL = 6 * 3600
+NEGATIVE_TTL = 300
+
+# Lookups queued within BATCH_WINDOW are sent upstream as one bulk call
+BATCH_WINDOW = 0.02
+MAX_BATCH_SIZE = 50
+
+# Bounds on lookups waiting to be sent and on cached results
+MAX_PENDING = 1000
+MAX_CACHE_ENTRIES = 100_000
+
+# Status codes meaning PayLinc has no bulk eligibility endpoint
+BULK_UNSUPPORTED_CODES = {404, 405, 501}
+
+# Where PayLinc reports the end of coverage, top level or under "coverage"
+COVERAGE_EXPIRY_FIELDS = ("coverage_end", "valid_until", "expiry_date")
+
+class EligibilityQueueFull(Exception):
+    """Raised when too many distinct lookups are already waiting upstream"""
+
+def coverage_expiry(result: Dict[str, Any]) -> Optional[datetime]:
+    """End of the coverage period reported in an eligibility result, if any"""
+    sources = [result]
+    if isinstance(result.get("coverage"), dict):
+        sources.append(result["coverage"])
+    for source in sources:
+        for field in COVERAGE_EXPIRY_FIELDS:
+            value = source.get(field)
+            if not isinstance(value, str):
+                continue
+            try:
+                expiry = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+            # A bare date covers the whole of that day
+            return expiry + timedelta(days=1) if len(value) == 10 else expiry
+    return None
+
+class EligibilityService:
+    """Front for check_nphies_eligibility shared by all callers
+
+    - Results are cached until the earlier of the TTL and the coverage end.
+    - Concurrent lookups for one ID share a single upstream request.
+    - Distinct IDs arriving together are sent as one bulk request; if
+      PayLinc has no bulk endpoint the service falls back to single GETs.
+    - National IDs are only kept in memory as keyed hashes; the raw ID is
+      held just while its lookup is pending.
+    """
+
+    def __init__(
+        self,
+        paylinc: Any,
+        ttl: float = ELIGIBILITY_TTL,
+        negative_ttl: float = NEGATIVE_TTL,
+        batch_window: float = BATCH_WINDOW,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_pending: int = MAX_PENDING,
+        max_entries: int = MAX_CACHE_ENTRIES
+    ):
+        self.paylinc = paylinc
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.max_entries = max_entries
+        self.bulk_supported = True
+
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0, "batches": 0}
+        self._salt = os.urandom(16)
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    def _key(self, national_id: str) -> str:
+        return hashlib.blake2b(national_id.encode("utf-8"), key=self._salt, digest_size=16).hexdigest()
+
+    def _result_ttl(self, result: Dict[str, Any]) -> float:
+        if not result.get("eligible"):
+            return self.negative_ttl
+        expiry = coverage_expiry(result)
+        if expiry is None:
+            return self.ttl
+        remaining = (expiry - datetime.now(expiry.tzinfo)).total_seconds()
+        return max(0.0, min(self.ttl, remaining))
+
+    def _store(self, key: str, result: Dict[str, Any]):
+        ttl = self._result_ttl(result)
+        if ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def check(self, national_id: str) -> Dict[str, Any]:
+        """Eligibility of one patient, from cache or PayLinc"""
+        key = self._key(national_id)
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return {**entry[1], "national_id": national_id}
+            del self._cache[key]
+
+        future = self._inflight.get(key)
+        if future is None:
+            self._start_worker()
+            if self._queue.full():
+                raise EligibilityQueueFull(f"{self.max_pending} eligibility lookups already pending")
+            future = asyncio.get_running_loop().create_future()
+            # Mark the exception retrieved even if every waiter went away
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+            self._queue.put_nowait((key, national_id, future))
+            self.stats["misses"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shield so one cancelled caller does not fail the others
+        result = await asyncio.shield(future)
+        return {**result, "national_id": national_id}
+
+    async def check_many(self, national_ids: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """Check several patients at once; failures are returned in place"""
+        return await asyncio.gather(*(self.check(i) for i in national_ids), return_exceptions=True)
+
+    def _start_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue(maxsize=self.max_pending)
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Collect pending lookups into batches and dispatch them"""
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                if self.batch_window:
+                    await asyncio.sleep(self.batch_window)
+            except asyncio.CancelledError:
+                self._abandon(batch)
+                raise
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            task = asyncio.create_task(self._resolve(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _resolve(self, batch: List[Tuple[str, str, asyncio.Future]]):
+        self.stats["batches"] += 1
+        try:
+            results = await self._fetch([national_id for _, national_id, _ in batch])
+        except Exception as e:
+            results = {national_id: e for _, national_id, _ in batch}
+
+        for key, national_id, future in batch:
+            self._inflight.pop(key, None)
+            if future.done():
+                continue
+            result = results.get(national_id)
+            if result is None:
+                result = PayLincAPIError(404, "/healthcare/eligibility/batch", "no result returned")
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                continue
+            result = {k: v for k, v in result.items() if k != "national_id"}
+            self._store(key, result)
+            future.set_result(result)
+
+    async def _fetch(self, national_ids: List[str]) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        if len(national_ids) > 1 and self.bulk_supported:
+            try:
+                self.stats["upstream_calls"] += 1
+                return await self.paylinc.check_nphies_eligibility_batch(national_ids)
+            except PayLincAPIError as e:
+                if e.status_code not in BULK_UNSUPPORTED_CODES:
+                    raise
+                self.bulk_supported = False
+                print("⚠️ PayLinc has no bulk eligibility endpoint; using single lookups")
+
+        self.stats["upstream_calls"] += len(national_ids)
+        results = await asyncio.gather(
+            *(self.paylinc.check_nphies_eligibility(i) for i in national_ids),
+            return_exceptions=True
+        )
+        return dict(zip(national_ids, results))
+
+    def cache_info(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._cache),
+            "pending": self._queue.qsize() if self._queue else 0,
+            "bulk_supported": self.bulk_supported
+        }
+
+    def invalidate(self, national_id: str):
+        self._cache.pop(self._key(national_id), None)
+
+    async def close(self):
+        """Stop batching and fail lookups that never reached PayLinc"""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        while self._queue and not self._queue.empty():
+            self._abandon([self._queue.get_nowait()])
+
+    def _abandon(self, batch: List[Tuple[str, str, asyncio.Future]]):
+        for key, _, future in batch:
+            self._inflight.pop(key, None)
+            future.cancel()
@@ -0,0 +1,244 @@
+"""
+PayLinc HTTP Client
+Pooled, rate-limited and retrying transport for the PayLinc REST API
+OID: 1.3.6.1.4.1.61026
+"""
+
+import asyncio
+import gc
+import importlib.util
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+# Connection pool
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 30.0
+
+# Timeouts (seconds). Endpoints not listed use DEFAULT_TIMEOUT.
+DEFAULT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 3.0
+ENDPOINT_TIMEOUTS = {
+    "/wallet/overview": 5.0,
+    "/bnpl/murabaha/overview": 5.0,
+    "/healthcare/eligibility/{national_id}": 8.0,
+    "/healthcare/eligibility/batch": 10.0,
+    "/healthcare/payments/recent": 15.0,
+    "/payments/cross-border": 15.0,
+    "/sarie/settlements/recent": 15.0,
+}
+
+# PayLinc quota per API key: sustained requests/second and burst size
+RATE_LIMIT_PER_SECOND = 10.0
+RATE_LIMIT_BURST = 20
+
+# Retries apply to idempotent requests only
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 5.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Bodies larger than this are parsed with the cyclic GC paused
+GC_PAUSE_THRESHOLD = 256 * 1024
+
+@contextmanager
+def gc_paused():
+    """Suspend the cyclic GC while building many acyclic objects
+
+    Decoding a large payload allocates millions of dicts and strings, which
+    would otherwise trigger repeated full collections that find nothing.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def decode_json(content: bytes) -> Any:
+    if len(content) < GC_PAUSE_THRESHOLD:
+        return json_loads(content)
+    with gc_paused():
+        return json_loads(content)
+
+class PayLincAPIError(Exception):
+    """Raised when PayLinc answers with a non-2xx status"""
+
+    def __init__(self, status_code: int, endpoint: str, body: str = ""):
+        super().__init__(f"PayLinc {endpoint} returned {status_code}: {body[:200]}")
+        self.status_code = status_code
+        self.endpoint = endpoint
+        self.body = body
+
+class TokenBucket:
+    """Async token bucket; acquire() waits until a request may be sent"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class EndpointMetrics:
+    """Request counters and a rolling latency window for one endpoint"""
+
+    WINDOW = 1024
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.status_codes: Dict[int, int] = {}
+        self.latencies = deque(maxlen=self.WINDOW)
+
+    def record(self, latency_ms: float, status_code: Optional[int]):
+        self.requests += 1
+        self.latencies.append(latency_ms)
+        if status_code is None or status_code >= 400:
+            self.errors += 1
+        if status_code is not None:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "status_codes": dict(self.status_codes),
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(ordered[-1], 2) if ordered else None
+            }
+        }
+
+class PayLincClient:
+    """HTTP client layer for the PayLinc API"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http2: bool = False,
+        rate_limit: float = RATE_LIMIT_PER_SECOND,
+        burst: int = RATE_LIMIT_BURST,
+        max_retries: int = MAX_RETRIES,
+        endpoint_timeouts: Optional[Dict[str, float]] = None
+    ):
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("⚠️ HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+
+        self.max_retries = max_retries
+        self.endpoint_timeouts = {**ENDPOINT_TIMEOUTS, **(endpoint_timeouts or {})}
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+        self._metrics: Dict[str, EndpointMetrics] = {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            http2=http2,
+            transport=transport,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+
+    def _timeout(self, endpoint: str) -> httpx.Timeout:
+        return httpx.Timeout(
+            self.endpoint_timeouts.get(endpoint, DEFAULT_TIMEOUT),
+            connect=CONNECT_TIMEOUT
+        )
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Full-jitter exponential backoff, honoring Retry-After when given"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX)
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        endpoint: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """Send a request and return the decoded JSON body
+
+        endpoint is the path template used for timeouts and metrics
+        (e.g. "/healthcare/eligibility/{national_id}"); defaults to path.
+        """
+        endpoint = endpoint or path
+        metrics = self._metrics.setdefault(endpoint, EndpointMetrics())
+        retries = self.max_retries if method.upper() in IDEMPOTENT_METHODS else 0
+
+        for attempt in range(retries + 1):
+            await self.rate_limiter.acquire()
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await self._client.request(
+                    method, path, timeout=self._timeout(endpoint), **kwargs
+                )
+            except httpx.TransportError:
+                metrics.record((time.perf_counter() - started) * 1000, None)
+                if attempt == retries:
+                    raise
+            else:
+                metrics.record((time.perf_counter() - started) * 1000, response.status_code)
+                if response.is_success:
+                    return decode_json(response.content)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                    raise PayLincAPIError(response.status_code, endpoint, response.text)
+
+            metrics.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    async def get(self, path: str, endpoint: Optional[str] = None, **kwargs) -> Any:
+        return await self.request("GET", path, endpoint=endpoint, **kwargs)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-endpoint request, error and latency metrics"""
+        return {endpoint: m.snapshot() for endpoint, m in self._metrics.items()}
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -5,28 +5,108 @@ OID: 1.3.6.1.4.1.61026
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, Union
 from datetime import datetime
 import httpx
 from dataclasses import dataclass
 import json
+import sys
+import time
+from pathlib import Path
+
+from agent_registry import AGENT_REGISTRY
+from analytics import FXRateTable, PaymentAnalyticsAggregator
+from cache import StaleWhileRevalidateCache
+from eligibility import EligibilityService
+from paylinc_client import PayLincClient, gc_paused
+from snapshot_store import SnapshotStore
 
 # PayLinc API Configuration
 PAYLINC_BASE_URL = "https://api.paylinc.sa/v1"
 PAYLINC_WEBSOCKET_URL = "wss://ws.paylinc.sa"
 
-@dataclass
+# Freshness (seconds) of each upstream source behind the dashboard overview.
+# Older values are still served while a background refresh runs.
+OVERVIEW_CACHE_TTLS = {
+    "wallet": 30.0,
+    "healthcare": 15.0,
+    "bnpl": 60.0,
+    "settlements": 30.0,
+    "agents": 5.0
+}
+
+# Records requested per page when walking paginated PayLinc listings
+PAYLINC_PAGE_SIZE = 500
+
+# Local cache of FX rates into the reporting currency
+FX_RATES_PATH = Path(__file__).parent / "fx_rates.json"
+
+# Last known good PayLinc results, used to start warm and ride out outages
+SNAPSHOT_DB_PATH = Path(__file__).parent / "paylinc_snapshots.db"
+
 class PaymentTransaction:
-    """Payment transaction model"""
-    id: str
-    gateway: str  # paylinc, stripe, paypal, sarie, mada, nphies
-    amount: float
-    currency: str
-    status: str
-    timestamp: datetime
-    metadata: Dict[str, Any]
+    """Payment transaction model
+    
+    Slotted to keep per-record memory small. The timestamp may be given as
+    an ISO-8601 string and is only parsed into a datetime on first access.
+    """
+    
+    __slots__ = ("id", "gateway", "amount", "currency", "status", "_timestamp", "metadata")
+    
+    def __init__(
+        self,
+        id: str,
+        gateway: str,  # paylinc, stripe, paypal, sarie, mada, nphies
+        amount: float,
+        currency: str,
+        status: str,
+        timestamp: Union[datetime, str],
+        metadata: Dict[str, Any]
+    ):
+        self.id = id
+        self.gateway = gateway
+        self.amount = amount
+        self.currency = currency
+        self.status = status
+        self._timestamp = timestamp
+        self.metadata = metadata
+    
+    @property
+    def timestamp(self) -> datetime:
+        if isinstance(self._timestamp, str):
+            self._timestamp = datetime.fromisoformat(self._timestamp)
+        return self._timestamp
+    
+    @timestamp.setter
+    def timestamp(self, value: Union[datetime, str]):
+        self._timestamp = value
+    
+    @property
+    def timestamp_iso(self) -> str:
+        """ISO-8601 timestamp, without parsing it if it was never accessed"""
+        if isinstance(self._timestamp, str):
+            return self._timestamp
+        return self._timestamp.isoformat()
+    
+    def __eq__(self, other):
+        if not isinstance(other, PaymentTransaction):
+            return NotImplemented
+        return (
+            self.id, self.gateway, self.amount, self.currency,
+            self.status, self.timestamp, self.metadata
+        ) == (
+            other.id, other.gateway, other.amount, other.currency,
+            other.status, other.timestamp, other.metadata
+        )
+    
+    def __repr__(self):
+        return (
+            f"PaymentTransaction(id={self.id!r}, gateway={self.gateway!r}, "
+            f"amount={self.amount!r}, currency={self.currency!r}, status={self.status!r}, "
+            f"timestamp={self.timestamp_iso!r})"
+        )
 
-@dataclass
+@dataclass(slots=True)
 class AgentStatus:
     """LINC Agent status model"""
     agent_id: str
@@ -35,118 +115,242 @@ class AgentStatus:
     status: str  # active, inactive, error
     health: str  # healthy, degraded, unhealthy
     metrics: Dict[str, Any]
+    latency_ms: Optional[float] = None
+    checked_at: Optional[datetime] = None
+
+def decode_healthcare_payment(p: Dict[str, Any]) -> PaymentTransaction:
+    """Build a PaymentTransaction from a PayLinc healthcare payment record"""
+    return PaymentTransaction(
+        p["payment_id"], "nphies", p["amount"], sys.intern(p["currency"]),
+        sys.intern(p["status"]), p["created_at"], p.get("metadata") or {}
+    )
+
+def decode_cross_border_payment(p: Dict[str, Any]) -> PaymentTransaction:
+    """Build a PaymentTransaction from a PayLinc cross-border record"""
+    return PaymentTransaction(
+        p["cross_border_id"], "paylinc", p["recipient_amount"], sys.intern(p["recipient_currency"]),
+        sys.intern(p.get("status", "completed")), p["created_at"],
+        {
+            "sender_country": p["sender_country"],
+            "recipient_country": p["recipient_country"],
+            "fx_rate": p["fx_rate"]
+        }
+    )
+
+def encode_transactions(transactions: List[PaymentTransaction]) -> List[List[Any]]:
+    """Compact JSON form of PaymentTransaction records (see decode_transactions)"""
+    return [
+        [t.id, t.gateway, t.amount, t.currency, t.status, t.timestamp_iso, t.metadata]
+        for t in transactions
+    ]
+
+def decode_transactions(rows: List[List[Any]]) -> List[PaymentTransaction]:
+    return [PaymentTransaction(*row) for row in rows]
+
+def decode_records(decoder: Callable[[Dict[str, Any]], PaymentTransaction],
+                   records: List[Dict[str, Any]]) -> List[PaymentTransaction]:
+    """Decode a page of records with the cyclic GC paused (records are acyclic)"""
+    with gc_paused():
+        return list(map(decoder, records))
+
+def _window_filters(start: Optional[str], end: Optional[str]) -> Dict[str, str]:
+    filters = {}
+    if start:
+        filters["from"] = start
+    if end:
+        filters["to"] = end
+    return filters
 
 class PayLincIntegration:
     """Integration with PayLinc payment platform"""
     
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http2: bool = False,
+        base_url: str = PAYLINC_BASE_URL
+    ):
         self.api_key = api_key
-        self.client = httpx.AsyncClient(
-            base_url=PAYLINC_BASE_URL,
-            headers={"Authorization": f"Bearer {api_key}"}
+        self.client = PayLincClient(
+            api_key,
+            base_url=base_url,
+            transport=transport,
+            http2=http2
         )
     
     async def get_wallet_overview(self) -> Dict[str, Any]:
         """Get PayLinc wallet overview"""
-        response = await self.client.get("/wallet/overview")
-        return response.json()
+        return await self.client.get("/wallet/overview")
+    
+    async def _iter_pages(self, path: str, key: str,
+                          filters: Optional[Dict[str, str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield each page of a cursor-paginated listing until next_cursor runs out"""
+        cursor = None
+        while True:
+            params = {**(filters or {}), "limit": PAYLINC_PAGE_SIZE}
+            if cursor:
+                params["cursor"] = cursor
+            data = await self.client.get(path, params=params)
+            yield data.get(key, [])
+            
+            cursor = data.get("next_cursor")
+            if not cursor:
+                return
     
     async def get_healthcare_payments(self) -> List[PaymentTransaction]:
         """Get healthcare payment transactions"""
-        response = await self.client.get("/healthcare/payments/recent")
-        data = response.json()
+        data = await self.client.get("/healthcare/payments/recent")
+        return decode_records(decode_healthcare_payment, data.get("payments", []))
+    
+    async def iter_healthcare_payments(self, start: Optional[str] = None,
+                                       end: Optional[str] = None) -> AsyncIterator[List[PaymentTransaction]]:
+        """Iterate over every page of healthcare payment transactions
         
-        return [
-            PaymentTransaction(
-                id=p["payment_id"],
-                gateway="nphies",
-                amount=p["amount"],
-                currency=p["currency"],
-                status=p["status"],
-                timestamp=datetime.fromisoformat(p["created_at"]),
-                metadata=p.get("metadata", {})
-            )
-            for p in data.get("payments", [])
-        ]
+        start/end (ISO-8601, end exclusive) restrict the listing to a time window.
+        """
+        filters = _window_filters(start, end)
+        async for page in self._iter_pages("/healthcare/payments/recent", "payments", filters):
+            yield decode_records(decode_healthcare_payment, page)
     
     async def get_murabaha_bnpl_status(self) -> Dict[str, Any]:
         """Get Murabaha BNPL (Buy Now Pay Later) status"""
-        response = await self.client.get("/bnpl/murabaha/overview")
-        return response.json()
+        return await self.client.get("/bnpl/murabaha/overview")
     
     async def get_sarie_settlements(self) -> List[Dict[str, Any]]:
         """Get SARIE instant payment settlements"""
-        response = await self.client.get("/sarie/settlements/recent")
-        return response.json().get("settlements", [])
+        data = await self.client.get("/sarie/settlements/recent")
+        return data.get("settlements", [])
+    
+    async def iter_sarie_settlements(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Iterate over every page of SARIE settlements"""
+        async for page in self._iter_pages("/sarie/settlements/recent", "settlements"):
+            yield page
     
     async def check_nphies_eligibility(self, national_id: str) -> Dict[str, Any]:
         """Check NPHIES patient eligibility"""
-        response = await self.client.get(
-            f"/healthcare/eligibility/{national_id}"
+        return await self.client.get(
+            f"/healthcare/eligibility/{national_id}",
+            endpoint="/healthcare/eligibility/{national_id}"
+        )
+    
+    async def check_nphies_eligibility_batch(self, national_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Check NPHIES eligibility for several patients in one call, keyed by national ID"""
+        data = await self.client.request(
+            "POST", "/healthcare/eligibility/batch", json={"national_ids": national_ids}
         )
-        return response.json()
+        return {result["national_id"]: result for result in data.get("results", [])}
     
     async def get_cross_border_transactions(self) -> List[PaymentTransaction]:
         """Get cross-border payment transactions"""
-        response = await self.client.get("/payments/cross-border")
-        data = response.json()
-        
-        return [
-            PaymentTransaction(
-                id=p["cross_border_id"],
-                gateway="paylinc",
-                amount=p["recipient_amount"],
-                currency=p["recipient_currency"],
-                status=p.get("status", "completed"),
-                timestamp=datetime.fromisoformat(p["created_at"]),
-                metadata={
-                    "sender_country": p["sender_country"],
-                    "recipient_country": p["recipient_country"],
-                    "fx_rate": p["fx_rate"]
-                }
-            )
-            for p in data.get("payments", [])
-        ]
+        data = await self.client.get("/payments/cross-border")
+        return decode_records(decode_cross_border_payment, data.get("payments", []))
+    
+    async def iter_cross_border_transactions(self, start: Optional[str] = None,
+                                             end: Optional[str] = None) -> AsyncIterator[List[PaymentTransaction]]:
+        """Iterate over every page of cross-border payment transactions (optionally in a window)"""
+        filters = _window_filters(start, end)
+        async for page in self._iter_pages("/payments/cross-border", "payments", filters):
+            yield decode_records(decode_cross_border_payment, page)
     
     async def get_shariah_compliance_status(self) -> Dict[str, Any]:
         """Get Shariah compliance certification status"""
-        response = await self.client.get("/compliance/shariah/status")
-        return response.json()
+        return await self.client.get("/compliance/shariah/status")
+    
+    def get_client_metrics(self) -> Dict[str, Any]:
+        """Per-endpoint latency and error metrics of the PayLinc client"""
+        return self.client.metrics()
     
     async def close(self):
         """Close the HTTP client"""
         await self.client.aclose()
 
+class CircuitBreaker:
+    """Backs off probes to an agent after repeated connection failures"""
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 5.0,
+                 max_reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"  # closed, open, half_open
+        self.retry_at = 0.0
+    
+    def allow(self, now: float) -> bool:
+        """Whether a probe may be sent; an expired open breaker goes half-open"""
+        if self.state == "open":
+            if now < self.retry_at:
+                return False
+            self.state = "half_open"
+        return True
+    
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+        self.reset_timeout = self.base_reset_timeout
+    
+    def record_failure(self, now: float):
+        self.failures += 1
+        if self.state == "half_open":
+            # Failed trial probe: stay open for twice as long
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+        elif self.failures < self.failure_threshold:
+            return
+        self.state = "open"
+        self.retry_at = now + self.reset_timeout
+
 class LINCAgentMonitor:
     """Monitor all 16 LINC agents"""
     
-    AGENT_REGISTRY = {
-        # Healthcare Agents
-        "masterlinc": {"port": 8000, "category": "security"},
-        "authlinc": {"port": 8001, "category": "security"},
-        "doctorlinc": {"port": 8010, "category": "healthcare"},
-        "nurslinc": {"port": 8011, "category": "healthcare"},
-        "patientlinc": {"port": 8012, "category": "healthcare"},
-        "careteamlinc": {"port": 8013, "category": "healthcare"},
-        
-        # Business Agents
-        "bizlinc": {"port": 8020, "category": "business"},
-        "paylinc": {"port": 8021, "category": "business"},
-        "insightlinc": {"port": 8022, "category": "business"},
-        
-        # Automation Agents
-        "devlinc": {"port": 8030, "category": "automation"},
-        "autolinc": {"port": 8031, "category": "automation"},
-        "codelinc": {"port": 8032, "category": "automation"},
+    AGENT_REGISTRY = AGENT_REGISTRY
+    
+    def __init__(
+        self,
+        host: str = "localhost",
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 2.0,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        sink: Optional[Callable[[List[AgentStatus]], Awaitable[None]]] = None
+    ):
+        self.host = host
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.sink = sink
         
-        # Content Agents
-        "medialinc": {"port": 8040, "category": "content"},
-        "edulinc": {"port": 8041, "category": "content"},
-        "chatlinc": {"port": 8042, "category": "content"},
+        # One pooled client for every probe; keep-alive avoids a new
+        # TCP handshake per agent per tick
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 1.0)),
+            limits=httpx.Limits(
+                max_connections=len(self.AGENT_REGISTRY) * 2,
+                max_keepalive_connections=len(self.AGENT_REGISTRY)
+            )
+        )
         
-        # Identity Agent
-        "oidlinc": {"port": 8050, "category": "security"}
-    }
+        self._cache: Dict[str, AgentStatus] = {}
+        self._breakers = {agent_id: CircuitBreaker() for agent_id in self.AGENT_REGISTRY}
+        self._intervals = {agent_id: min_interval for agent_id in self.AGENT_REGISTRY}
+        self._next_due = {agent_id: 0.0 for agent_id in self.AGENT_REGISTRY}
+        self._task: Optional[asyncio.Task] = None
+    
+    def _status(self, agent_id: str, status: str, health: str,
+                metrics: Dict[str, Any], latency_ms: Optional[float]) -> AgentStatus:
+        config = self.AGENT_REGISTRY[agent_id]
+        return AgentStatus(
+            agent_id=agent_id,
+            name=config["name"],
+            category=config["category"],
+            status=status,
+            health=health,
+            metrics=metrics,
+            latency_ms=latency_ms,
+            checked_at=datetime.now()
+        )
     
     async def check_agent_health(self, agent_id: str) -> AgentStatus:
         """Check health of specific agent"""
@@ -154,57 +358,176 @@ class LINCAgentMonitor:
         if not config:
             raise ValueError(f"Unknown agent: {agent_id}")
         
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"http://localhost:{config['port']}/health",
-                    timeout=5.0
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return AgentStatus(
-                        agent_id=agent_id,
-                        name=agent_id.upper(),
-                        category=config["category"],
-                        status="active",
-                        health="healthy",
-                        metrics=data.get("metrics", {})
-                    )
-        except Exception as e:
-            return AgentStatus(
-                agent_id=agent_id,
-                name=agent_id.upper(),
-                category=config["category"],
-                status="inactive",
-                health="unhealthy",
-                metrics={"error": str(e)}
+            response = await self._client.get(
+                f"http://{self.host}:{config['port']}/health"
             )
+        except httpx.HTTPError as e:
+            latency_ms = (time.perf_counter() - started) * 1000
+            return self._status(agent_id, "inactive", "unhealthy",
+                                {"error": str(e) or type(e).__name__}, latency_ms)
+        
+        latency_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            # Reachable but failing its own health check
+            return self._status(agent_id, "error", "degraded",
+                                {"status_code": response.status_code}, latency_ms)
+        
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        metrics = data.get("metrics", {}) if isinstance(data, dict) else {}
+        return self._status(agent_id, "active", "healthy", metrics, latency_ms)
+    
+    async def _probe(self, agent_id: str) -> AgentStatus:
+        """Probe one agent and update its breaker, interval and cache entry"""
+        status = await self.check_agent_health(agent_id)
+        now = time.monotonic()
+        breaker = self._breakers[agent_id]
+        previous = self._cache.get(agent_id)
+        
+        if status.status == "inactive":
+            breaker.record_failure(now)
+            self._intervals[agent_id] = self.min_interval
+            self._next_due[agent_id] = max(now + self.min_interval, breaker.retry_at)
+        else:
+            breaker.record_success()
+            if status.health == "healthy" and previous is not None and previous.health == "healthy":
+                # Stable agents are probed progressively less often
+                self._intervals[agent_id] = min(self._intervals[agent_id] * 1.5, self.max_interval)
+            else:
+                self._intervals[agent_id] = self.min_interval
+            self._next_due[agent_id] = now + self._intervals[agent_id]
+        
+        status.metrics = {**status.metrics, "circuit": breaker.state}
+        self._cache[agent_id] = status
+        return status
     
     async def check_all_agents(self) -> List[AgentStatus]:
-        """Check health of all agents"""
-        tasks = [
-            self.check_agent_health(agent_id)
-            for agent_id in self.AGENT_REGISTRY.keys()
+        """Check health of all agents, serving fresh cached results first"""
+        now = time.monotonic()
+        stale = [
+            agent_id for agent_id in self.AGENT_REGISTRY
+            if agent_id not in self._cache or (
+                self._next_due[agent_id] <= now and self._breakers[agent_id].allow(now)
+            )
         ]
-        return await asyncio.gather(*tasks)
+        if stale:
+            await asyncio.gather(*(self._probe(agent_id) for agent_id in stale))
+        return [self._cache[agent_id] for agent_id in self.AGENT_REGISTRY]
+    
+    def cached_statuses(self) -> List[AgentStatus]:
+        """Last known status of every probed agent, without touching the network"""
+        return [self._cache[agent_id] for agent_id in self.AGENT_REGISTRY if agent_id in self._cache]
+    
+    async def _run(self):
+        """Scheduler loop: probe whichever agents are due, then sleep until the next one"""
+        while True:
+            now = time.monotonic()
+            due = [
+                agent_id for agent_id in self.AGENT_REGISTRY
+                if self._next_due[agent_id] <= now and self._breakers[agent_id].allow(now)
+            ]
+            if due:
+                results = await asyncio.gather(*(self._probe(agent_id) for agent_id in due))
+                if self.sink:
+                    try:
+                        await self.sink(list(results))
+                    except Exception as e:
+                        print(f"❌ Failed to persist agent health: {e}")
+            
+            wake = min(
+                max(self._next_due[agent_id], self._breakers[agent_id].retry_at)
+                for agent_id in self.AGENT_REGISTRY
+            )
+            await asyncio.sleep(min(max(wake - time.monotonic(), 0.1), self.max_interval))
+    
+    def start(self):
+        """Start background health checks on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop background health checks and release the HTTP client"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._owns_client:
+            await self._client.aclose()
 
 class UnifiedDashboardService:
     """Main service orchestrating all integrations"""
     
-    def __init__(self, paylinc_api_key: str):
+    # Sources persisted to the snapshot store, with their JSON codecs
+    SNAPSHOT_CODECS = {
+        "wallet": (None, None),
+        "bnpl": (None, None),
+        "healthcare": (encode_transactions, decode_transactions),
+        "settlements": (None, None)
+    }
+    
+    def __init__(self, paylinc_api_key: str, snapshot_path: Union[str, Path] = SNAPSHOT_DB_PATH):
         self.paylinc = PayLincIntegration(paylinc_api_key)
+        self.eligibility = EligibilityService(self.paylinc)
         self.agent_monitor = LINCAgentMonitor()
+        self.cache = StaleWhileRevalidateCache()
+        self.fx_rates = FXRateTable.load(FX_RATES_PATH)
+        self.snapshots = SnapshotStore(snapshot_path)
+        self._warm_cache()
+    
+    def _warm_cache(self):
+        """Seed the cache from stored snapshots, backdated to their real age
+        
+        Snapshots past their TTL are served immediately as stale values
+        while the first request triggers a background refresh.
+        """
+        for source, (payload, age) in self.snapshots.load_all().items():
+            if source not in self.SNAPSHOT_CODECS:
+                continue
+            decode = self.SNAPSHOT_CODECS[source][1]
+            try:
+                self.cache.set(source, decode(payload) if decode else payload, age=age)
+            except (TypeError, ValueError) as e:
+                print(f"⚠️ Ignoring incompatible {source} snapshot: {e}")
+    
+    def _persisted(self, source: str, loader: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Wrap a loader so every successful result is also written to disk"""
+        encode = self.SNAPSHOT_CODECS[source][0]
+        
+        async def load():
+            value = await loader()
+            try:
+                await asyncio.to_thread(
+                    self.snapshots.save, source, encode(value) if encode else value
+                )
+            except Exception as e:
+                print(f"⚠️ Could not persist {source} snapshot: {e!r}")
+            return value
+        
+        return load
+    
+    def _cached_source(self, source: str, loader: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+        return self.cache.get(source, self._persisted(source, loader), OVERVIEW_CACHE_TTLS[source])
     
     async def get_complete_overview(self) -> Dict[str, Any]:
         """Get complete dashboard overview"""
         
-        # Gather all data concurrently
-        wallet_data, healthcare_data, bnpl_data, agents_data = await asyncio.gather(
-            self.paylinc.get_wallet_overview(),
-            self.paylinc.get_healthcare_payments(),
-            self.paylinc.get_murabaha_bnpl_status(),
-            self.agent_monitor.check_all_agents(),
+        # Gather all data concurrently; each source is served from cache
+        # (seeded from disk at startup) and only hits upstream when missing
+        # or past its TTL
+        wallet_data, healthcare_data, bnpl_data, settlements_data, agents_data = await asyncio.gather(
+            self._cached_source("wallet", self.paylinc.get_wallet_overview),
+            self._cached_source("healthcare", self.paylinc.get_healthcare_payments),
+            self._cached_source("bnpl", self.paylinc.get_murabaha_bnpl_status),
+            self._cached_source("settlements", self.paylinc.get_sarie_settlements),
+            self.cache.get("agents", self.agent_monitor.check_all_agents,
+                           OVERVIEW_CACHE_TTLS["agents"]),
             return_exceptions=True
         )
         
@@ -213,6 +536,9 @@ class UnifiedDashboardService:
         if isinstance(wallet_data, dict):
             total_revenue += wallet_data.get("sar_balance", 0)
         
+        if not isinstance(agents_data, list):
+            agents_data = []
+        
         # Count active agents
         active_agents = sum(
             1 for agent in agents_data 
@@ -230,7 +556,13 @@ class UnifiedDashboardService:
             "paylinc": {
                 "wallet": wallet_data if not isinstance(wallet_data, Exception) else {},
                 "healthcare": healthcare_data if not isinstance(healthcare_data, Exception) else [],
-                "bnpl": bnpl_data if not isinstance(bnpl_data, Exception) else {}
+                "bnpl": bnpl_data if not isinstance(bnpl_data, Exception) else {},
+                "settlements": settlements_data if not isinstance(settlements_data, Exception) else []
+            },
+            "data_age_seconds": {
+                source: round(age, 1)
+                for source in self.SNAPSHOT_CODECS
+                if (age := self.cache.age(source)) is not None
             },
             "agents": {
                 "status": [
@@ -249,37 +581,28 @@ class UnifiedDashboardService:
     
     async def get_payment_analytics(self) -> Dict[str, Any]:
         """Get payment analytics across all channels"""
+        aggregator = PaymentAnalyticsAggregator(self.fx_rates)
         
-        # Get data from all payment channels
-        healthcare_payments = await self.paylinc.get_healthcare_payments()
-        cross_border = await self.paylinc.get_cross_border_transactions()
-        sarie_settlements = await self.paylinc.get_sarie_settlements()
-        
-        # Aggregate by gateway
-        by_gateway = {}
-        all_transactions = healthcare_payments + cross_border
+        async def consume(pages, fold):
+            async for page in pages:
+                fold(page)
         
-        for txn in all_transactions:
-            if txn.gateway not in by_gateway:
-                by_gateway[txn.gateway] = {
-                    "count": 0,
-                    "total": 0,
-                    "currency": txn.currency
-                }
-            
-            by_gateway[txn.gateway]["count"] += 1
-            by_gateway[txn.gateway]["total"] += txn.amount
+        # Walk all channels concurrently, folding each page as it arrives
+        await asyncio.gather(
+            consume(self.paylinc.iter_healthcare_payments(), aggregator.add_transactions),
+            consume(self.paylinc.iter_cross_border_transactions(), aggregator.add_transactions),
+            consume(self.paylinc.iter_sarie_settlements(), aggregator.add_settlements)
+        )
         
-        return {
-            "by_gateway": by_gateway,
-            "total_transactions": len(all_transactions),
-            "sarie_settlements": len(sarie_settlements),
-            "total_volume": sum(txn.amount for txn in all_transactions)
-        }
+        # Keep rates learned from settled cross-border transfers
+        self.fx_rates.save()
+        return aggregator.result()
     
     async def close(self):
         """Close all connections"""
+        await self.eligibility.close()
         await self.paylinc.close()
+        await self.agent_monitor.stop()
 
 # Example usage
 async def main():
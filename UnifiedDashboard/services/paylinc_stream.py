@@ -0,0 +1,196 @@
+"""
+PayLinc Real-Time Stream
+Persistent WebSocket subscription to PayLinc payment events
+OID: 1.3.6.1.4.1.61026
+
+Protocol:
+    -> {"action": "subscribe", "channels": [...], "resume_token": "<last token or null>"}
+    <- {"type": "payment", "channel": "healthcare|cross_border|<gateway>",
+        "resume_token": "...", "data": {...}}
+    <- {"type": "heartbeat"}
+
+The server replays every event after resume_token, so a consumer that
+persists the token with each batch resumes without gaps after a reconnect.
+"""
+
+import asyncio
+import json
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    from websockets.asyncio.client import connect as ws_connect  # websockets >= 13
+    HEADERS_ARG = "additional_headers"
+except ImportError:
+    from websockets.client import connect as ws_connect
+    HEADERS_ARG = "extra_headers"
+
+from paylinc_client import json_loads
+from paylinc_integration import (
+    PAYLINC_WEBSOCKET_URL,
+    PaymentTransaction,
+    decode_cross_border_payment,
+    decode_healthcare_payment,
+)
+
+STREAM_CHANNELS = ["healthcare", "cross_border", "sarie", "wallet"]
+
+# Batching of decoded events towards the sink
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 0.5
+
+# Reconnect backoff (seconds)
+RECONNECT_BASE = 0.5
+RECONNECT_MAX = 30.0
+
+BatchSink = Callable[[List[PaymentTransaction], Optional[str]], Awaitable[None]]
+
+def decode_payment_event(event: Dict[str, Any]) -> PaymentTransaction:
+    """Turn a stream 'payment' event into a PaymentTransaction"""
+    channel = event.get("channel")
+    data = event["data"]
+    if channel == "healthcare":
+        return decode_healthcare_payment(data)
+    if channel == "cross_border":
+        return decode_cross_border_payment(data)
+    return PaymentTransaction(
+        data["id"], data.get("gateway", channel or "paylinc"), data["amount"],
+        data["currency"], data.get("status", "completed"), data["created_at"],
+        data.get("metadata") or {}
+    )
+
+class PayLincStreamConsumer:
+    """Keeps one WebSocket subscription alive and hands events to a sink in batches
+
+    The sink receives each batch together with the resume token of its last
+    event. Tokens only advance after the sink succeeds, so a crash replays
+    at most one batch (delivery is at-least-once; sinks should upsert).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        sink: BatchSink,
+        url: str = PAYLINC_WEBSOCKET_URL,
+        resume_token: Optional[str] = None,
+        channels: Optional[List[str]] = None,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL
+    ):
+        self.api_key = api_key
+        self.sink = sink
+        self.url = url
+        self.resume_token = resume_token
+        self.channels = channels or STREAM_CHANNELS
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.connected = False
+        self.stats = {"events": 0, "batches": 0, "decode_errors": 0, "reconnects": 0}
+        self._buffer: List[PaymentTransaction] = []
+        self._buffer_token: Optional[str] = None
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _flush(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, token = self._buffer, self._buffer_token
+            self._buffer = []
+            try:
+                await self.sink(batch, token)
+            except Exception:
+                # Keep the batch for the next attempt; the token stays put
+                self._buffer = batch + self._buffer
+                raise
+            self.resume_token = token
+            self.stats["batches"] += 1
+
+    async def _periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self._flush()
+            except Exception as e:
+                print(f"❌ PayLinc stream flush failed: {e!r}")
+
+    async def _consume(self, websocket):
+        await websocket.send(json.dumps({
+            "action": "subscribe",
+            "channels": self.channels,
+            "resume_token": self.resume_token
+        }))
+
+        async for message in websocket:
+            # A malformed frame is skipped like an undecodable event; letting
+            # it raise would reconnect from the same token and replay it forever
+            try:
+                event = json_loads(message)
+                if not isinstance(event, dict):
+                    raise TypeError(f"expected a JSON object, got {type(event).__name__}")
+                if event.get("type") != "payment":
+                    continue
+                transaction = decode_payment_event(event)
+            except (KeyError, TypeError, ValueError) as e:
+                self.stats["decode_errors"] += 1
+                print(f"⚠️ Skipping undecodable PayLinc event: {e!r}")
+                continue
+
+            self.stats["events"] += 1
+            self._buffer.append(transaction)
+            self._buffer_token = event.get("resume_token", self._buffer_token)
+            if len(self._buffer) >= self.batch_size:
+                await self._flush()
+
+    async def run(self):
+        """Connect, consume and reconnect with jittered backoff until cancelled"""
+        attempt = 0
+        flusher = asyncio.create_task(self._periodic_flush())
+        try:
+            while True:
+                try:
+                    async with ws_connect(
+                        self.url,
+                        **{HEADERS_ARG: {"Authorization": f"Bearer {self.api_key}"}}
+                    ) as websocket:
+                        self.connected = True
+                        attempt = 0
+                        await self._consume(websocket)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ PayLinc stream disconnected: {e!r}")
+                finally:
+                    self.connected = False
+
+                # Hand over what we have; anything the sink rejects is
+                # dropped here and replayed from the last committed token
+                try:
+                    await self._flush()
+                except Exception as e:
+                    print(f"❌ PayLinc stream flush failed: {e!r}")
+                    self._buffer = []
+
+                self.stats["reconnects"] += 1
+                delay = min(RECONNECT_MAX, RECONNECT_BASE * (2 ** attempt))
+                attempt += 1
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+        finally:
+            flusher.cancel()
+
+    def start(self):
+        """Run the consumer in the background on the current event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop consuming and flush anything still buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush()
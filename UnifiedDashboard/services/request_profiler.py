@@ -0,0 +1,29 @@
+"""
+Request Profiler
+On-demand stack-sampling profiles of individual HTTP requests. The
+implementation lives in the RHDTE backend (utils/request_profiler.py),
+which is deployed on its own; it is loaded from there by file path so
+the two APIs share one copy. Only import this module when the profiler
+is enabled; it needs the RHDTE backend checked out next to the dashboard.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+_SOURCE = (Path(__file__).resolve().parent.parent.parent
+           / "brainsait-map" / "rhdte-backend" / "utils" / "request_profiler.py")
+
+if not _SOURCE.exists():
+    raise ImportError(f"Request profiler not found at {_SOURCE}; the RHDTE backend must be "
+                      "checked out next to the dashboard to enable the profiler")
+
+_spec = importlib.util.spec_from_file_location("rhdte_request_profiler", _SOURCE)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = _module
+_spec.loader.exec_module(_module)
+
+ProfilerMiddleware = _module.ProfilerMiddleware
+RequestProfiler = _module.RequestProfiler
+profiler_router = _module.profiler_router
+sign_profile_request = _module.sign_profile_request
@@ -0,0 +1,77 @@
+"""
+PayLinc Snapshot Store
+Last known good result of each upstream source, persisted in SQLite so the
+dashboard starts warm and keeps serving through PayLinc outages
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+# Snapshots older than this are discarded at load time rather than served
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600
+
+class SnapshotStore:
+    """One row per source, overwritten on every successful refresh
+
+    Keyed upserts keep the file at one row per source, so there is no log
+    to compact. The database runs in WAL mode: a write never blocks readers
+    and a crash mid-write leaves the previous snapshot intact.
+    """
+
+    def __init__(self, path: Union[str, Path], max_age: float = SNAPSHOT_MAX_AGE):
+        self.path = str(path)
+        self.max_age = max_age
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    source TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, source: str, payload: Any, fetched_at: Optional[float] = None):
+        """Replace the snapshot of source with a JSON-serializable payload"""
+        with self._connect() as conn:
+            conn.execute('''
+                INSERT INTO snapshots (source, payload, fetched_at) VALUES (?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    payload = excluded.payload,
+                    fetched_at = excluded.fetched_at
+            ''', (source, json.dumps(payload, default=str), fetched_at or time.time()))
+
+    def load_all(self) -> Dict[str, Tuple[Any, float]]:
+        """Map each source to (payload, age in seconds), skipping expired ones"""
+        now = time.time()
+        snapshots = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT source, payload, fetched_at FROM snapshots WHERE fetched_at >= ?",
+                (now - self.max_age,)
+            ).fetchall()
+        for source, payload, fetched_at in rows:
+            try:
+                snapshots[source] = (json.loads(payload), max(0.0, now - fetched_at))
+            except ValueError as e:
+                print(f"⚠️ Ignoring unreadable {source} snapshot: {e}")
+        return snapshots
+
+    def delete(self, source: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM snapshots WHERE source = ?", (source,))
@@ -0,0 +1,128 @@
+"""
+Local LINC Agent Stubs
+Serves /health and POST /tasks on every registry port so the agent monitor
+and the workflow engine can be exercised without the real agents.
+
+Usage:
+    python stub_agents.py                      # all agents healthy
+    python stub_agents.py --down devlinc       # devlinc not listening
+    python stub_agents.py --failing paylinc    # paylinc answers 503 to everything
+    python stub_agents.py --delay 0.2          # add 200 ms to every response
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Iterable, List
+
+from agent_registry import AGENT_REGISTRY
+
+REASONS = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}
+
+def _http_response(status: int, body: dict) -> bytes:
+    payload = json.dumps(body).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: keep-alive\r\n\r\n"
+    )
+    return head.encode("ascii") + payload
+
+async def _read_request(reader: asyncio.StreamReader):
+    """Read one HTTP/1.1 request; returns (method, path, body) or None on EOF"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    body = await reader.readexactly(length) if length else b""
+    return method, path, body
+
+def make_handler(agent_id: str, failing: bool = False, delay: float = 0.0):
+    """Build a connection handler answering as the given agent"""
+    requests_served = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal requests_served
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body = request
+                if delay:
+                    await asyncio.sleep(delay)
+                requests_served += 1
+
+                if path in ("/health", "/tasks") and failing:
+                    response = _http_response(503, {"status": "unhealthy"})
+                elif path == "/tasks" and method == "POST":
+                    task = json.loads(body or b"{}")
+                    response = _http_response(200, {
+                        "task_id": task.get("task_id"),
+                        "agent_id": agent_id,
+                        "status": "completed",
+                        "result": {"name": task.get("name")}
+                    })
+                elif path == "/health":
+                    response = _http_response(200, {
+                        "status": "healthy",
+                        "agent_id": agent_id,
+                        "metrics": {"requests_served": requests_served}
+                    })
+                else:
+                    response = _http_response(404, {"error": f"{method} {path} not found"})
+
+                writer.write(response)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+async def start_stub_agents(
+    host: str = "127.0.0.1",
+    down: Iterable[str] = (),
+    failing: Iterable[str] = (),
+    delay: float = 0.0
+) -> List[asyncio.AbstractServer]:
+    """Start one stub server per registry agent and return the servers"""
+    down, failing = set(down), set(failing)
+    servers = []
+    for agent_id, config in AGENT_REGISTRY.items():
+        if agent_id in down:
+            continue
+        handler = make_handler(agent_id, failing=agent_id in failing, delay=delay)
+        servers.append(await asyncio.start_server(handler, host, config["port"]))
+    return servers
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run stub LINC agents on the registry ports")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--down", default="", help="comma-separated agents to leave offline")
+    parser.add_argument("--failing", default="", help="comma-separated agents answering 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to each response")
+    args = parser.parse_args()
+
+    servers = await start_stub_agents(
+        host=args.host,
+        down=filter(None, args.down.split(",")),
+        failing=filter(None, args.failing.split(",")),
+        delay=args.delay
+    )
+    print(f"✅ {len(servers)} stub agents listening on {args.host}")
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+if __name__ == "__main__":
+    asyncio.run(main())
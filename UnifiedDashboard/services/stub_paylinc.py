@@ -0,0 +1,186 @@
+"""
+Local PayLinc Stub
+WebSocket event stream speaking the protocol of paylinc_stream.py, plus the
+NPHIES eligibility REST endpoints, for exercising the dashboard without PayLinc.
+
+Usage:
+    python stub_paylinc.py                       # ws://127.0.0.1:8765, 50 events/s
+    python stub_paylinc.py --rate 500            # faster event generation
+    python stub_paylinc.py --drop-every 1000     # close each connection after N events
+    python stub_paylinc.py --no-bulk             # eligibility without the batch endpoint
+
+The REST stub listens on http://127.0.0.1:8766; point PayLincIntegration
+at it with base_url="http://127.0.0.1:8766/v1".
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from websockets.exceptions import ConnectionClosed
+
+from stub_agents import _http_response, _read_request
+
+try:
+    from websockets.asyncio.server import serve  # websockets >= 13
+except ImportError:
+    from websockets.server import serve
+
+class StubPayLincStream:
+    """In-memory event log; resume tokens are log sequence numbers"""
+
+    def __init__(self, rate: float = 50.0, drop_every: int = 0):
+        self.rate = rate
+        self.drop_every = drop_every
+        self.events: List[Dict[str, Any]] = []
+        self._new_event = asyncio.Event()
+
+    def _make_event(self, seq: int) -> Dict[str, Any]:
+        channel = random.choice(["healthcare", "cross_border", "sarie"])
+        created_at = datetime.now().isoformat()
+        if channel == "healthcare":
+            data = {
+                "payment_id": f"hc_{seq}",
+                "amount": round(random.uniform(50, 5000), 2),
+                "currency": "SAR",
+                "status": "completed",
+                "created_at": created_at,
+                "metadata": {"claim_reference": f"CLM{seq:08d}"}
+            }
+        elif channel == "cross_border":
+            data = {
+                "cross_border_id": f"cb_{seq}",
+                "recipient_amount": round(random.uniform(10, 2000), 2),
+                "recipient_currency": "USD",
+                "created_at": created_at,
+                "sender_country": "SA",
+                "recipient_country": "US",
+                "fx_rate": 0.2666
+            }
+        else:
+            data = {
+                "id": f"sarie_{seq}",
+                "gateway": "sarie",
+                "amount": round(random.uniform(100, 20000), 2),
+                "currency": "SAR",
+                "created_at": created_at
+            }
+        return {"type": "payment", "channel": channel, "resume_token": str(seq), "data": data}
+
+    async def generate(self):
+        """Append events to the log at the configured rate"""
+        while True:
+            self.events.append(self._make_event(len(self.events) + 1))
+            self._new_event.set()
+            self._new_event = asyncio.Event()
+            await asyncio.sleep(1 / self.rate)
+
+    async def handler(self, websocket):
+        try:
+            await self._serve_subscription(websocket)
+        except ConnectionClosed:
+            pass
+
+    async def _serve_subscription(self, websocket):
+        subscription = json.loads(await websocket.recv())
+        token = subscription.get("resume_token")
+        position = int(token) if token else len(self.events)
+        sent = 0
+
+        while True:
+            while position < len(self.events):
+                await websocket.send(json.dumps(self.events[position]))
+                position += 1
+                sent += 1
+                if self.drop_every and sent >= self.drop_every:
+                    await websocket.close()
+                    return
+            try:
+                await asyncio.wait_for(self._new_event.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                await websocket.send(json.dumps({"type": "heartbeat"}))
+
+class StubEligibilityAPI:
+    """NPHIES eligibility endpoints with deterministic answers
+
+    IDs ending in 0 are not eligible; the others are covered for as many
+    days as their last two digits. Every call is counted in `calls`.
+    """
+
+    PREFIX = "/v1"
+
+    def __init__(self, bulk: bool = True, delay: float = 0.05):
+        self.bulk = bulk
+        self.delay = delay
+        self.calls = {"single": 0, "batch": 0, "ids": 0}
+
+    @staticmethod
+    def eligibility(national_id: str) -> Dict[str, Any]:
+        if national_id.endswith("0"):
+            return {"national_id": national_id, "eligible": False, "reason": "no active coverage"}
+        days = int(national_id[-2:]) if national_id[-2:].isdigit() else 30
+        return {
+            "national_id": national_id,
+            "eligible": True,
+            "coverage": {
+                "payer": "Bupa Arabia",
+                "class": "A",
+                "valid_until": (date.today() + timedelta(days=days)).isoformat()
+            }
+        }
+
+    def route(self, method: str, path: str, body: bytes):
+        path = path.split("?", 1)[0]
+        if path.startswith(self.PREFIX):
+            path = path[len(self.PREFIX):]
+
+        if method == "POST" and path == "/healthcare/eligibility/batch" and self.bulk:
+            national_ids = json.loads(body or b"{}").get("national_ids", [])
+            self.calls["batch"] += 1
+            self.calls["ids"] += len(national_ids)
+            return 200, {"results": [self.eligibility(i) for i in national_ids]}
+        if method == "GET" and path.startswith("/healthcare/eligibility/"):
+            national_id = path.rsplit("/", 1)[1]
+            self.calls["single"] += 1
+            self.calls["ids"] += 1
+            return 200, self.eligibility(national_id)
+        return 404, {"error": f"{method} {path} not found"}
+
+    async def handler(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(_http_response(*self.route(*request)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run a stub PayLinc event stream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=50.0, help="events generated per second")
+    parser.add_argument("--drop-every", type=int, default=0, help="close connections after N events")
+    parser.add_argument("--rest-port", type=int, default=8766)
+    parser.add_argument("--no-bulk", action="store_true", help="answer 404 to bulk eligibility")
+    args = parser.parse_args()
+
+    stream = StubPayLincStream(rate=args.rate, drop_every=args.drop_every)
+    rest = StubEligibilityAPI(bulk=not args.no_bulk)
+    rest_server = await asyncio.start_server(rest.handler, args.host, args.rest_port)
+    async with serve(stream.handler, args.host, args.port), rest_server:
+        print(f"✅ Stub PayLinc stream on ws://{args.host}:{args.port}")
+        print(f"✅ Stub PayLinc REST on http://{args.host}:{args.rest_port}{StubEligibilityAPI.PREFIX}")
+        await stream.generate()
+
+if __name__ == "__main__":
+    asyncio.run(main())
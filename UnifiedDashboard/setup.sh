@@ -31,6 +31,8 @@ fastapi>=0.104.0
 uvicorn[standard]>=0.24.0
 websockets>=12.0
 httpx>=0.25.0
+numpy>=1.26.0
+orjson>=3.9.0
 pydantic>=2.5.0
 python-dotenv>=1.0.0
 sqlite-utils>=3.35
@@ -71,7 +73,9 @@ sample_agents = [
     ('paylinc', 'PayLINC', 'active', 'healthy', datetime.now().isoformat(), '{}')
 ]
 
-c.executemany('INSERT OR REPLACE INTO agent_status VALUES (?,?,?,?,?,?)', sample_agents)
+c.executemany('''INSERT OR REPLACE INTO agent_status
+                 (agent_id, name, status, health, last_heartbeat, metrics)
+                 VALUES (?,?,?,?,?,?)''', sample_agents)
 
 conn.commit()
 conn.close()
@@ -0,0 +1,124 @@
+# BrainSAIT RHDTE - Startup Benchmark
+# Cold-start cost of a worker: importing main, then time until /health and
+# /api/facilities first answer, with FAST_STARTUP on and off.
+#
+# Each run copies the backend into a scratch directory with a synthetic
+# facility_analysis.json of --facilities listings, so no data file or
+# store snapshot is shared between runs.
+#
+# Usage:
+#     python benchmarks/bench_startup.py                      # 20,000 facilities, 3 runs
+#     python benchmarks/bench_startup.py --facilities 100000 --runs 5
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+IMPORT_PROBE = """
+import sys, time
+started = time.perf_counter()
+import main
+print(time.perf_counter() - started, "googlemaps" in sys.modules)
+"""
+
+def write_dataset(path: Path, count: int):
+    random.seed(0)
+    results = []
+    for i in range(count):
+        hospital = i % 10 == 0
+        results.append({
+            "facility": {
+                "place_id": f"place_{i}",
+                "name": f"{'Hospital' if hospital else 'Clinic'} {i}",
+                "address": f"Street {i % 500}",
+                "district": f"District {i % 40}",
+                "location": {"lat": 24.4 + random.random() * 0.6, "lng": 46.4 + random.random() * 0.6},
+                "phone": f"+9665{i:08d}",
+                "rating": round(random.uniform(1, 5), 1),
+                "review_count": random.randint(0, 2000)
+            },
+            "facility_type": "Hospital" if hospital else "Medical Center",
+            "maturity_analysis": {"score": random.randint(0, 100), "level": "DIGITAL_NATIVE"}
+        })
+    path.write_text(json.dumps({"detailed_results": results}))
+
+def prepare(workdir: Path, facilities: int):
+    shutil.copytree(BACKEND, workdir, ignore=shutil.ignore_patterns(
+        "__pycache__", "benchmarks", "data", "static", "profiles", ".env"))
+    (workdir / "data").mkdir()
+    write_dataset(workdir / "data" / "facility_analysis.json", facilities)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for(url: str, started: float, timeout: float = 300) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                response.read()
+                return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError(url)
+
+def measure(workdir: Path, fast: bool) -> dict:
+    env = {**os.environ, "FAST_STARTUP": str(fast).lower(), "ENABLE_PROFILER": "false"}
+    # A fresh store snapshot, so every run loads the dataset in full
+    for snapshot in (workdir / "data").glob("facility_store.db*"):
+        snapshot.unlink()
+
+    probe = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=workdir, env=env,
+                           capture_output=True, text=True, check=True)
+    import_seconds, googlemaps_loaded = probe.stdout.split()[-2:]
+    for snapshot in (workdir / "data").glob("facility_store.db*"):
+        snapshot.unlink()
+
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health = wait_for(f"http://127.0.0.1:{port}/health", started)
+        data = wait_for(f"http://127.0.0.1:{port}/api/facilities?district=District%201", started)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"import": float(import_seconds), "health": health, "facilities": data,
+            "googlemaps": googlemaps_loaded == "True"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RHDTE backend cold start")
+    parser.add_argument("--facilities", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp) / "rhdte-backend"
+        prepare(workdir, args.facilities)
+        print(f"{args.facilities:,} facilities, median of {args.runs} runs")
+        print(f"{'mode':<14} {'import main':>12} {'first /health':>14} {'first data':>12}  googlemaps imported")
+        for fast in (False, True):
+            runs = [measure(workdir, fast) for _ in range(args.runs)]
+            median = {key: statistics.median(r[key] for r in runs) for key in ("import", "health", "facilities")}
+            mode = "FAST_STARTUP" if fast else "eager startup"
+            print(f"{mode:<14} {median['import'] * 1000:>10.0f}ms {median['health'] * 1000:>12.0f}ms "
+                  f"{median['facilities'] * 1000:>10.0f}ms  {'yes' if runs[0]['googlemaps'] else 'no'}")
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,62 @@
 # BrainSAIT - RHDTE Main API
 # Riyadh Health Digital Transformation Engine
 
-import json
-import os
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-import googlemaps
+import numpy as np
 
 # Import utils
 from utils.config import settings
+from utils.sharded_store import Shard, ShardedFacilityStore, merge_counts, merge_top_k
+from utils.analytics_cube import AnalyticsCube, DIMENSIONS
+from utils.coverage import CoverageCache
+from utils.request_profiler import ProfilerMiddleware, RequestProfiler, profiler_router
 
-# Initialize Google Maps Client
-gmaps = None
-if settings.GOOGLE_MAPS_API_KEY:
-    try:
-        gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-        print("✅ Google Maps client initialized successfully")
-    except Exception as e:
-        print(f"❌ Failed to initialize Google Maps client: {e}")
+DATA_DIR = Path(__file__).parent / "data"
+facility_store = ShardedFacilityStore(
+    DATA_DIR,
+    default_city=settings.DEFAULT_CITY,
+    memory_budget_mb=settings.SHARD_MEMORY_BUDGET_MB,
+    workers=settings.SHARD_FAN_OUT_WORKERS,
+    dedupe=settings.DEDUPE_FACILITIES
+)
+
+# Google Maps client, imported and created on first use (see get_gmaps)
+_gmaps = None
+_gmaps_failed = False
+_gmaps_lock = threading.Lock()
+
+def get_gmaps():
+    """Google Maps client, or None when no API key is set or it failed to initialize"""
+    global _gmaps, _gmaps_failed
+    if _gmaps is not None or _gmaps_failed or not settings.GOOGLE_MAPS_API_KEY:
+        return _gmaps
+    with _gmaps_lock:
+        if _gmaps is None and not _gmaps_failed:
+            try:
+                import googlemaps
+                _gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+                print("✅ Google Maps client initialized successfully")
+            except Exception as e:
+                _gmaps_failed = True
+                print(f"❌ Failed to initialize Google Maps client: {e}")
+    return _gmaps
+
+def gmaps_status() -> str:
+    if _gmaps is not None:
+        return "connected"
+    if _gmaps_failed:
+        return "error"
+    return "configured" if settings.GOOGLE_MAPS_API_KEY else "not_configured"
 
 app = FastAPI(
     title=settings.API_TITLE,
@@ -41,6 +73,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand request profiling
+if settings.ENABLE_PROFILER:
+    request_profiler = RequestProfiler(
+        settings.PROFILE_DIR,
+        secret=settings.PROFILER_SECRET,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        slow_threshold=settings.PROFILE_SLOW_MS / 1000
+    )
+    app.add_middleware(ProfilerMiddleware, profiler=request_profiler)
+    app.include_router(profiler_router(request_profiler))
+
 # Mount static files (web interface)
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
@@ -77,6 +120,15 @@ class FacilityModel(BaseModel):
     hasWhatsApp: bool = False
     digitalScore: Optional[int] = None
     maturityLevel: Optional[str] = None
+    mergedPlaceIds: List[str] = []
+    dedupConfidence: Optional[float] = None
+
+class FacilityChanges(BaseModel):
+    version: int
+    since: int
+    fullResync: bool
+    upserted: List[FacilityModel]
+    deleted: List[str]
 
 class DistrictInfo(BaseModel):
     key: str
@@ -103,6 +155,31 @@ class DashboardStats(BaseModel):
     topRatedFacilities: List[dict]
     digitalLeaders: List[dict]
 
+class AnalyticsSummary(BaseModel):
+    totalFacilities: int
+    totalDistricts: int
+    avgRating: float
+    facilityTypeBreakdown: dict
+    topDistricts: List[str]
+    datasetVersion: int
+    groupBy: List[str] = []
+    filters: dict = {}
+    groups: List[dict] = []
+
+class CoverageHeatmap(BaseModel):
+    datasetVersion: int
+    metric: str
+    cellSize: float
+    radius: float
+    rows: int
+    cols: int
+    bounds: dict
+    latStep: float
+    lngStep: float
+    values: List[List[Optional[float]]]
+    summary: dict
+    gaps: List[dict]
+
 class MapSearchRequest(BaseModel):
     query: str
     location: Optional[str] = None
@@ -113,62 +190,39 @@ class MapSearchRequest(BaseModel):
 # Helper Functions
 # ============================================================================
 
-def load_facilities_data():
-    """Load facility data from JSON file"""
-    data_path = Path(__file__).parent / "data" / "facility_analysis.json"
-    
-    if not data_path.exists():
-        print(f"⚠️ Data file not found: {data_path}")
-        return []
+def resolve_cities(city: Optional[str]) -> List[str]:
+    """Cities selected by a `city` query parameter
     
+    None means the default city, "all" every city with a shard, anything
+    else a comma-separated list of names.
+    """
+    if city is not None and city.strip().lower() == "all":
+        return facility_store.cities()
+    names = [c.strip() for c in city.split(",") if c.strip()] if city else [None]
     try:
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        results = []
-        for item in data.get("detailed_results", []):
-            facility = item.get("facility", {})
-            analysis = item.get("maturity_analysis", {})
-            
-            f_type = item.get("facility_type", "Medical Center")
-            mapped_type = "Hospital" if f_type == "Hospital" else "Medical Center"
-            
-            fac_obj = {
-                "id": facility.get("place_id", ""),
-                "placeId": facility.get("place_id", ""),
-                "nameEn": facility.get("name", ""),
-                "nameAr": facility.get("name", ""),
-                "type": mapped_type,
-                "address": facility.get("address", ""),
-                "district": facility.get("district", "Riyadh"),
-                "city": "Riyadh",
-                "latitude": facility.get("location", {}).get("lat", 0.0),
-                "longitude": facility.get("location", {}).get("lng", 0.0),
-                "phone": facility.get("phone"),
-                "website": facility.get("website"),
-                "email": None,
-                "rating": facility.get("rating"),
-                "reviewCount": facility.get("review_count", 0),
-                "isOpen": None,
-                "openingHours": None,
-                "services": [],
-                "insuranceAccepted": [],
-                "languages": ["Arabic", "English"],
-                "hasEmergency": f_type == "Hospital",
-                "is24Hours": False,
-                "hasOnlineBooking": False,
-                "hasWhatsApp": False,
-                "digitalScore": int(analysis.get("score", 0)),
-                "maturityLevel": analysis.get("level", "OFF_GRID")
-            }
-            results.append(fac_obj)
-        
-        print(f"✅ Loaded {len(results)} facilities from data file")
-        return results
-        
-    except Exception as e:
-        print(f"❌ Error loading facilities: {e}")
-        return []
+        return list(dict.fromkeys(facility_store.resolve(name) for name in names))
+    except KeyError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown city: {e.args[0]}. Available: {', '.join(facility_store.cities())}"
+        )
+
+def get_shard(city: Optional[str] = None) -> Shard:
+    """The shard of a single city, loading it if needed"""
+    cities = resolve_cities(city)
+    if len(cities) != 1:
+        raise HTTPException(status_code=400, detail="This endpoint takes a single city")
+    return facility_store.shard(cities[0])
+
+def get_analytics_cube(city: Optional[str] = None) -> AnalyticsCube:
+    """Analytics cube for a city's current dataset, rebuilt whenever its shard reloads"""
+    shard = get_shard(city)
+    facilities = shard.all()
+    cube = shard.derived.get("analytics_cube")
+    if cube is None:
+        cube = AnalyticsCube(facilities, version=shard.store.version)
+        shard.derived["analytics_cube"] = cube
+    return cube
 
 # ============================================================================
 # API Endpoints
@@ -189,6 +243,7 @@ async def root():
         "timestamp": datetime.utcnow().isoformat(),
         "endpoints": {
             "facilities": "/api/facilities",
+            "cities": "/api/cities",
             "districts": "/api/districts",
             "dashboard": "/api/dashboard/stats",
             "docs": "/docs"
@@ -201,83 +256,138 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "google_maps": "connected" if gmaps else "not_configured"
+        "google_maps": gmaps_status(),
+        "dataset": "ready" if facility_store.is_loaded() else "warming"
     }
 
 @app.get("/api/facilities", response_model=List[FacilityModel])
-async def get_facilities(
+def get_facilities(
+    response: Response,
     district: Optional[str] = None,
     type: Optional[str] = None,
-    min_rating: Optional[float] = Query(None, alias="min_rating")
+    min_rating: Optional[float] = Query(None, alias="min_rating"),
+    city: Optional[str] = Query(None, description="City name, comma-separated names, or all")
 ):
-    """Get all facilities with optional filtering"""
-    facilities = load_facilities_data()
+    """Get all facilities with optional filtering
     
-    # Apply filters
-    if district:
-        facilities = [f for f in facilities if district.lower() in f["district"].lower()]
+    Several cities are filtered in parallel, one shard each. The response
+    then carries X-Dataset-Versions ("City=version, ...") instead of
+    X-Dataset-Version, since every city is versioned separately.
+    """
+    def query(shard: Shard):
+        facilities = shard.all()
+        
+        # Apply filters
+        if district:
+            facilities = [f for f in facilities if district.lower() in f["district"].lower()]
+        
+        if type:
+            facilities = [f for f in facilities if type.lower() == f["type"].lower()]
+        
+        if min_rating is not None:
+            facilities = [f for f in facilities if (f.get("rating") or 0) >= min_rating]
+        
+        return shard.store.version, facilities
     
-    if type:
-        facilities = [f for f in facilities if type.lower() == f["type"].lower()]
+    results = facility_store.fan_out(resolve_cities(city), query)
+    if len(results) == 1:
+        version, facilities = next(iter(results.values()))
+        response.headers["X-Dataset-Version"] = str(version)
+        return facilities
     
-    if min_rating is not None:
-        facilities = [f for f in facilities if (f.get("rating") or 0) >= min_rating]
+    response.headers["X-Dataset-Versions"] = ", ".join(
+        f"{name}={version}" for name, (version, _) in results.items()
+    )
+    return [f for _, facilities in results.values() for f in facilities]
+
+@app.get("/api/cities")
+async def get_cities():
+    """Get every city with a facility shard and whether it is loaded"""
+    return {
+        "defaultCity": settings.DEFAULT_CITY,
+        "cities": facility_store.status(),
+        "memoryBudgetBytes": int(facility_store.memory_budget),
+        "evictions": facility_store.evictions
+    }
+
+@app.get("/api/facilities/changes", response_model=FacilityChanges)
+def get_facility_changes(since: int = Query(..., ge=0), city: Optional[str] = None):
+    """Get facilities upserted or deleted since a dataset version
     
-    return facilities
+    Clients keep the version from X-Dataset-Version (or the previous call)
+    and apply only the returned changes. When fullResync is true the change
+    log no longer reaches back to `since` and /api/facilities must be
+    fetched again. Versions are per city.
+    """
+    return get_shard(city).store.changes_since(since)
 
 @app.get("/api/facilities/{facility_id}", response_model=FacilityModel)
-async def get_facility_by_id(facility_id: str):
-    """Get a specific facility by ID"""
-    facilities = load_facilities_data()
-    
-    for facility in facilities:
-        if facility["id"] == facility_id:
-            return facility
+def get_facility_by_id(facility_id: str, city: Optional[str] = None):
+    """Get a specific facility by ID, from any city unless one is given
     
-    raise HTTPException(status_code=404, detail="Facility not found")
+    Facilities of a city that has not been loaded since deployment are
+    only found when `city` is passed.
+    """
+    if city is not None:
+        facility = facility_store.get(facility_id, get_shard(city).city)
+    else:
+        facility = facility_store.get(facility_id)
+    if facility is None:
+        raise HTTPException(status_code=404, detail="Facility not found")
+    return facility
 
 @app.get("/api/districts")
-async def get_districts():
+def get_districts(city: Optional[str] = Query(None, description="City name, comma-separated names, or all")):
     """Get all districts with statistics"""
-    facilities = load_facilities_data()
-    
-    district_data = {}
-    for facility in facilities:
-        district = facility["district"]
-        if district not in district_data:
-            district_data[district] = {
-                "facilities": [],
-                "ratings": [],
-                "scores": []
-            }
-        district_data[district]["facilities"].append(facility)
-        if facility.get("rating"):
-            district_data[district]["ratings"].append(facility["rating"])
-        if facility.get("digitalScore"):
-            district_data[district]["scores"].append(facility["digitalScore"])
-    
-    districts = []
-    for key, data in district_data.items():
-        avg_rating = sum(data["ratings"]) / len(data["ratings"]) if data["ratings"] else 0.0
-        avg_score = sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0.0
+    def query(shard: Shard):
+        district_data = {}
+        for facility in shard.all():
+            district = facility["district"]
+            if district not in district_data:
+                district_data[district] = {
+                    "facilities": [],
+                    "ratings": [],
+                    "scores": []
+                }
+            district_data[district]["facilities"].append(facility)
+            if facility.get("rating"):
+                district_data[district]["ratings"].append(facility["rating"])
+            if facility.get("digitalScore"):
+                district_data[district]["scores"].append(facility["digitalScore"])
         
-        districts.append({
-            "key": key,
-            "nameAr": key,
-            "nameEn": key,
-            "facilityCount": len(data["facilities"]),
-            "avgRating": round(avg_rating, 1),
-            "avgDigitalScore": round(avg_score, 1)
-        })
+        districts = []
+        for key, data in district_data.items():
+            avg_rating = sum(data["ratings"]) / len(data["ratings"]) if data["ratings"] else 0.0
+            avg_score = sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0.0
+            
+            districts.append({
+                "key": key,
+                "nameAr": key,
+                "nameEn": key,
+                "city": shard.city,
+                "facilityCount": len(data["facilities"]),
+                "avgRating": round(avg_rating, 1),
+                "avgDigitalScore": round(avg_score, 1)
+            })
+        return districts
     
+    # Districts never span cities, so each shard's list is complete
+    districts = [d for partial in facility_store.fan_out(resolve_cities(city), query).values() for d in partial]
     districts.sort(key=lambda x: x["facilityCount"], reverse=True)
     
     return {"districts": districts}
 
 @app.get("/api/facility-types")
-async def get_facility_types():
+def get_facility_types(city: Optional[str] = Query(None, description="City name, comma-separated names, or all")):
     """Get all facility types with counts"""
-    facilities = load_facilities_data()
+    def query(shard: Shard):
+        type_counts = {}
+        for facility in shard.all():
+            f_type = facility["type"]
+            type_counts[f_type] = type_counts.get(f_type, 0) + 1
+        return type_counts
+    
+    type_counts = merge_counts(facility_store.fan_out(resolve_cities(city), query).values())
     
     type_config = {
         "Hospital": {"nameAr": "مستشفى", "icon": "cross.circle.fill"},
@@ -287,11 +397,6 @@ async def get_facility_types():
         "Pharmacy": {"nameAr": "صيدلية", "icon": "pills.fill"},
     }
     
-    type_counts = {}
-    for facility in facilities:
-        f_type = facility["type"]
-        type_counts[f_type] = type_counts.get(f_type, 0) + 1
-    
     facility_types = []
     for type_key, count in type_counts.items():
         config = type_config.get(type_key, {"nameAr": type_key, "icon": "building.fill"})
@@ -307,24 +412,8 @@ async def get_facility_types():
     
     return {"facilityTypes": facility_types}
 
-@app.get("/api/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats():
-    """Get comprehensive dashboard statistics"""
-    facilities = load_facilities_data()
-    
-    if not facilities:
-        return {
-            "totalFacilities": 0,
-            "totalDistricts": 0,
-            "avgRating": 0.0,
-            "avgDigitalScore": 0.0,
-            "facilityTypeBreakdown": {},
-            "maturityDistribution": {},
-            "topRatedFacilities": [],
-            "digitalLeaders": []
-        }
-    
-    districts = set(f["district"] for f in facilities)
+def _dashboard_partial(facilities: List[dict]) -> dict:
+    """Mergeable dashboard statistics of one shard: sums, counts and top 5 lists"""
     ratings = [f["rating"] for f in facilities if f.get("rating")]
     scores = [f["digitalScore"] for f in facilities if f.get("digitalScore")]
     
@@ -364,16 +453,144 @@ async def get_dashboard_stats():
     ]
     
     return {
-        "totalFacilities": len(facilities),
-        "totalDistricts": len(districts),
-        "avgRating": round(sum(ratings) / len(ratings), 1) if ratings else 0.0,
-        "avgDigitalScore": round(sum(scores) / len(scores), 1) if scores else 0.0,
-        "facilityTypeBreakdown": type_breakdown,
-        "maturityDistribution": maturity_dist,
-        "topRatedFacilities": top_rated,
+        "facilities": len(facilities),
+        "districts": len(set(f["district"] for f in facilities)),
+        "ratingSum": sum(ratings),
+        "ratingCount": len(ratings),
+        "scoreSum": sum(scores),
+        "scoreCount": len(scores),
+        "types": type_breakdown,
+        "maturity": maturity_dist,
+        "topRated": top_rated,
         "digitalLeaders": digital_leaders
     }
 
+@app.get("/api/dashboard/stats", response_model=DashboardStats)
+def get_dashboard_stats(city: Optional[str] = Query(None, description="City name, comma-separated names, or all")):
+    """Get comprehensive dashboard statistics
+    
+    Each city's shard computes its own totals and top 5 lists in
+    parallel; averages are recombined from the sums and the top 5 is
+    taken over the cities' top 5s.
+    """
+    partials = list(facility_store.fan_out(
+        resolve_cities(city), lambda shard: _dashboard_partial(shard.all())
+    ).values())
+    
+    rating_count = sum(p["ratingCount"] for p in partials)
+    score_count = sum(p["scoreCount"] for p in partials)
+    
+    return {
+        "totalFacilities": sum(p["facilities"] for p in partials),
+        "totalDistricts": sum(p["districts"] for p in partials),
+        "avgRating": round(sum(p["ratingSum"] for p in partials) / rating_count, 1) if rating_count else 0.0,
+        "avgDigitalScore": round(sum(p["scoreSum"] for p in partials) / score_count, 1) if score_count else 0.0,
+        "facilityTypeBreakdown": merge_counts(p["types"] for p in partials),
+        "maturityDistribution": merge_counts(p["maturity"] for p in partials),
+        "topRatedFacilities": merge_top_k(
+            (p["topRated"] for p in partials), key=lambda x: (x["rating"], x["reviewCount"]), k=5
+        ),
+        "digitalLeaders": merge_top_k(
+            (p["digitalLeaders"] for p in partials), key=lambda x: x["digitalScore"], k=5
+        )
+    }
+
+@app.get("/api/analytics/summary", response_model=AnalyticsSummary)
+def get_analytics_summary(
+    group_by: Optional[str] = Query(None, description="Comma-separated: " + ", ".join(DIMENSIONS)),
+    district: Optional[str] = None,
+    type: Optional[str] = None,
+    maturityLevel: Optional[str] = None,
+    ratingBucket: Optional[str] = None,
+    scoreBucket: Optional[str] = None,
+    city: Optional[str] = None
+):
+    """Get summary analytics for one city, optionally grouped and drilled down
+    
+    Answered from the pre-aggregated analytics cube. The headline fields
+    match the iOS DashboardStats model; `groups` holds count, rating,
+    digital score and review measures per combination of the group_by
+    dimensions, restricted to the given dimension values.
+    """
+    cube = get_analytics_cube(city)
+    dimensions = [d.strip() for d in group_by.split(",") if d.strip()] if group_by else []
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown dimension(s): {', '.join(unknown)}. Use: {', '.join(DIMENSIONS)}"
+        )
+    
+    filters = {
+        dim: value for dim, value in (
+            ("district", district),
+            ("type", type),
+            ("maturityLevel", maturityLevel),
+            ("ratingBucket", ratingBucket),
+            ("scoreBucket", scoreBucket)
+        ) if value is not None
+    }
+    
+    return {
+        **cube.summary(filters),
+        "datasetVersion": cube.version,
+        "groupBy": dimensions,
+        "filters": filters,
+        "groups": cube.rollup(dimensions, filters) if dimensions else []
+    }
+
+@app.get("/api/coverage", response_model=CoverageHeatmap)
+def get_coverage(
+    metric: str = Query("emergency", pattern="^(emergency|density|digitalScore)$"),
+    cell_size: float = Query(500, ge=100, le=5000),
+    radius: float = Query(2000, ge=100, le=20000),
+    type: Optional[str] = None,
+    gaps: int = Query(10, ge=0, le=100),
+    city: Optional[str] = None
+):
+    """Get a coverage heatmap over a grid laid across the city
+    
+    metric selects the layer: distance in metres to the nearest emergency
+    facility, number of facilities (optionally of one type) within radius,
+    or their average digitalScore. values[i][j] is the cell centred on
+    (south + (i + 0.5) * latStep, west + (j + 0.5) * lngStep); null means
+    no facility in reach. Results are cached per dataset version.
+    """
+    shard = get_shard(city)
+    facilities = shard.all()
+    coverage_cache = shard.derived.setdefault("coverage", CoverageCache())
+    try:
+        coverage = coverage_cache.get(facilities, shard.store.version, cell_size, radius)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if metric == "emergency":
+        layer = coverage.nearest_emergency.round()
+    elif metric == "density":
+        if type and type not in coverage.density:
+            raise HTTPException(status_code=404, detail=f"No facilities of type {type}")
+        layer = coverage.density[type] if type else coverage.total_density()
+    else:
+        layer = coverage.avg_digital_score.round(1)
+    
+    values = layer.astype(object)
+    values[~np.isfinite(layer)] = None
+    
+    return {
+        "datasetVersion": coverage.version,
+        "metric": metric,
+        "cellSize": cell_size,
+        "radius": radius,
+        "rows": coverage.shape[0],
+        "cols": coverage.shape[1],
+        "bounds": coverage.bounds,
+        "latStep": coverage.lat_step,
+        "lngStep": coverage.lng_step,
+        "values": values.tolist(),
+        "summary": coverage.summary(),
+        "gaps": coverage.gaps(gaps)
+    }
+
 # ============================================================================
 # Google Maps Integration
 # ============================================================================
@@ -381,6 +598,7 @@ async def get_dashboard_stats():
 @app.post("/api/map/search")
 async def search_places(request: MapSearchRequest):
     """Search places using Google Maps Places API"""
+    gmaps = get_gmaps()
     if not gmaps:
         raise HTTPException(
             status_code=503,
@@ -409,6 +627,7 @@ async def search_places(request: MapSearchRequest):
 @app.get("/api/map/place/{place_id}")
 async def get_place_details(place_id: str):
     """Get detailed information about a place from Google Maps"""
+    gmaps = get_gmaps()
     if not gmaps:
         raise HTTPException(
             status_code=503,
@@ -430,6 +649,15 @@ async def get_place_details(place_id: str):
         print(f"❌ Google Maps Details Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def warm_up():
+    """Load the default city's shard and build its analytics cube ahead of the first request"""
+    started = time.perf_counter()
+    shard = facility_store.shard()
+    facilities = shard.all()
+    cube = get_analytics_cube()
+    print(f"Facilities: {len(facilities)} in {shard.city} (dataset v{shard.store.version}), "
+          f"analytics cube: {cube.cells} cells, in {time.perf_counter() - started:.2f}s")
+
 # ============================================================================
 # Startup Event
 # ============================================================================
@@ -442,11 +670,15 @@ async def startup_event():
     print("=" * 60)
     print(f"Environment: {settings.ENVIRONMENT}")
     print(f"API Version: {settings.API_VERSION}")
-    print(f"Google Maps: {'✅ Configured' if gmaps else '❌ Not Configured'}")
+    print(f"Google Maps: {'✅ Configured' if settings.GOOGLE_MAPS_API_KEY else '❌ Not Configured'}")
+    print(f"Cities: {', '.join(facility_store.cities()) or 'none'} (default {settings.DEFAULT_CITY})")
     
-    # Load data to verify
-    facilities = load_facilities_data()
-    print(f"Facilities: {len(facilities)} loaded")
+    # Load the dataset now, or behind the server once it is accepting requests
+    if settings.FAST_STARTUP:
+        threading.Thread(target=warm_up, name="facility-warmup", daemon=True).start()
+        print("Facilities: warming up in the background")
+    else:
+        warm_up()
     print("=" * 60)
     print("✅ Server ready!")
     print("📚 API Docs: /docs")
@@ -0,0 +1,159 @@
+# BrainSAIT RHDTE - Analytics Cube
+# Pre-aggregated facility measures over district x type x maturity x rating x score
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DIMENSIONS = ("district", "type", "maturityLevel", "ratingBucket", "scoreBucket")
+
+# Right-open bucket edges; facilities without a rating go to "unrated"
+RATING_EDGES = [1.0, 2.0, 3.0, 4.0, 4.5]
+RATING_LABELS = ["<1", "1-2", "2-3", "3-4", "4-4.5", "4.5+"]
+SCORE_EDGES = [20, 40, 60, 80]
+SCORE_LABELS = ["0-19", "20-39", "40-59", "60-79", "80-100"]
+
+# Additive measures are summed on roll-up; min/max measures are reduced
+SUM_MEASURES = ("count", "rating_count", "rating_sum", "score_sum", "review_sum")
+MIN_MEASURES = ("rating_min", "score_min")
+MAX_MEASURES = ("rating_max", "score_max")
+
+def _encode(values: Sequence[Any]):
+    labels, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return labels.tolist(), codes
+
+class AnalyticsCube:
+    """Sparse cube of facility measures, keyed by the DIMENSIONS
+
+    Only occupied cells are stored. Any group-by over a subset of the
+    dimensions, optionally filtered to some of their values, is answered
+    by rolling those cells up; the raw facilities are not kept.
+    """
+
+    def __init__(self, facilities: List[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self.labels: Dict[str, List[str]] = {}
+        n = len(facilities)
+
+        ratings = np.array(
+            [f["rating"] if f.get("rating") is not None else np.nan for f in facilities],
+            dtype=np.float64
+        ).reshape(n)
+        scores = np.array([f.get("digitalScore") or 0 for f in facilities], dtype=np.float64).reshape(n)
+        reviews = np.array([f.get("reviewCount") or 0 for f in facilities], dtype=np.float64).reshape(n)
+        rated = ~np.isnan(ratings)
+
+        rating_labels = np.array(RATING_LABELS + ["unrated"], dtype=object)
+        rating_codes = np.where(rated, np.digitize(np.nan_to_num(ratings), RATING_EDGES), len(RATING_LABELS))
+        score_labels = np.array(SCORE_LABELS, dtype=object)
+        score_codes = np.digitize(scores, SCORE_EDGES)
+
+        columns = {
+            "district": [f.get("district") or "Unknown" for f in facilities],
+            "type": [f.get("type") or "Unknown" for f in facilities],
+            "maturityLevel": [f.get("maturityLevel") or "UNKNOWN" for f in facilities],
+            "ratingBucket": rating_labels[rating_codes] if n else [],
+            "scoreBucket": score_labels[score_codes] if n else [],
+        }
+        codes = []
+        for dim in DIMENSIONS:
+            self.labels[dim], dim_codes = _encode(columns[dim])
+            codes.append(dim_codes.astype(np.int64))
+
+        # One pass: collapse facilities into occupied cells, then reduce
+        shape = tuple(max(len(self.labels[dim]), 1) for dim in DIMENSIONS)
+        keys = np.ravel_multi_index(codes, shape) if n else np.zeros(0, dtype=np.int64)
+        cells, inverse = np.unique(keys, return_inverse=True)
+        self.codes = dict(zip(DIMENSIONS, np.unravel_index(cells, shape)))
+
+        size = len(cells)
+        self.measures = {
+            "count": np.bincount(inverse, minlength=size).astype(np.float64),
+            "rating_count": np.bincount(inverse, weights=rated.astype(np.float64), minlength=size),
+            "rating_sum": np.bincount(inverse, weights=np.nan_to_num(ratings), minlength=size),
+            "score_sum": np.bincount(inverse, weights=scores, minlength=size),
+            "review_sum": np.bincount(inverse, weights=reviews, minlength=size),
+            "rating_min": np.full(size, np.inf),
+            "rating_max": np.full(size, -np.inf),
+            "score_min": np.full(size, np.inf),
+            "score_max": np.full(size, -np.inf),
+        }
+        np.minimum.at(self.measures["rating_min"], inverse[rated], ratings[rated])
+        np.maximum.at(self.measures["rating_max"], inverse[rated], ratings[rated])
+        np.minimum.at(self.measures["score_min"], inverse, scores)
+        np.maximum.at(self.measures["score_max"], inverse, scores)
+
+    @property
+    def cells(self) -> int:
+        return len(self.measures["count"])
+
+    def _mask(self, filters: Dict[str, str]) -> np.ndarray:
+        mask = np.ones(self.cells, dtype=bool)
+        for dim, value in filters.items():
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dim}")
+            labels = self.labels[dim]
+            if value not in labels:
+                return np.zeros(self.cells, dtype=bool)
+            mask &= self.codes[dim] == labels.index(value)
+        return mask
+
+    def rollup(self, group_by: Sequence[str] = (),
+               filters: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Aggregate the cells matching filters, grouped by the given dimensions"""
+        for dim in group_by:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dim}")
+        mask = self._mask(filters or {})
+        if not mask.any():
+            return []
+
+        if group_by:
+            shape = tuple(len(self.labels[dim]) for dim in group_by)
+            keys = np.ravel_multi_index([self.codes[dim][mask] for dim in group_by], shape)
+        else:
+            shape, keys = (), np.zeros(int(mask.sum()), dtype=np.int64)
+        groups, inverse = np.unique(keys, return_inverse=True)
+
+        # Sort cells by group so min/max reduce over contiguous runs
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(groups)))
+
+        totals = {m: np.bincount(inverse, weights=self.measures[m][mask], minlength=len(groups))
+                  for m in SUM_MEASURES}
+        for m in MIN_MEASURES:
+            totals[m] = np.minimum.reduceat(self.measures[m][mask][order], starts)
+        for m in MAX_MEASURES:
+            totals[m] = np.maximum.reduceat(self.measures[m][mask][order], starts)
+
+        group_codes = np.unravel_index(groups, shape) if group_by else ()
+        rows = []
+        for i in range(len(groups)):
+            row = {dim: self.labels[dim][int(group_codes[d][i])] for d, dim in enumerate(group_by)}
+            count, rated = int(totals["count"][i]), totals["rating_count"][i]
+            row.update({
+                "count": count,
+                "avgRating": round(float(totals["rating_sum"][i] / rated), 2) if rated else None,
+                "minRating": float(totals["rating_min"][i]) if rated else None,
+                "maxRating": float(totals["rating_max"][i]) if rated else None,
+                "avgDigitalScore": round(float(totals["score_sum"][i] / count), 1),
+                "minDigitalScore": int(totals["score_min"][i]),
+                "maxDigitalScore": int(totals["score_max"][i]),
+                "reviewCount": int(totals["review_sum"][i]),
+            })
+            rows.append(row)
+        rows.sort(key=lambda r: r["count"], reverse=True)
+        return rows
+
+    def summary(self, filters: Optional[Dict[str, str]] = None, top_districts: int = 5) -> Dict[str, Any]:
+        """Headline figures in the shape of the iOS DashboardStats model"""
+        overall = self.rollup((), filters)
+        districts = self.rollup(("district",), filters)
+        types = self.rollup(("type",), filters)
+        return {
+            "totalFacilities": overall[0]["count"] if overall else 0,
+            "totalDistricts": len(districts),
+            "avgRating": round(overall[0]["avgRating"] or 0.0, 1) if overall else 0.0,
+            "facilityTypeBreakdown": {row["type"]: row["count"] for row in types},
+            "topDistricts": [row["district"] for row in districts[:top_districts]],
+        }
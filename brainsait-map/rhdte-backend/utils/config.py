@@ -1,4 +1,5 @@
 # BrainSAIT RHDTE - Configuration Management
+from pathlib import Path
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -24,13 +25,30 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: list = ["*"]
     
+    # Facility data, one shard per city (see ShardedFacilityStore)
+    DEDUPE_FACILITIES: bool = True
+    DEFAULT_CITY: str = "Riyadh"
+    SHARD_MEMORY_BUDGET_MB: float = 512
+    SHARD_FAN_OUT_WORKERS: int = 4
+    
+    # Start serving before the dataset is loaded; it is warmed in the background
+    FAST_STARTUP: bool = True
+    
+    # Request profiling (served under /admin/profiles with PROFILER_SECRET)
+    ENABLE_PROFILER: bool = False
+    PROFILER_SECRET: Optional[str] = None
+    PROFILE_SAMPLE_RATE: float = 0.001
+    PROFILE_SLOW_MS: int = 2000
+    PROFILE_DIR: str = "profiles"
+    
     # API Configuration
     API_VERSION: str = "1.0.0"
     API_TITLE: str = "BrainSAIT RHDTE API"
     API_DESCRIPTION: str = "Riyadh Health Digital Transformation Engine"
     
     class Config:
-        env_file = ".env"
+        # Next to the code, not the working directory, so WSGI hosts need no load_dotenv
+        env_file = Path(__file__).resolve().parent.parent / ".env"
         case_sensitive = True
 
 settings = Settings()
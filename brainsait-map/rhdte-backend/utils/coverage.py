@@ -0,0 +1,218 @@
+# BrainSAIT RHDTE - Coverage Analysis
+# Grid-based access-gap analysis over facility coordinates
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Local equirectangular projection; accurate to well under 1% across a city
+METERS_PER_DEG_LAT = 110_540.0
+METERS_PER_DEG_LNG = 111_320.0
+
+# Refuse grids larger than this (a 100 m grid over greater Riyadh is ~0.5M)
+MAX_GRID_CELLS = 4_000_000
+
+# Cells per side of the tiles used to prune nearest-emergency candidates
+TILE_CELLS = 64
+
+class CoverageResult:
+    """Per-cell coverage layers for one dataset version, cell size and radius
+
+    Row 0 is the southern edge and column 0 the western edge; cell (i, j)
+    is centred on south + (i + 0.5) * lat_step, west + (j + 0.5) * lng_step.
+    """
+
+    def __init__(self, version: int, cell_size: float, radius: float, bounds: Dict[str, float],
+                 lat_step: float, lng_step: float, nearest_emergency: np.ndarray,
+                 density: Dict[str, np.ndarray], avg_digital_score: np.ndarray,
+                 emergency_facilities: int):
+        self.version = version
+        self.cell_size = cell_size
+        self.radius = radius
+        self.bounds = bounds
+        self.lat_step = lat_step
+        self.lng_step = lng_step
+        self.nearest_emergency = nearest_emergency
+        self.density = density
+        self.avg_digital_score = avg_digital_score
+        self.emergency_facilities = emergency_facilities
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.nearest_emergency.shape
+
+    def total_density(self) -> np.ndarray:
+        return sum(self.density.values(), np.zeros(self.shape))
+
+    def cell_center(self, row: int, col: int) -> Tuple[float, float]:
+        return (float(self.bounds["south"] + (row + 0.5) * self.lat_step),
+                float(self.bounds["west"] + (col + 0.5) * self.lng_step))
+
+    def summary(self) -> Dict[str, Any]:
+        """Distance-to-emergency statistics over cells with any facility in reach"""
+        served = self.total_density() > 0
+        distances = self.nearest_emergency[served & np.isfinite(self.nearest_emergency)]
+        if not distances.size:
+            return {"cells": int(served.sum()), "emergencyFacilities": self.emergency_facilities}
+        return {
+            "cells": int(served.sum()),
+            "emergencyFacilities": self.emergency_facilities,
+            "medianEmergencyDistance": round(float(np.median(distances))),
+            "p90EmergencyDistance": round(float(np.percentile(distances, 90))),
+            "maxEmergencyDistance": round(float(distances.max())),
+            "within5km": round(float((distances <= 5000).mean()), 3),
+            "within10km": round(float((distances <= 10000).mean()), 3),
+        }
+
+    def gaps(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Cells with facilities in reach that are farthest from emergency care"""
+        density = self.total_density()
+        distance = np.where(density > 0, self.nearest_emergency, -1.0)
+        distance = np.where(np.isfinite(distance), distance, -1.0)
+        flat = np.argsort(distance, axis=None)[::-1][:limit]
+        gaps = []
+        for index in flat:
+            row, col = (int(i) for i in np.unravel_index(index, self.shape))
+            if distance[row, col] < 0:
+                break
+            lat, lng = self.cell_center(row, col)
+            gaps.append({
+                "latitude": round(lat, 6),
+                "longitude": round(lng, 6),
+                "emergencyDistance": round(float(distance[row, col])),
+                "facilitiesInRadius": int(density[row, col]),
+            })
+        return gaps
+
+def _disk_sums(grids: List[np.ndarray], r: float) -> List[np.ndarray]:
+    """Sum of each grid over the cells whose centres lie within r cells of every cell
+
+    A direct sum over the disk costs r^2 operations per cell, so the grids
+    are convolved with a disk kernel through the FFT instead, sharing one
+    kernel transform. The results are exact up to float rounding, which is
+    clipped away below zero.
+    """
+    rows, cols = grids[0].shape
+    k = int(r)
+    offsets = np.arange(-k, k + 1)
+    kernel = (offsets[:, None] ** 2 + offsets[None, :] ** 2 <= r * r).astype(np.float64)
+    shape = (rows + 2 * k, cols + 2 * k)
+    kernel_fft = np.fft.rfft2(kernel, shape)
+    return [
+        np.clip(np.fft.irfft2(np.fft.rfft2(grid, shape) * kernel_fft, shape)[k:k + rows, k:k + cols], 0, None)
+        for grid in grids
+    ]
+
+def _nearest_distances(xs: np.ndarray, ys: np.ndarray, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """Distance from every (ys[i], xs[j]) grid point to the nearest of the points
+
+    The grid is cut into tiles. For each tile, points are kept only if their
+    distance to the tile's rectangle is no more than the smallest distance
+    from any point to the tile's far corner, which bounds the nearest
+    distance of every cell in it; only those candidates are compared.
+    """
+    out = np.full((len(ys), len(xs)), np.inf)
+    if not len(px):
+        return out
+    for r in range(0, len(ys), TILE_CELLS):
+        ty = ys[r:r + TILE_CELLS]
+        dy_lo = np.maximum(np.maximum(ty[0] - py, py - ty[-1]), 0)
+        dy_hi = np.maximum(np.abs(py - ty[0]), np.abs(py - ty[-1]))
+        for c in range(0, len(xs), TILE_CELLS):
+            tx = xs[c:c + TILE_CELLS]
+            dx_lo = np.maximum(np.maximum(tx[0] - px, px - tx[-1]), 0)
+            dx_hi = np.maximum(np.abs(px - tx[0]), np.abs(px - tx[-1]))
+            lower = np.hypot(dx_lo, dy_lo)
+            candidates = lower <= np.hypot(dx_hi, dy_hi).min()
+            dy2 = (ty[:, None] - py[candidates]) ** 2
+            dx2 = (tx[:, None] - px[candidates]) ** 2
+            out[r:r + TILE_CELLS, c:c + TILE_CELLS] = np.sqrt(
+                (dy2[:, None, :] + dx2[None, :, :]).min(axis=2)
+            )
+    return out
+
+def compute_coverage(facilities: List[Dict[str, Any]], cell_size: float = 500.0,
+                     radius: float = 2000.0, version: int = 0) -> CoverageResult:
+    """Lay a grid of cell_size metres over the facilities and compute every layer
+
+    The grid spans the facilities' bounding box padded by radius. Density
+    and average digital score count the facilities in every cell whose
+    centre is within radius of the cell's centre.
+    """
+    located = [f for f in facilities if f.get("latitude") and f.get("longitude")]
+    lat = np.array([f["latitude"] for f in located], dtype=np.float64)
+    lng = np.array([f["longitude"] for f in located], dtype=np.float64)
+    if not len(located):
+        raise ValueError("No facilities with coordinates")
+
+    lat0 = float(lat.mean())
+    m_lng = METERS_PER_DEG_LNG * math.cos(math.radians(lat0))
+    x = (lng - lng.min()) * m_lng + radius
+    y = (lat - lat.min()) * METERS_PER_DEG_LAT + radius
+    cols = int(math.ceil((x.max() + radius) / cell_size))
+    rows = int(math.ceil((y.max() + radius) / cell_size))
+    if rows * cols > MAX_GRID_CELLS:
+        raise ValueError(f"Grid of {rows}x{cols} cells is too large; use a larger cell size")
+
+    lat_step = cell_size / METERS_PER_DEG_LAT
+    lng_step = cell_size / m_lng
+    bounds = {
+        "south": float(lat.min()) - radius / METERS_PER_DEG_LAT,
+        "west": float(lng.min()) - radius / m_lng,
+    }
+    bounds["north"] = bounds["south"] + rows * lat_step
+    bounds["east"] = bounds["west"] + cols * lng_step
+
+    # Bin facilities into cells once; every layer is built from these bins
+    cell = (y // cell_size).astype(np.int64) * cols + (x // cell_size).astype(np.int64)
+    types = np.array([f.get("type") or "Unknown" for f in located], dtype=object)
+    names = [str(t) for t in np.unique(types)]
+    scores = np.array([f.get("digitalScore") or 0 for f in located], dtype=np.float64)
+    bins = [np.bincount(cell[types == t], minlength=rows * cols).reshape(rows, cols).astype(np.float64)
+            for t in names]
+    bins.append(np.bincount(cell, weights=scores, minlength=rows * cols).reshape(rows, cols))
+    *type_sums, score_sums = _disk_sums(bins, radius / cell_size)
+    density = {t: np.rint(sums) for t, sums in zip(names, type_sums)}
+    counts = sum(density.values(), np.zeros((rows, cols)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_score = np.where(counts > 0, score_sums / counts, np.nan)
+
+    emergency = np.array([bool(f.get("hasEmergency")) for f in located])
+    centers_x = (np.arange(cols) + 0.5) * cell_size
+    centers_y = (np.arange(rows) + 0.5) * cell_size
+    nearest = _nearest_distances(centers_x, centers_y, x[emergency], y[emergency])
+
+    return CoverageResult(version, cell_size, radius, bounds, lat_step, lng_step,
+                          nearest, density, avg_score, int(emergency.sum()))
+
+class CoverageCache:
+    """Coverage results for the current dataset, by cell size and radius
+
+    Entries are dropped as soon as a different facility list is passed in,
+    so a reload of the data file invalidates everything computed before it.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[float, float], CoverageResult]" = OrderedDict()
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def get(self, facilities: List[Dict[str, Any]], version: int,
+            cell_size: float, radius: float) -> CoverageResult:
+        key = (cell_size, radius)
+        with self._lock:
+            if facilities is not self._source:
+                self._entries.clear()
+                self._source = facilities
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            result = compute_coverage(facilities, cell_size, radius, version)
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return result
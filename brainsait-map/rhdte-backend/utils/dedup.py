@@ -0,0 +1,253 @@
+# BrainSAIT RHDTE - Facility Deduplication
+# Merges Google Places listings that describe the same facility
+
+import math
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+# Blocks are geohash cells of this precision (~150 m at Riyadh's latitude);
+# a record is compared only with records in its own and adjacent cells
+GEOHASH_PRECISION = 7
+
+# Listings farther apart than this are never the same facility
+MAX_DISTANCE_METERS = 120.0
+
+# Pairs must clear both to be merged
+MIN_NAME_SIMILARITY = 0.6
+MIN_CONFIDENCE = 0.75
+
+# Below this many records matching runs in-process
+PARALLEL_THRESHOLD = 50_000
+
+# Records are matched in stripes of block rows of at least this size
+STRIPE_MIN_RECORDS = 20_000
+
+METERS_PER_DEG_LAT = 110_540.0
+METERS_PER_DEG_LNG = 111_320.0
+
+# Words that describe what a facility is rather than which one it is
+GENERIC_WORDS = {
+    "the", "and", "of", "for", "al", "el", "co", "est", "llc",
+    "clinic", "clinics", "polyclinic", "medical", "center", "centre", "complex",
+    "hospital", "health", "healthcare", "care", "group", "branch",
+    "مستشفى", "مستشفي", "مجمع", "عياده", "عيادات", "مركز", "طبي", "طبيه",
+    "صحي", "صحيه", "مجموعه", "فرع", "شركه", "مؤسسه", "و",
+}
+
+_ARABIC_DIACRITICS = re.compile("[\u064B-\u0652\u0670\u0640]")
+_ARABIC_FOLDS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي"})
+_ARABIC = re.compile("[\u0600-\u06FF]")
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_name(name: str) -> List[str]:
+    """Lower-cased, diacritic- and letter-variant-folded name tokens (English or Arabic)"""
+    text = unicodedata.normalize("NFKC", name or "").lower()
+    text = _ARABIC_DIACRITICS.sub("", text).translate(_ARABIC_FOLDS)
+    tokens = []
+    for token in _NON_WORD.sub(" ", text).split():
+        # Arabic definite article: "الرعايه" and "رعايه" are the same word
+        if token.startswith("ال") and len(token) > 4:
+            token = token[2:]
+        tokens.append(token)
+    return tokens
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _phone_key(phone: Optional[str]) -> str:
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-9:]
+
+def _name_features(names: Tuple[str, str]) -> Tuple[Tuple[FrozenSet[str], FrozenSet[str]], ...]:
+    """Distinctive tokens and character trigrams of both name fields, per script
+
+    Latin and Arabic spellings share no characters, so a listing named in
+    English is compared with an Arabic-named one only through names in the
+    same script.
+    """
+    scripts = ({"tokens": set(), "grams": set()}, {"tokens": set(), "grams": set()})
+    for name in set(names):
+        words = normalize_name(name)
+        distinctive = [w for w in words if w not in GENERIC_WORDS] or words
+        for arabic, script in enumerate(scripts):
+            part = [w for w in distinctive if bool(_ARABIC.search(w)) == bool(arabic)]
+            if part:
+                script["tokens"].update(part)
+                script["grams"] |= _trigrams(" ".join(part))
+    return tuple((frozenset(s["tokens"]), frozenset(s["grams"])) for s in scripts)
+
+def _match_stripe(records: List[tuple], first_row: int, last_row: int) -> List[Tuple[int, int, float]]:
+    """Scored duplicate pairs for the blocks whose row is in [first_row, last_row]
+
+    records holds (index, row, col, x, y, names, phone) for those rows and
+    the row after, so each block can be compared with its forward
+    neighbours; every pair of blocks is visited exactly once. Name
+    features are only built for records that have a listing within reach.
+    """
+    blocks: Dict[Tuple[int, int], List[tuple]] = {}
+    for record in records:
+        blocks.setdefault((record[1], record[2]), []).append(record)
+
+    features: Dict[int, tuple] = {}
+    pairs = []
+
+    def compare(a: tuple, b: tuple):
+        distance = math.hypot(a[3] - b[3], a[4] - b[4])
+        if distance > MAX_DISTANCE_METERS:
+            return
+        for record in (a, b):
+            if record[0] not in features:
+                features[record[0]] = _name_features(record[5])
+        score = _score(features[a[0]], features[b[0]], distance, a[6] and a[6] == b[6])
+        if score:
+            pairs.append((a[0], b[0], score))
+
+    for (row, col), members in blocks.items():
+        if not first_row <= row <= last_row:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                compare(a, b)
+        for neighbour in ((row, col + 1), (row + 1, col - 1), (row + 1, col), (row + 1, col + 1)):
+            for a in members:
+                for b in blocks.get(neighbour, ()):
+                    compare(a, b)
+    return pairs
+
+def _score(a: tuple, b: tuple, distance: float, same_phone: bool) -> float:
+    """Merge confidence for two nearby listings' name features, or 0.0"""
+    name = max(
+        max(_jaccard(a_tokens, b_tokens), _jaccard(a_grams, b_grams))
+        for (a_tokens, a_grams), (b_tokens, b_grams) in zip(a, b)
+    )
+    if name < MIN_NAME_SIMILARITY:
+        return 0.0
+    confidence = 0.7 * name + 0.3 * (1 - distance / MAX_DISTANCE_METERS)
+    if same_phone:
+        confidence = min(1.0, confidence + 0.15)
+    return round(confidence, 3) if confidence >= MIN_CONFIDENCE else 0.0
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+def find_duplicates(facilities: List[Dict[str, Any]],
+                    workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Clusters of listings that are the same facility
+
+    Returns [{"members": [indices], "confidence": float}] for clusters of two
+    or more; confidence is that of the weakest pair joining the cluster.
+    """
+    n = len(facilities)
+    if n < 2:
+        return []
+
+    lat = np.array([f.get("latitude") or 0.0 for f in facilities], dtype=np.float64)
+    lng = np.array([f.get("longitude") or 0.0 for f in facilities], dtype=np.float64)
+
+    # A geohash cell of precision p is a cell of a 2^lat_bits x 2^lng_bits
+    # grid, so its integer row and column identify it without base32
+    lng_bits = math.ceil(GEOHASH_PRECISION * 5 / 2)
+    lat_bits = GEOHASH_PRECISION * 5 // 2
+    rows = np.floor((lat + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64)
+    cols = np.floor((lng + 180.0) / 360.0 * (1 << lng_bits)).astype(np.int64)
+
+    lat0 = math.radians(float(lat.mean()))
+    xs = lng * METERS_PER_DEG_LNG * math.cos(lat0)
+    ys = lat * METERS_PER_DEG_LAT
+
+    order = np.lexsort((cols, rows))
+    records = []
+    for i in order.tolist():
+        if not (lat[i] and lng[i]):
+            continue
+        facility = facilities[i]
+        records.append((i, int(rows[i]), int(cols[i]), float(xs[i]), float(ys[i]),
+                        (facility.get("nameEn") or "", facility.get("nameAr") or ""),
+                        _phone_key(facility.get("phone"))))
+
+    # Stripes of whole block rows, each with the following row attached;
+    # run in-process one after another for small inputs
+    workers = workers or os.cpu_count() or 1
+    parallel = n >= PARALLEL_THRESHOLD and workers > 1
+    size = max(STRIPE_MIN_RECORDS, len(records) // (workers * 4)) if parallel else STRIPE_MIN_RECORDS
+    stripes = []
+    start = 0
+    while start < len(records):
+        end = min(start + size, len(records))
+        last_row = records[end - 1][1]
+        while end < len(records) and records[end][1] == last_row:
+            end += 1
+        tail = end
+        while tail < len(records) and records[tail][1] == last_row + 1:
+            tail += 1
+        stripes.append((records[start:tail], records[start][1], last_row))
+        start = end
+
+    pairs = []
+    if parallel:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for stripe_pairs in pool.map(_match_stripe, *zip(*stripes)):
+                pairs.extend(stripe_pairs)
+    else:
+        for stripe in stripes:
+            pairs.extend(_match_stripe(*stripe))
+
+    uf = _UnionFind(n)
+    for a, b, _ in sorted(pairs, key=lambda p: p[2], reverse=True):
+        uf.union(a, b)
+    clusters: Dict[int, Dict[str, Any]] = {}
+    for a, b, score in pairs:
+        root = uf.find(a)
+        cluster = clusters.setdefault(root, {"members": set(), "confidence": 1.0})
+        cluster["members"].update((a, b))
+        cluster["confidence"] = min(cluster["confidence"], score)
+    return [
+        {"members": sorted(c["members"]), "confidence": c["confidence"]}
+        for c in clusters.values()
+    ]
+
+def merge_duplicates(facilities: List[Dict[str, Any]],
+                     workers: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Collapse duplicate listings into one facility each
+
+    The listing with the most reviews is kept and records the ids it
+    absorbed in mergedPlaceIds. Returns the facilities and a map from each
+    absorbed id to the id that replaced it.
+    """
+    aliases: Dict[str, str] = {}
+    absorbed = set()
+    merged = {}
+    for cluster in find_duplicates(facilities, workers):
+        members = [facilities[i] for i in cluster["members"]]
+        keep = max(members, key=lambda f: (f.get("reviewCount") or 0, f.get("rating") is not None, f["id"]))
+        others = [f["id"] for f in members if f is not keep]
+        merged[keep["id"]] = {**keep, "mergedPlaceIds": others, "dedupConfidence": cluster["confidence"]}
+        for fid in others:
+            aliases[fid] = keep["id"]
+        absorbed.update(id(f) for f in members if f is not keep)
+
+    result = [merged.get(f["id"], f) for f in facilities if id(f) not in absorbed]
+    return result, aliases
@@ -0,0 +1,276 @@
+# BrainSAIT RHDTE - Facility Store
+# In-memory facility directory with a persistent dataset version and change log
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.dedup import merge_duplicates
+
+# Deleted facilities are remembered this long so clients can sync the
+# deletion; after compaction older clients are told to resync in full
+TOMBSTONE_RETENTION_SECONDS = 30 * 24 * 3600
+
+def facility_from_analysis(item: Dict[str, Any], city: str) -> Dict[str, Any]:
+    """Convert one facility_analysis.json result into the API facility shape"""
+    facility = item.get("facility", {})
+    analysis = item.get("maturity_analysis", {})
+
+    f_type = item.get("facility_type", "Medical Center")
+    mapped_type = "Hospital" if f_type == "Hospital" else "Medical Center"
+
+    return {
+        "id": facility.get("place_id", ""),
+        "placeId": facility.get("place_id", ""),
+        "nameEn": facility.get("name", ""),
+        "nameAr": facility.get("name", ""),
+        "type": mapped_type,
+        "address": facility.get("address", ""),
+        "district": facility.get("district", city),
+        "city": city,
+        "latitude": facility.get("location", {}).get("lat", 0.0),
+        "longitude": facility.get("location", {}).get("lng", 0.0),
+        "phone": facility.get("phone"),
+        "website": facility.get("website"),
+        "email": None,
+        "rating": facility.get("rating"),
+        "reviewCount": facility.get("review_count", 0),
+        "isOpen": None,
+        "openingHours": None,
+        "services": [],
+        "insuranceAccepted": [],
+        "languages": ["Arabic", "English"],
+        "hasEmergency": f_type == "Hospital",
+        "is24Hours": False,
+        "hasOnlineBooking": False,
+        "hasWhatsApp": False,
+        "digitalScore": int(analysis.get("score", 0)),
+        "maturityLevel": analysis.get("level", "OFF_GRID")
+    }
+
+def stored_facility_id(db_path: Path, facility_id: str) -> Optional[str]:
+    """Id under which a store's last load kept facility_id (itself or the
+    listing it was merged into), read from its database without loading it
+    """
+    if not Path(db_path).exists():
+        return None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT id FROM facility_aliases WHERE alias = ?", (facility_id,)).fetchone()
+        if row is None:
+            row = conn.execute("SELECT id FROM facilities WHERE id = ? AND deleted = 0",
+                               (facility_id,)).fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+def _fingerprint(facility: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(facility, sort_keys=True).encode("utf-8")).hexdigest()
+
+class FacilityStore:
+    """Facilities served from memory, versioned in a small SQLite file
+
+    Every reload of the source file that changes anything bumps the dataset
+    version by one. Each facility row remembers the version that last
+    upserted or deleted it, so "what changed since version N" is a single
+    indexed query. Deletions are kept as tombstones until compacted.
+
+    Duplicate listings of one facility are merged at load time unless
+    dedupe is off; their ids remain reachable through get().
+    """
+
+    def __init__(self, source_path: Path, db_path: Path, city: str,
+                 tombstone_retention: float = TOMBSTONE_RETENTION_SECONDS,
+                 dedupe: bool = True):
+        self.source_path = Path(source_path)
+        self.db_path = Path(db_path)
+        self.city = city
+        self.tombstone_retention = tombstone_retention
+        self.dedupe = dedupe
+        self._lock = threading.Lock()
+        self._facilities: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._source_mtime: Optional[float] = None
+        self.version = 0
+        self.min_version = 0
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS facilities (
+                                id TEXT PRIMARY KEY,
+                                payload TEXT,
+                                fingerprint TEXT,
+                                version INTEGER NOT NULL,
+                                deleted INTEGER NOT NULL DEFAULT 0,
+                                deleted_at REAL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_facilities_version ON facilities(version)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS facility_aliases (
+                                alias TEXT PRIMARY KEY,
+                                id TEXT NOT NULL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS store_meta (
+                                key TEXT PRIMARY KEY,
+                                value INTEGER NOT NULL)""")
+            meta = dict(conn.execute("SELECT key, value FROM store_meta").fetchall())
+        self.version = meta.get("version", 0)
+        self.min_version = meta.get("min_version", 0)
+
+    def _read_source(self) -> List[Dict[str, Any]]:
+        with open(self.source_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        facilities = [facility_from_analysis(item, self.city) for item in data.get("detailed_results", [])]
+        self._aliases = {}
+        if self.dedupe:
+            listings = len(facilities)
+            facilities, self._aliases = merge_duplicates(facilities)
+            if self._aliases:
+                print(f"🔗 Merged {listings} listings into {len(facilities)} facilities")
+        return facilities
+
+    def refresh(self, force: bool = False) -> int:
+        """Reload the source file if it changed and record the differences"""
+        try:
+            mtime = self.source_path.stat().st_mtime
+        except FileNotFoundError:
+            if self._source_mtime is None:
+                print(f"⚠️ Data file not found: {self.source_path}")
+                self._source_mtime = 0.0
+            return self.version
+        if not force and mtime == self._source_mtime:
+            return self.version
+
+        with self._lock:
+            if not force and mtime == self._source_mtime:
+                return self.version
+            try:
+                facilities = self._read_source()
+            except (OSError, ValueError) as e:
+                print(f"❌ Error loading facilities: {e}")
+                return self.version
+            self._sync(facilities)
+            self._source_mtime = mtime
+        return self.version
+
+    def _sync(self, facilities: List[Dict[str, Any]]):
+        by_id = {f["id"]: f for f in facilities}
+        fingerprints = {fid: _fingerprint(f) for fid, f in by_id.items()}
+
+        with self._connect() as conn:
+            stored = {
+                fid: (fingerprint, deleted)
+                for fid, fingerprint, deleted in conn.execute(
+                    "SELECT id, fingerprint, deleted FROM facilities"
+                )
+            }
+            upserts = [
+                fid for fid, fingerprint in fingerprints.items()
+                if stored.get(fid) != (fingerprint, 0)
+            ]
+            deletions = [
+                fid for fid, (_, deleted) in stored.items()
+                if not deleted and fid not in by_id
+            ]
+
+            if upserts or deletions:
+                version = self.version + 1
+                conn.executemany("""INSERT INTO facilities (id, payload, fingerprint, version, deleted, deleted_at)
+                                    VALUES (?, ?, ?, ?, 0, NULL)
+                                    ON CONFLICT(id) DO UPDATE SET
+                                        payload = excluded.payload,
+                                        fingerprint = excluded.fingerprint,
+                                        version = excluded.version,
+                                        deleted = 0,
+                                        deleted_at = NULL""",
+                                 [(fid, json.dumps(by_id[fid]), fingerprints[fid], version)
+                                  for fid in upserts])
+                conn.executemany("""UPDATE facilities
+                                    SET payload = NULL, fingerprint = NULL, version = ?,
+                                        deleted = 1, deleted_at = ?
+                                    WHERE id = ?""",
+                                 [(version, time.time(), fid) for fid in deletions])
+                conn.execute("""INSERT INTO store_meta (key, value) VALUES ('version', ?)
+                                ON CONFLICT(key) DO UPDATE SET value = excluded.value""", (version,))
+                self.version = version
+                print(f"✅ Facility dataset v{version}: {len(upserts)} upserted, {len(deletions)} deleted")
+
+            conn.execute("DELETE FROM facility_aliases")
+            conn.executemany("INSERT INTO facility_aliases (alias, id) VALUES (?, ?)",
+                             list(self._aliases.items()))
+
+        self._facilities = list(by_id.values())
+        self._by_id = by_id
+        print(f"✅ Loaded {len(self._facilities)} facilities from data file")
+        self.compact()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the source file has been read (or found missing) at least once"""
+        return self._source_mtime is not None
+
+    def all(self) -> List[Dict[str, Any]]:
+        self.refresh()
+        return self._facilities
+
+    def get(self, facility_id: str) -> Optional[Dict[str, Any]]:
+        self.refresh()
+        return self._by_id.get(self._aliases.get(facility_id, facility_id))
+
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """Facilities upserted or deleted after version `since`
+
+        fullResync is set when the log no longer covers `since` (tombstones
+        were compacted, or the client's version is from another dataset).
+        """
+        self.refresh()
+        if since < self.min_version or since > self.version:
+            return {"version": self.version, "since": since, "fullResync": True,
+                    "upserted": [], "deleted": []}
+
+        upserted, deleted = [], []
+        with self._connect() as conn:
+            for fid, payload, is_deleted in conn.execute(
+                "SELECT id, payload, deleted FROM facilities WHERE version > ? ORDER BY version",
+                (since,)
+            ):
+                if is_deleted:
+                    deleted.append(fid)
+                else:
+                    upserted.append(json.loads(payload))
+        return {"version": self.version, "since": since, "fullResync": False,
+                "upserted": upserted, "deleted": deleted}
+
+    def compact(self) -> int:
+        """Drop expired tombstones; clients older than them must resync in full"""
+        cutoff = time.time() - self.tombstone_retention
+        with self._connect() as conn:
+            purged_through = conn.execute(
+                "SELECT MAX(version) FROM facilities WHERE deleted = 1 AND deleted_at < ?",
+                (cutoff,)
+            ).fetchone()[0]
+            if purged_through is None:
+                return 0
+            purged = conn.execute(
+                "DELETE FROM facilities WHERE deleted = 1 AND deleted_at < ?", (cutoff,)
+            ).rowcount
+            self.min_version = max(self.min_version, purged_through)
+            conn.execute("""INSERT INTO store_meta (key, value) VALUES ('min_version', ?)
+                            ON CONFLICT(key) DO UPDATE SET value = excluded.value""",
+                         (self.min_version,))
+        return purged
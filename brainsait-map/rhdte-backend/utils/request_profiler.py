@@ -0,0 +1,329 @@
+# BrainSAIT RHDTE - Request Profiler
+# On-demand stack-sampling profiles of individual HTTP requests
+# (also used by the Unified Dashboard backend, see its services/request_profiler.py)
+
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+# Seconds between stack samples while a profiled request is running
+SAMPLE_INTERVAL = 0.005
+
+# Fraction of requests profiled at random, and the age after which a
+# running request starts being profiled regardless
+SAMPLE_RATE = 0.001
+SLOW_THRESHOLD = 2.0
+
+# Captures kept on disk; the oldest are deleted first
+MAX_CAPTURES = 200
+
+# Innermost frames of threads that are idle rather than doing work
+IDLE_FRAMES = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get")}
+
+PROFILE_HEADER = b"x-profile"
+
+def sign_profile_request(secret: str, path: str, ttl: float = 300) -> str:
+    """X-Profile header value that profiles requests to path until it expires"""
+    expires = int(time.time() + ttl)
+    digest = hmac.new(secret.encode(), f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}:{digest}"
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _Capture:
+    __slots__ = ("method", "path", "reason", "started", "sampling", "stacks", "samples")
+
+    def __init__(self, method: str, path: str, reason: Optional[str]):
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started = time.monotonic()
+        self.sampling = reason is not None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+class RequestProfiler:
+    """Samples the stacks of busy threads while selected requests run
+
+    A request is profiled when it carries a valid signed X-Profile header,
+    matches a path armed through the admin endpoint, is drawn by the random
+    sample, or has not started its response after slow_threshold seconds
+    (then only the remainder up to the response start is captured). One background thread takes the samples; it
+    records every thread not parked in an idle wait, so requests running
+    concurrently with a profiled one show up in its profile too.
+
+    Each capture is written in folded-stack format (one "a;b;c count" line
+    per distinct stack), which flamegraph.pl, speedscope and inferno read
+    directly.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        secret: str,
+        sample_rate: float = SAMPLE_RATE,
+        slow_threshold: Optional[float] = SLOW_THRESHOLD,
+        sample_interval: float = SAMPLE_INTERVAL,
+        max_captures: int = MAX_CAPTURES
+    ):
+        if not secret:
+            # Without a secret no header or key can ever be accepted
+            raise ValueError("The request profiler needs a secret (set PROFILER_SECRET)")
+        self.directory = Path(directory)
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.sample_interval = sample_interval
+        self.max_captures = max_captures
+        self._armed: Dict[str, int] = {}
+        self._active: Dict[int, _Capture] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Request selection
+    # ------------------------------------------------------------------
+
+    def verify_key(self, key: Optional[str]) -> bool:
+        return bool(key and hmac.compare_digest(key, self.secret))
+
+    def _signed(self, value: Optional[str], path: str) -> bool:
+        if not (value and ":" in value):
+            return False
+        expires, digest = value.split(":", 1)
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        expected = hmac.new(self.secret.encode(), f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(digest, expected)
+
+    def arm(self, path_prefix: str, count: int = 1):
+        """Profile the next count requests whose path starts with path_prefix"""
+        with self._lock:
+            self._armed[path_prefix] = self._armed.get(path_prefix, 0) + count
+
+    def _take_armed(self, path: str) -> bool:
+        with self._lock:
+            for prefix, remaining in self._armed.items():
+                if path.startswith(prefix):
+                    if remaining <= 1:
+                        del self._armed[prefix]
+                    else:
+                        self._armed[prefix] = remaining - 1
+                    return True
+        return False
+
+    def _reason(self, path: str, header: Optional[str]) -> Optional[str]:
+        if header and self._signed(header, path):
+            return "signed"
+        if self._armed and self._take_armed(path):
+            return "armed"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def _ensure_sampler(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                captures = list(self._active.values())
+            if not captures:
+                self._wake.wait(0.05)
+                self._wake.clear()
+                continue
+
+            now = time.monotonic()
+            for capture in captures:
+                if not capture.sampling and self.slow_threshold is not None \
+                        and now - capture.started >= self.slow_threshold:
+                    capture.reason = "slow"
+                    capture.sampling = True
+            sampling = [c for c in captures if c.sampling]
+            if not sampling:
+                self._wake.wait(0.05)
+                self._wake.clear()
+                continue
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                for capture in sampling:
+                    capture.stacks[folded] += 1
+            for capture in sampling:
+                capture.samples += 1
+            time.sleep(self.sample_interval)
+
+    def _begin(self, method: str, path: str, header: Optional[str]) -> Optional[_Capture]:
+        reason = self._reason(path, header)
+        if reason is None and self.slow_threshold is None:
+            return None
+        capture = _Capture(method, path, reason)
+        with self._lock:
+            self._active[id(capture)] = capture
+        self._ensure_sampler()
+        if reason is not None:
+            self._wake.set()
+        return capture
+
+    def _response_started(self, capture: _Capture):
+        """Stop the slow clock once headers are out
+
+        Streaming responses (SSE, NDJSON) stay open long after that, so
+        only time to the response start counts towards slow_threshold.
+        Requests picked up front keep being profiled until they finish.
+        """
+        if capture.reason in (None, "slow"):
+            self._end(capture)
+
+    def _end(self, capture: _Capture):
+        with self._lock:
+            if self._active.pop(id(capture), None) is None:
+                return
+        # Requests picked up front are kept even if they finished before
+        # the first sample, so their duration is still on record
+        if capture.sampling:
+            try:
+                self._write(capture, time.monotonic() - capture.started)
+            except OSError as e:
+                print(f"❌ Could not write profile for {capture.path}: {e}")
+
+    # ------------------------------------------------------------------
+    # Ring buffer on disk
+    # ------------------------------------------------------------------
+
+    def _write(self, capture: _Capture, duration: float):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", capture.path).strip("_")[:60] or "root"
+        capture_id = (f"{int(time.time() * 1000)}-{capture.reason}-{capture.method}-"
+                      f"{slug}-{int(duration * 1000)}ms")
+        partial = self.directory / f".{capture_id}.partial"
+        with open(partial, "w") as f:
+            for stack, count in capture.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(partial, self.directory / f"{capture_id}.folded")
+
+        captures = sorted(self.directory.glob("*.folded"))
+        for old in captures[:max(0, len(captures) - self.max_captures)]:
+            old.unlink(missing_ok=True)
+
+    def list_captures(self) -> List[Dict[str, Any]]:
+        captures = []
+        for path in sorted(self.directory.glob("*.folded"), reverse=True):
+            parts = path.stem.split("-")
+            if len(parts) < 5:
+                continue
+            captures.append({
+                "id": path.stem,
+                "captured_at": int(parts[0]) / 1000,
+                "reason": parts[1],
+                "method": parts[2],
+                "path": "-".join(parts[3:-1]),
+                "duration_ms": int(parts[-1][:-2]),
+                "bytes": path.stat().st_size,
+            })
+        return captures
+
+    def read_capture(self, capture_id: str) -> Optional[str]:
+        if not re.fullmatch(r"[A-Za-z0-9_\-]+", capture_id):
+            return None
+        path = self.directory / f"{capture_id}.folded"
+        return path.read_text() if path.exists() else None
+
+class ProfilerMiddleware:
+    """ASGI middleware that hands HTTP requests to a RequestProfiler"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = None
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                header = value.decode("latin-1")
+                break
+        capture = self.profiler._begin(scope["method"], scope["path"], header)
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                self.profiler._response_started(capture)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler._end(capture)
+
+def profiler_router(profiler: RequestProfiler, prefix: str = "/admin/profiles") -> APIRouter:
+    """List, download and arm captures; every route needs the X-Profiler-Key header"""
+    router = APIRouter(prefix=prefix)
+
+    def authorize(key: Optional[str]):
+        if not profiler.verify_key(key):
+            raise HTTPException(status_code=403, detail="Invalid profiler key")
+
+    @router.get("")
+    async def list_profiles(x_profiler_key: Optional[str] = Header(None)):
+        """List stored request profiles, newest first"""
+        authorize(x_profiler_key)
+        return {"captures": profiler.list_captures()}
+
+    @router.get("/{capture_id}", response_class=PlainTextResponse)
+    async def get_profile(capture_id: str, x_profiler_key: Optional[str] = Header(None)):
+        """Download one profile in folded-stack (flamegraph) format"""
+        authorize(x_profiler_key)
+        content = profiler.read_capture(capture_id)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return PlainTextResponse(content, headers={
+            "Content-Disposition": f'attachment; filename="{capture_id}.folded"'
+        })
+
+    @router.post("/arm")
+    async def arm_profiler(
+        path: str = Query(..., description="Path prefix to profile"),
+        count: int = Query(1, ge=1, le=100),
+        x_profiler_key: Optional[str] = Header(None)
+    ):
+        """Profile the next `count` requests whose path starts with `path`"""
+        authorize(x_profiler_key)
+        profiler.arm(path, count)
+        return {"armed": path, "count": count}
+
+    return router
@@ -0,0 +1,262 @@
+# BrainSAIT RHDTE - Sharded Facility Store
+# One facility store per city, loaded on first use and evicted under a memory budget
+
+import heapq
+import itertools
+import json
+import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.facility_store import FacilityStore, stored_facility_id
+
+# Loaded shards are evicted, least recently used first, above this total
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Threads used to load and query shards of a cross-city request
+DEFAULT_FAN_OUT_WORKERS = 4
+
+# Facility dicts take about 1.5x their JSON size in memory; the rest covers
+# the id index and per-shard caches built on top of them
+BYTES_PER_JSON_BYTE = 2.0
+SIZE_SAMPLE = 256
+
+def city_slug(city: str) -> str:
+    """File-name form of a city name: "Al Khobar" -> "al-khobar\""""
+    return re.sub(r"[^a-z0-9]+", "-", city.lower()).strip("-")
+
+def _estimate_bytes(facilities: List[Dict[str, Any]]) -> int:
+    if not facilities:
+        return 0
+    step = max(1, len(facilities) // SIZE_SAMPLE)
+    sample = facilities[::step]
+    json_bytes = sum(len(json.dumps(f)) for f in sample) / len(sample)
+    return int(json_bytes * BYTES_PER_JSON_BYTE * len(facilities))
+
+class Shard:
+    """One city's facility store, plus anything derived from its facilities
+
+    derived holds per-city caches (analytics cube, coverage results) so
+    they are released together with the facilities when the shard is
+    evicted.
+    """
+
+    def __init__(self, city: str, source_path: Path, db_path: Path, dedupe: bool):
+        self.city = city
+        self.store = FacilityStore(source_path=source_path, db_path=db_path, city=city, dedupe=dedupe)
+        self.derived: Dict[str, Any] = {}
+        self.bytes = 0
+        self._measured: Optional[list] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.store.loaded
+
+    def all(self) -> List[Dict[str, Any]]:
+        facilities = self.store.all()
+        if facilities is not self._measured:
+            with self._lock:
+                if facilities is not self._measured:
+                    self.bytes = _estimate_bytes(facilities)
+                    self.derived.clear()
+                    self._measured = facilities
+        return facilities
+
+class ShardedFacilityStore:
+    """Facilities partitioned into one shard per city
+
+    A city's shard is data/cities/<slug>.json, with its version log in
+    data/cities/<slug>.db. The default city may instead use the original
+    data/facility_analysis.json and data/facility_store.db, so existing
+    deployments keep their dataset version. The default city always has a
+    shard; without a data file it is simply empty.
+
+    Shards load on first access. Whenever the estimated size of the loaded
+    shards exceeds the memory budget, the least recently used ones are
+    dropped; their version logs stay on disk, so a shard that is loaded
+    again carries on from the same dataset version.
+    """
+
+    def __init__(self, data_dir: Path, default_city: str,
+                 memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                 workers: int = DEFAULT_FAN_OUT_WORKERS,
+                 dedupe: bool = True):
+        self.data_dir = Path(data_dir)
+        self.cities_dir = self.data_dir / "cities"
+        self.default_city = default_city
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.dedupe = dedupe
+        self._shards: "OrderedDict[str, Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+        self._sources_cache: Optional[tuple] = None
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Shard discovery and lifecycle
+    # ------------------------------------------------------------------
+
+    def _sources(self) -> Dict[str, tuple]:
+        """(city name, source path, db path) by slug for every known city
+
+        Rescanned only when the data or cities directory changes.
+        """
+        stamp = tuple(
+            path.stat().st_mtime_ns if path.is_dir() else None
+            for path in (self.data_dir, self.cities_dir)
+        )
+        cached = self._sources_cache
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        sources = {
+            city_slug(self.default_city): (
+                self.default_city,
+                self.data_dir / "facility_analysis.json",
+                self.data_dir / "facility_store.db"
+            )
+        }
+        if self.cities_dir.is_dir():
+            for path in sorted(self.cities_dir.glob("*.json")):
+                slug = city_slug(path.stem)
+                name = self.default_city if slug == city_slug(self.default_city) \
+                    else path.stem.replace("-", " ").replace("_", " ").title()
+                sources[slug] = (name, path, path.with_suffix(".db"))
+        self._sources_cache = (stamp, sources)
+        return sources
+
+    def cities(self) -> List[str]:
+        """Names of all cities with a shard, the default city first"""
+        names = [name for name, _, _ in self._sources().values()]
+        return sorted(names, key=lambda name: (name != self.default_city, name))
+
+    def resolve(self, city: Optional[str]) -> str:
+        """Canonical name of a city (any case or slug); KeyError if it has no shard"""
+        if city is None:
+            city = self.default_city
+        source = self._sources().get(city_slug(city))
+        if source is None:
+            raise KeyError(city)
+        return source[0]
+
+    def shard(self, city: Optional[str] = None) -> Shard:
+        """The loaded shard for city (default city if None); KeyError if unknown"""
+        slug = city_slug(city if city is not None else self.default_city)
+        with self._lock:
+            shard = self._shards.get(slug)
+            if shard is not None:
+                self._shards.move_to_end(slug)
+        if shard is None:
+            source = self._sources().get(slug)
+            if source is None:
+                raise KeyError(city)
+            name, source_path, db_path = source
+            with self._lock:
+                shard = self._shards.get(slug)
+                if shard is None:
+                    shard = Shard(name, source_path, db_path, self.dedupe)
+                    self._shards[slug] = shard
+        shard.all()
+        self._evict(keep=slug)
+        return shard
+
+    def is_loaded(self, city: Optional[str] = None) -> bool:
+        with self._lock:
+            shard = self._shards.get(city_slug(city if city is not None else self.default_city))
+        return bool(shard and shard.loaded)
+
+    def loaded_shards(self) -> List[Shard]:
+        with self._lock:
+            return [shard for shard in self._shards.values() if shard.loaded]
+
+    def _evict(self, keep: str):
+        with self._lock:
+            total = sum(shard.bytes for shard in self._shards.values())
+            for slug in list(self._shards):
+                if total <= self.memory_budget:
+                    break
+                if slug == keep:
+                    continue
+                total -= self._shards.pop(slug).bytes
+                self.evictions += 1
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Every known city with whether its shard is in memory and its size"""
+        with self._lock:
+            resident = dict(self._shards)
+        cities = []
+        for name in self.cities():
+            shard = resident.get(city_slug(name))
+            cities.append({
+                "name": name,
+                "loaded": bool(shard and shard.loaded),
+                "facilities": len(shard.store.all()) if shard and shard.loaded else None,
+                "datasetVersion": shard.store.version if shard and shard.loaded else None,
+                "estimatedBytes": shard.bytes if shard else 0,
+            })
+        return cities
+
+    # ------------------------------------------------------------------
+    # Single-shard access
+    # ------------------------------------------------------------------
+
+    def all(self, city: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.shard(city).all()
+
+    def get(self, facility_id: str, city: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """A facility by id (or merged alias), from any city unless city is given
+
+        Without a city, shards in memory are searched first. For the others
+        only the id index in each shard's .db is read, and just the shard
+        that holds the id is loaded, so unknown ids never load anything.
+        Cities that have never been loaded have no index yet and are only
+        searched when named.
+        """
+        if city is not None:
+            return self.shard(city).store.get(facility_id)
+        searched = set()
+        for shard in self.loaded_shards():
+            searched.add(city_slug(shard.city))
+            facility = shard.store.get(facility_id)
+            if facility is not None:
+                return facility
+        for slug, (name, _, db_path) in self._sources().items():
+            if slug not in searched and stored_facility_id(db_path, facility_id) is not None:
+                return self.shard(name).store.get(facility_id)
+        return None
+
+    # ------------------------------------------------------------------
+    # Cross-shard queries
+    # ------------------------------------------------------------------
+
+    def fan_out(self, cities: Iterable[str], fn: Callable[[Shard], Any]) -> Dict[str, Any]:
+        """fn applied to each city's shard, run in parallel; results by city name
+
+        Shards that are not in memory are loaded by the worker that needs
+        them, so a cold multi-city query loads its shards concurrently.
+        """
+        cities = list(cities)
+        if len(cities) == 1:
+            shard = self.shard(cities[0])
+            return {shard.city: fn(shard)}
+        futures = [self._pool.submit(self._apply, city, fn) for city in cities]
+        return dict(future.result() for future in futures)
+
+    def _apply(self, city: str, fn: Callable[[Shard], Any]) -> tuple:
+        shard = self.shard(city)
+        return shard.city, fn(shard)
+
+def merge_top_k(partials: Iterable[List[Dict[str, Any]]], key: Callable, k: int) -> List[Dict[str, Any]]:
+    """The k best of several shards' own top-k lists"""
+    return heapq.nlargest(k, itertools.chain.from_iterable(partials), key=key)
+
+def merge_counts(partials: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Sum of several shards' {key: count} breakdowns"""
+    total: Counter = Counter()
+    for counts in partials:
+        total.update(counts)
+    return dict(total)
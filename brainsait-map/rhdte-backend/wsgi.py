@@ -13,17 +13,13 @@ SETUP INSTRUCTIONS:
 """
 
 import sys
-import os
 
 # Add project directory to path
 project_home = '/home/maplinc/rhdte-backend'
 if project_home not in sys.path:
     sys.path.insert(0, project_home)
 
-# Load environment variables
-from dotenv import load_dotenv
-env_path = os.path.join(project_home, '.env')
-load_dotenv(env_path)
+# Environment variables are read from project_home/.env by utils.config
 
 # Import FastAPI app
 from main import app